@@ -0,0 +1,283 @@
+"""
+Controle de admissão e descarte de carga
+
+Cada rota pertence a uma classe de custo (leve, moderado, pesado). Antes de
+executar o handler o middleware verifica, em ordem:
+
+1. Fila do pool de threads da classe acima do limite   -> 503
+2. Concorrência máxima da rota                         -> 503
+3. Taxa por cliente (token bucket por cliente e classe) -> 429
+
+A taxa vem por último: uma requisição descartada por carga (503) não
+gasta o token do cliente. Respostas recusadas trazem Retry-After e nenhum
+trabalho é executado.
+"""
+
+import json
+import math
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs
+
+from api.config import settings
+from api.executor import BlockingExecutor, default_pool, heavy_pool
+from api.metrics import REGISTRY, Counter, Gauge, resolve_route
+
+CHEAP = "leve"
+MODERATE = "moderado"
+HEAVY = "pesado"
+
+# Classe de custo por rota (template); rotas não listadas são moderadas
+ROUTE_COST: Dict[str, str] = {
+    "/": CHEAP,
+    "/health": CHEAP,
+    "/metrics": CHEAP,
+    "/docs": CHEAP,
+    "/docs/oauth2-redirect": CHEAP,
+    "/redoc": CHEAP,
+    "/openapi.json": CHEAP,
+    "/books/{book_id}": CHEAP,
+    "/books": MODERATE,
+    "/books/search": MODERATE,
+    "/books/suggest": CHEAP,
+    "/books/query": MODERATE,
+    "/books/top": MODERATE,
+    "/books/genres": MODERATE,
+    "/books/genre/{genre}": MODERATE,
+    "/books/{book_id}/similar": MODERATE,
+    "/debug": MODERATE,
+    "/stats": HEAVY,
+    "/stats/groupby": MODERATE,
+    "/stats/histogram": MODERATE,
+    "/ml/sample": HEAVY,
+}
+
+# Buscas com termos muito curtos casam com quase todo o catálogo
+SHORT_QUERY_LENGTH = 2
+
+ADMISSION_REJECTED = REGISTRY.register(
+    Counter(
+        "admission_rejected_total",
+        "Requisições recusadas pelo controle de admissão",
+        ["route", "cost_class", "reason"],
+    )
+)
+ADMISSION_ADMITTED = REGISTRY.register(
+    Counter(
+        "admission_admitted_total",
+        "Requisições admitidas por classe de custo",
+        ["cost_class"],
+    )
+)
+ADMISSION_LIMIT = REGISTRY.register(
+    Gauge(
+        "admission_limit",
+        "Limites configurados por classe de custo",
+        ["cost_class", "limit"],
+    )
+)
+
+
+@dataclass(frozen=True)
+class CostClassLimits:
+    """Limites de uma classe de custo"""
+
+    concurrency: int  # por rota, 0 = sem limite
+    rate: float  # requisições/s por cliente, 0 = sem limite
+    burst: int
+    pool: Optional[BlockingExecutor]  # pool cuja fila é observada
+
+
+def build_limits() -> Dict[str, CostClassLimits]:
+    """Limites por classe a partir das configurações"""
+    return {
+        CHEAP: CostClassLimits(concurrency=0, rate=0.0, burst=1, pool=None),
+        MODERATE: CostClassLimits(
+            concurrency=settings.admission_moderate_concurrency,
+            rate=settings.admission_moderate_rate,
+            burst=settings.admission_moderate_burst,
+            pool=default_pool,
+        ),
+        HEAVY: CostClassLimits(
+            concurrency=settings.admission_heavy_concurrency,
+            rate=settings.admission_heavy_rate,
+            burst=settings.admission_heavy_burst,
+            pool=heavy_pool,
+        ),
+    }
+
+
+def classify(route: str, query_string: bytes = b"") -> str:
+    """
+    Classe de custo de uma requisição
+
+    Args:
+        route: Template da rota
+        query_string: Query string bruta (usada para ajustar o custo)
+
+    Returns:
+        leve, moderado ou pesado
+    """
+    cost = ROUTE_COST.get(route, MODERATE)
+    if route == "/books/search" and query_string:
+        terms = parse_qs(query_string.decode("latin-1")).get("q", [""])
+        if len(terms[0].strip()) <= SHORT_QUERY_LENGTH:
+            cost = HEAVY
+    return cost
+
+
+class TokenBuckets:
+    """Token buckets por (cliente, classe) com número limitado de clientes"""
+
+    def __init__(self, max_clients: int = 10000):
+        self.max_clients = max_clients
+        self._buckets: "OrderedDict[Tuple[str, str], list]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def acquire(
+        self, key: Tuple[str, str], rate: float, burst: int, now: Optional[float] = None
+    ) -> float:
+        """
+        Consome um token
+
+        Returns:
+            0 se admitido; caso contrário, segundos até haver um token
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = [float(burst), now]
+                self._buckets[key] = bucket
+                if len(self._buckets) > self.max_clients:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+                tokens = min(float(burst), bucket[0] + (now - bucket[1]) * rate)
+                bucket[0], bucket[1] = tokens, now
+
+            if bucket[0] >= 1.0:
+                bucket[0] -= 1.0
+                return 0.0
+            return (1.0 - bucket[0]) / rate
+
+
+class AdmissionController:
+    """Decide se uma requisição pode ser executada"""
+
+    def __init__(self, limits: Optional[Dict[str, CostClassLimits]] = None):
+        self.limits = limits or build_limits()
+        self.buckets = TokenBuckets()
+        self.in_flight: Dict[str, int] = {}
+        for cost_class, limits in self.limits.items():
+            ADMISSION_LIMIT.set(limits.concurrency, cost_class, "concurrency")
+            ADMISSION_LIMIT.set(limits.rate, cost_class, "rate")
+            ADMISSION_LIMIT.set(limits.burst, cost_class, "burst")
+        ADMISSION_LIMIT.set(settings.admission_max_queue_depth, "*", "queue_depth")
+
+    def check(
+        self, route: str, cost_class: str, client: str
+    ) -> Optional[Tuple[int, int, str]]:
+        """
+        Verifica os limites (sem reservar a vaga de concorrência)
+
+        Returns:
+            None se admitida, ou (status, retry_after, motivo) se recusada
+        """
+        limits = self.limits[cost_class]
+
+        max_depth = settings.admission_max_queue_depth
+        if (
+            limits.pool is not None
+            and max_depth
+            and limits.pool.queue_depth >= max_depth
+        ):
+            return 503, settings.admission_retry_after, "queue_depth"
+
+        if limits.concurrency and self.in_flight.get(route, 0) >= limits.concurrency:
+            return 503, settings.admission_retry_after, "concurrency"
+
+        # Por último: só consome o token se a requisição vai ser executada
+        if limits.rate > 0:
+            wait = self.buckets.acquire((client, cost_class), limits.rate, limits.burst)
+            if wait > 0:
+                return 429, max(int(math.ceil(wait)), 1), "rate_limit"
+
+        return None
+
+    def enter(self, route: str):
+        self.in_flight[route] = self.in_flight.get(route, 0) + 1
+
+    def leave(self, route: str):
+        self.in_flight[route] -= 1
+
+
+def _client_id(scope) -> str:
+    """Identificador do cliente (IP ou primeiro X-Forwarded-For)"""
+    if settings.admission_trust_forwarded_for:
+        for name, value in scope.get("headers", []):
+            if name == b"x-forwarded-for":
+                return value.decode("latin-1").split(",")[0].strip()
+    client = scope.get("client")
+    return client[0] if client else "desconhecido"
+
+
+_REASON_DETAIL = {
+    "rate_limit": "Limite de requisições excedido para este cliente",
+    "queue_depth": "Servidor sobrecarregado, tente novamente",
+    "concurrency": "Muitas requisições simultâneas para este endpoint",
+}
+
+
+class AdmissionMiddleware:
+    """Middleware ASGI que aplica o AdmissionController antes do handler"""
+
+    def __init__(self, app, controller: Optional[AdmissionController] = None):
+        self.app = app
+        self.controller = controller or AdmissionController()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.admission_enabled:
+            await self.app(scope, receive, send)
+            return
+
+        route = resolve_route(scope)
+        cost_class = classify(route, scope.get("query_string", b""))
+        if cost_class == CHEAP:
+            await self.app(scope, receive, send)
+            return
+
+        rejection = self.controller.check(route, cost_class, _client_id(scope))
+        if rejection is not None:
+            status, retry_after, reason = rejection
+            ADMISSION_REJECTED.inc(route, cost_class, reason)
+            await _send_rejection(send, status, retry_after, _REASON_DETAIL[reason])
+            return
+
+        ADMISSION_ADMITTED.inc(cost_class)
+        # check + enter sem await entre eles: atômico no event loop
+        self.controller.enter(route)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.leave(route)
+
+
+async def _send_rejection(send, status: int, retry_after: int, detail: str):
+    """Resposta JSON de recusa com Retry-After"""
+    body = json.dumps({"detail": detail}, ensure_ascii=False).encode("utf-8")
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(retry_after).encode()),
+            ],
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,187 @@
+"""
+Índices bitmap para filtros sobre colunas de baixa cardinalidade
+
+Para cada valor distinto de category, rating, availability e faixa de
+preço guarda um bitmap compactado (np.packbits, 1 bit por livro). Filtros
+combinados viram AND/OR sobre os bitmaps e o total é a contagem de bits
+(popcount). Faixas numéricas (preço, cópias, data da coleta) usam o array
+de valores ordenado com busca binária.
+
+Os índices são construídos uma vez por versão do dataset; o custo de um
+filtro passa a depender de n/8 bytes por operação, não de comparações de
+strings linha a linha.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Iterable, Tuple
+
+import numpy as np
+import pandas as pd
+
+from api.facets import PRICE_BIN_LABELS, price_bin_codes
+
+# Colunas com índice ordenado (faixas por busca binária)
+SORTED_COLUMNS = ("price", "availability_copies", "scraped_at")
+
+if hasattr(np, "bitwise_count"):
+
+    def popcount(bits: np.ndarray) -> int:
+        """Quantidade de bits ligados"""
+        return int(np.bitwise_count(bits).sum(dtype=np.int64))
+
+else:  # numpy < 2.0
+    _POPCOUNT_TABLE = np.array([bin(i).count("1") for i in range(256)], np.uint8)
+
+    def popcount(bits: np.ndarray) -> int:
+        """Quantidade de bits ligados"""
+        return int(_POPCOUNT_TABLE[bits].sum(dtype=np.int64))
+
+
+@dataclass
+class BitmapColumn:
+    """Bitmaps de uma coluna: uma linha por valor distinto (ordenado)"""
+
+    values: list
+    codes: np.ndarray  # código do valor de cada livro (-1 = nulo)
+    bitmaps: np.ndarray  # (n_valores, n_bytes) uint8
+    counts: np.ndarray  # livros por valor
+    lookup: Dict  # valor -> linha em bitmaps
+
+
+@dataclass
+class SortedColumn:
+    """Valores de uma coluna numérica ordenados e suas posições"""
+
+    values: np.ndarray  # valores não nulos, ordenados
+    order: np.ndarray  # posição do livro de cada valor ordenado
+    raw: np.ndarray  # valores na ordem do dataset
+    valid: np.ndarray  # False onde o valor é nulo
+
+    def range(
+        self,
+        low=None,
+        high=None,
+        low_inclusive: bool = True,
+        high_inclusive: bool = True,
+    ) -> Tuple[int, int]:
+        """Intervalo [início, fim) em `values` entre os limites"""
+        lo = (
+            0
+            if low is None
+            else np.searchsorted(self.values, low, "left" if low_inclusive else "right")
+        )
+        hi = (
+            len(self.values)
+            if high is None
+            else np.searchsorted(
+                self.values, high, "right" if high_inclusive else "left"
+            )
+        )
+        return int(lo), max(int(hi), int(lo))
+
+
+def sortable_values(series: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+    """Valores comparáveis (float ou ns desde a época) e máscara de não nulos"""
+    if series.name == "scraped_at":
+        # Com offset: convertido para UTC; sem offset: já tomado como UTC
+        # (como em filters._convert)
+        timestamps = pd.to_datetime(
+            series, errors="coerce", format="ISO8601", utc=True
+        ).dt.tz_localize(None)
+        valid = timestamps.notna().to_numpy()
+        values = timestamps.astype("datetime64[ns]").to_numpy().view(np.int64)
+        return values, valid
+    values = series.to_numpy(dtype=np.float64)
+    return values, ~np.isnan(values)
+
+
+class BitmapIndex:
+    """Bitmaps por valor e arrays ordenados para um DataFrame de livros"""
+
+    def __init__(self, df: pd.DataFrame):
+        """
+        Constrói os índices
+
+        Args:
+            df: DataFrame de livros (posições = índice posicional)
+        """
+        self.n_rows = len(df)
+        self.n_bytes = (self.n_rows + 7) // 8
+        self.columns: Dict[str, BitmapColumn] = {}
+        self.sorted: Dict[str, SortedColumn] = {}
+
+        if "category" in df.columns:
+            # Categoria comparada sem diferenciar maiúsculas
+            self._add_column("category", df["category"].str.lower())
+        for name in ("rating", "availability"):
+            if name in df.columns:
+                self._add_column(name, df[name])
+        if "price" in df.columns:
+            codes = price_bin_codes(df["price"].to_numpy(dtype=np.float64))
+            labels = np.asarray(PRICE_BIN_LABELS, dtype=object)[codes]
+            labels[codes < 0] = None  # sem preço: fora de todas as faixas
+            self._add_column("price_bin", pd.Series(labels))
+
+        for name in SORTED_COLUMNS:
+            if name in df.columns:
+                raw, valid = sortable_values(df[name])
+                positions = np.flatnonzero(valid)
+                order = positions[np.argsort(raw[positions], kind="stable")]
+                self.sorted[name] = SortedColumn(
+                    values=raw[order], order=order, raw=raw, valid=valid
+                )
+
+    def _add_column(self, name: str, series: pd.Series):
+        codes, uniques = pd.factorize(series, sort=True)
+        bitmaps = np.empty((len(uniques), self.n_bytes), dtype=np.uint8)
+        for code in range(len(uniques)):
+            bitmaps[code] = np.packbits(codes == code)
+        values = [v.item() if hasattr(v, "item") else v for v in uniques]
+        self.columns[name] = BitmapColumn(
+            values=values,
+            codes=codes.astype(np.int32),
+            bitmaps=bitmaps,
+            counts=np.bincount(codes[codes >= 0], minlength=len(uniques)),
+            lookup={value: code for code, value in enumerate(values)},
+        )
+
+    # Construção e conversão de bitmaps
+
+    def empty(self) -> np.ndarray:
+        return np.zeros(self.n_bytes, dtype=np.uint8)
+
+    def from_mask(self, mask: np.ndarray) -> np.ndarray:
+        return np.packbits(mask)
+
+    def from_positions(self, positions: np.ndarray) -> np.ndarray:
+        mask = np.zeros(self.n_rows, dtype=bool)
+        mask[positions] = True
+        return np.packbits(mask)
+
+    def positions(self, bits: np.ndarray) -> np.ndarray:
+        """Posições dos livros (ordem crescente) com o bit ligado"""
+        return np.flatnonzero(np.unpackbits(bits, count=self.n_rows))
+
+    def count(self, bits: np.ndarray) -> int:
+        return popcount(bits)
+
+    # Predicados
+
+    def equals(self, field: str, value) -> np.ndarray:
+        """Bitmap de field == value (vazio se o valor não existe)"""
+        return self.isin(field, [value])
+
+    def isin(self, field: str, values: Iterable) -> np.ndarray:
+        """OR dos bitmaps dos valores"""
+        column = self.columns[field]
+        codes = [column.lookup[v] for v in values if v in column.lookup]
+        if not codes:
+            return self.empty()
+        if len(codes) == 1:
+            return column.bitmaps[codes[0]].copy()
+        return np.bitwise_or.reduce(column.bitmaps[codes], axis=0)
+
+
+def build_bitmap_index(df: pd.DataFrame) -> BitmapIndex:
+    """Builder para BooksDataset.derived"""
+    return BitmapIndex(df)
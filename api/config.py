@@ -0,0 +1,85 @@
+"""
+Configurações da API
+Valores lidos de variáveis de ambiente com prefixo API_ (ou do arquivo .env)
+"""
+
+from typing import Optional
+
+from pydantic import Field
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+class Settings(BaseSettings):
+    """Configurações de execução da API"""
+
+    data_path: str = Field("data/books.csv", description="Caminho do CSV de livros")
+    data_reload_interval: float = Field(
+        5.0,
+        ge=0,
+        description="Intervalo (s) entre verificações de mudança no CSV (0 = sem recarga)",
+    )
+
+    # Pools de execução para trabalho pandas (fora do event loop)
+    worker_threads: int = Field(
+        4, ge=1, description="Threads do pool padrão (listagem, busca, gêneros)"
+    )
+    heavy_worker_threads: int = Field(
+        2, ge=1, description="Threads do pool pesado (estatísticas, amostra ML)"
+    )
+
+    # Observabilidade
+    metrics_enabled: bool = Field(
+        True, description="Coleta de métricas Prometheus (/metrics)"
+    )
+
+    # Controle de admissão (limites por classe de custo do endpoint)
+    admission_enabled: bool = Field(
+        True, description="Aplica limites de concorrência, taxa e fila"
+    )
+    admission_moderate_concurrency: int = Field(
+        32,
+        ge=0,
+        description="Requisições simultâneas por rota moderada (0 = sem limite)",
+    )
+    admission_moderate_rate: float = Field(
+        20.0,
+        ge=0,
+        description="Requisições/s por cliente em rotas moderadas (0 = sem limite)",
+    )
+    admission_moderate_burst: int = Field(
+        40, ge=1, description="Rajada máxima por cliente em rotas moderadas"
+    )
+    admission_heavy_concurrency: int = Field(
+        4, ge=0, description="Requisições simultâneas por rota pesada (0 = sem limite)"
+    )
+    admission_heavy_rate: float = Field(
+        2.0,
+        ge=0,
+        description="Requisições/s por cliente em rotas pesadas (0 = sem limite)",
+    )
+    admission_heavy_burst: int = Field(
+        5, ge=1, description="Rajada máxima por cliente em rotas pesadas"
+    )
+    admission_max_queue_depth: int = Field(
+        16,
+        ge=0,
+        description="Fila do pool a partir da qual novas requisições são recusadas (0 = sem limite)",
+    )
+    admission_retry_after: int = Field(
+        1, ge=1, description="Retry-After (s) para requisições descartadas por carga"
+    )
+    admission_trust_forwarded_for: bool = Field(
+        False, description="Identifica o cliente pelo header X-Forwarded-For"
+    )
+
+    debug_token: Optional[str] = Field(
+        None,
+        description="Token exigido (header X-Debug-Token) para explain/profile",
+    )
+
+    model_config = SettingsConfigDict(
+        env_prefix="API_", env_file=".env", extra="ignore"
+    )
+
+
+settings = Settings()
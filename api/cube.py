@@ -0,0 +1,287 @@
+"""
+Agregações agrupadas (group-by) sobre um cubo pré-agregado
+
+Na carga do dataset os livros são agregados por todas as combinações de
+CUBE_DIMENSIONS (categoria, avaliação, disponibilidade e faixa de preço).
+Cada célula guarda contagem, soma, mínimo, máximo e quantidade de valores
+não nulos de cada medida. Uma consulta que agrupa e filtra só por essas
+dimensões é respondida somando células, sem tocar nas linhas.
+
+Agrupamentos por outras dimensões ou filtros por faixas numéricas (preço,
+cópias, data) usam o FilterPlan e agregam as linhas selecionadas com a
+mesma rotina vetorizada (bincount / reduceat sobre os códigos).
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from api.bitmaps import BitmapIndex
+from api.facets import PRICE_BIN_LABELS, price_bin_codes
+from api.filters import FilterPlan, Predicate, is_in_stock
+
+# Dimensões do cubo e dimensões aceitas em `by`
+CUBE_DIMENSIONS = ("category", "rating", "availability", "price_bin")
+GROUP_DIMENSIONS = CUBE_DIMENSIONS + ("availability_copies",)
+
+# Medidas numéricas e agregações disponíveis
+MEASURES = ("price", "availability_copies", "rating")
+AGGREGATES = ("count", "sum", "mean", "min", "max")
+
+# Predicados avaliáveis por célula do cubo
+_CELL_FIELDS = frozenset(CUBE_DIMENSIONS) | {"in_stock"}
+
+_METRIC_PATTERN = re.compile(r"^(\w+)(?:\((\w+)\))?$")
+
+
+@dataclass(frozen=True)
+class Metric:
+    """Agregação pedida: count ou função(medida)"""
+
+    function: str
+    field: Optional[str] = None
+
+    @property
+    def label(self) -> str:
+        return self.function if self.field is None else f"{self.function}({self.field})"
+
+
+def parse_dimensions(value: Optional[str]) -> List[str]:
+    """
+    Lê o parâmetro by ("category,rating")
+
+    Raises:
+        ValueError: se estiver vazio ou alguma dimensão não for agrupável
+    """
+    fields = list(
+        dict.fromkeys(f.strip() for f in (value or "").split(",") if f.strip())
+    )
+    if not fields:
+        raise ValueError("Informe ao menos uma dimensão em 'by'")
+    unknown = [field for field in fields if field not in GROUP_DIMENSIONS]
+    if unknown:
+        raise ValueError(
+            f"Dimensão(ões) inválida(s): {', '.join(unknown)}. "
+            f"Disponíveis: {', '.join(GROUP_DIMENSIONS)}"
+        )
+    return fields
+
+
+def parse_metrics(value: Optional[str]) -> List[Metric]:
+    """
+    Lê o parâmetro metrics ("count,mean(price),sum(availability_copies)")
+
+    Raises:
+        ValueError: se alguma métrica for malformada ou desconhecida
+    """
+    metrics: List[Metric] = []
+    for text in (value or "count").split(","):
+        text = text.strip().replace(" ", "")
+        if not text:
+            continue
+        match = _METRIC_PATTERN.match(text)
+        function, field = match.groups() if match else (None, None)
+        if function not in AGGREGATES or (function == "count") != (field is None):
+            raise ValueError(
+                f"Métrica inválida: '{text}'. Use count ou "
+                f"{'|'.join(AGGREGATES[1:])}(campo)"
+            )
+        if field is not None and field not in MEASURES:
+            raise ValueError(
+                f"Medida inválida em '{text}'. Disponíveis: {', '.join(MEASURES)}"
+            )
+        metric = Metric(function, field)
+        if metric not in metrics:
+            metrics.append(metric)
+    if not metrics:
+        raise ValueError("Informe ao menos uma métrica")
+    return metrics
+
+
+# Agregação vetorizada
+
+
+def _rollup(
+    codes: List[np.ndarray], sizes: List[int], facts: Dict[str, np.ndarray]
+) -> Tuple[List[np.ndarray], Dict[str, np.ndarray]]:
+    """
+    Agrega linhas (ou células) pelos códigos das dimensões
+
+    Args:
+        codes: Código de cada dimensão por linha
+        sizes: Quantidade de códigos de cada dimensão (valores + nulo)
+        facts: count, sum:<m>, n:<m>, min:<m>, max:<m> por linha
+
+    Returns:
+        (códigos de cada dimensão por grupo, fatos agregados por grupo), com
+        os grupos na ordem dos códigos
+    """
+    keys = np.ravel_multi_index(codes, sizes)
+    groups, inverse = np.unique(keys, return_inverse=True)
+    order = np.argsort(inverse, kind="stable")
+    starts = np.flatnonzero(np.r_[True, np.diff(inverse[order]) != 0])
+    starts = starts if len(order) else np.empty(0, np.int64)
+
+    result: Dict[str, np.ndarray] = {}
+    for name, values in facts.items():
+        if name.startswith("min:"):
+            result[name] = np.minimum.reduceat(values[order], starts)
+        elif name.startswith("max:"):
+            result[name] = np.maximum.reduceat(values[order], starts)
+        else:
+            result[name] = np.bincount(inverse, weights=values, minlength=len(groups))
+    return list(np.unravel_index(groups, sizes)), result
+
+
+def _row_facts(df: pd.DataFrame) -> Dict[str, np.ndarray]:
+    """Fatos de cada linha: cada livro conta 1, nulos não entram nas medidas"""
+    facts = {"count": np.ones(len(df))}
+    for measure in MEASURES:
+        values = df[measure].to_numpy(dtype=np.float64)
+        valid = ~np.isnan(values)
+        facts[f"sum:{measure}"] = np.where(valid, values, 0.0)
+        facts[f"n:{measure}"] = valid.astype(np.float64)
+        facts[f"min:{measure}"] = np.where(valid, values, np.inf)
+        facts[f"max:{measure}"] = np.where(valid, values, -np.inf)
+    return facts
+
+
+def _label(value):
+    return value.item() if hasattr(value, "item") else value
+
+
+class AggregateCube:
+    """Códigos por linha das dimensões e o cubo pré-agregado"""
+
+    def __init__(self, df: pd.DataFrame):
+        """
+        Codifica as dimensões e agrega o cubo
+
+        Args:
+            df: DataFrame de livros
+        """
+        self.row_codes: Dict[str, np.ndarray] = {}
+        self.labels: Dict[str, list] = {}
+        for dimension in GROUP_DIMENSIONS:
+            if dimension == "price_bin":
+                prices = df["price"].to_numpy(dtype=np.float64)
+                codes = price_bin_codes(prices)
+                labels = list(PRICE_BIN_LABELS)
+            else:
+                codes, uniques = pd.factorize(df[dimension], sort=True)
+                labels = [_label(value) for value in uniques]
+            # Valor nulo recebe o código len(labels)
+            codes = np.where(codes < 0, len(labels), codes)
+            self.row_codes[dimension] = codes.astype(np.int64)
+            self.labels[dimension] = labels
+        self.row_facts = _row_facts(df)
+
+        self.cell_codes, self.cell_facts = self._aggregate(
+            CUBE_DIMENSIONS,
+            self.row_codes,
+            self.row_facts,
+            np.ones(len(df), dtype=bool),
+        )
+        self.n_cells = len(self.cell_facts["count"])
+
+    def _aggregate(
+        self,
+        dimensions,
+        codes: Dict[str, np.ndarray],
+        facts: Dict[str, np.ndarray],
+        selector: np.ndarray,
+    ) -> Tuple[Dict[str, np.ndarray], Dict[str, np.ndarray]]:
+        group_codes, totals = _rollup(
+            [codes[d][selector] for d in dimensions],
+            [len(self.labels[d]) + 1 for d in dimensions],
+            {name: values[selector] for name, values in facts.items()},
+        )
+        return dict(zip(dimensions, group_codes)), totals
+
+    def _cell_mask(self, predicate: Predicate) -> np.ndarray:
+        """Células que satisfazem o predicado (via máscara sobre os rótulos)"""
+        dimension = "availability" if predicate.field == "in_stock" else predicate.field
+        labels = self.labels[dimension]
+        if predicate.field == "in_stock":
+            labels = [is_in_stock(label) for label in labels]
+        elif predicate.field == "category":
+            labels = [str(label).lower() for label in labels]
+        # Último elemento: código de nulo, nunca satisfaz
+        allowed = np.array([predicate.matches(label) for label in labels] + [False])
+        return allowed[self.cell_codes[dimension]]
+
+    def answerable(self, dimensions: List[str], predicates: List[Predicate]) -> bool:
+        """True se o cubo responde sem voltar às linhas"""
+        return all(d in CUBE_DIMENSIONS for d in dimensions) and all(
+            p.field in _CELL_FIELDS for p in predicates
+        )
+
+    def group_by(
+        self,
+        dimensions: List[str],
+        metrics: List[Metric],
+        predicates: List[Predicate],
+        index: BitmapIndex,
+    ) -> dict:
+        """
+        Agrega por dimensões aplicando os filtros
+
+        Args:
+            dimensions: Dimensões do agrupamento (de GROUP_DIMENSIONS)
+            metrics: Métricas pedidas
+            predicates: Filtros (mesma linguagem de /books)
+            index: BitmapIndex usado quando é preciso filtrar linhas
+
+        Returns:
+            Dicionário com fonte ("cubo" ou "linhas"), total de livros e grupos
+        """
+        if self.answerable(dimensions, predicates):
+            source, codes, facts = "cubo", self.cell_codes, self.cell_facts
+            selector = np.ones(self.n_cells, dtype=bool)
+            for predicate in predicates:
+                selector &= self._cell_mask(predicate)
+        else:
+            source, codes, facts = "linhas", self.row_codes, self.row_facts
+            positions = FilterPlan(index, predicates).execute()
+            selector = np.zeros(len(facts["count"]), dtype=bool)
+            if positions is None:
+                selector[:] = True
+            else:
+                selector[positions] = True
+        total = int(facts["count"][selector].sum())
+
+        # Grupos só com valores não nulos
+        for dimension in dimensions:
+            selector = selector & (codes[dimension] < len(self.labels[dimension]))
+        group_codes, totals = self._aggregate(dimensions, codes, facts, selector)
+
+        groups = []
+        for i in range(len(totals["count"])):
+            key = {d: self.labels[d][group_codes[d][i]] for d in dimensions}
+            groups.append({"chave": key, "valores": _metric_values(metrics, totals, i)})
+        return {"fonte": source, "total": total, "grupos": groups}
+
+
+def _metric_values(metrics: List[Metric], totals: Dict[str, np.ndarray], i: int):
+    """Valores das métricas de um grupo (None quando a medida é toda nula)"""
+    values = {}
+    for metric in metrics:
+        if metric.function == "count":
+            values[metric.label] = int(totals["count"][i])
+            continue
+        present = totals[f"n:{metric.field}"][i]
+        if not present:
+            values[metric.label] = None
+        elif metric.function == "mean":
+            values[metric.label] = float(totals[f"sum:{metric.field}"][i] / present)
+        else:
+            values[metric.label] = float(totals[f"{metric.function}:{metric.field}"][i])
+    return values
+
+
+def build_aggregate_cube(df: pd.DataFrame) -> AggregateCube:
+    """Builder para BooksDataset.derived"""
+    return AggregateCube(df)
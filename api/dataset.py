@@ -0,0 +1,238 @@
+"""
+Dataset de livros carregado em memória
+
+Agrupa o DataFrame com sua versão (hash do conteúdo) e um cache de
+estruturas derivadas (contagens, colunas normalizadas, índices) que são
+construídas uma única vez por versão do dataset, e o DatasetStore, que
+troca o dataset atual quando o CSV de origem é alterado.
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Hashable, Optional
+
+import pandas as pd
+
+from api.metrics import record_cache
+from api.utils import load_books_data
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+def dataset_version(df: pd.DataFrame) -> str:
+    """
+    Calcula a versão do dataset a partir do conteúdo
+
+    Args:
+        df: DataFrame de livros
+
+    Returns:
+        Hash curto (12 caracteres hex) ou 'vazio'
+    """
+    if df.empty:
+        return "vazio"
+    row_hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    digest = hashlib.sha1(row_hashes.tobytes())
+    digest.update(",".join(map(str, df.columns)).encode("utf-8"))
+    return digest.hexdigest()[:12]
+
+
+class BooksDataset:
+    """DataFrame de livros + versão + cache de estruturas derivadas"""
+
+    def __init__(self, df: pd.DataFrame, source: Optional[str] = None):
+        """
+        Args:
+            df: DataFrame de livros (não deve ser modificado após a criação)
+            source: Caminho de origem dos dados, se houver
+        """
+        self.df = df.reset_index(drop=True)
+        self.source = source
+        self.version = dataset_version(self.df)
+        self.loaded_at = datetime.now(timezone.utc).isoformat()
+        self._derived: Dict[str, Any] = {}
+        self._results: Dict[str, "OrderedDict[Hashable, Any]"] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_csv(cls, filepath: str) -> "BooksDataset":
+        """Carrega o dataset a partir de um CSV"""
+        return cls(load_books_data(filepath), source=filepath)
+
+    @property
+    def empty(self) -> bool:
+        return self.df.empty
+
+    def __len__(self) -> int:
+        return len(self.df)
+
+    def derived(self, name: str, builder: Callable[[pd.DataFrame], Any]) -> Any:
+        """
+        Retorna estrutura derivada, construindo-a na primeira chamada
+
+        Args:
+            name: Nome da estrutura (também usado como label nas métricas)
+            builder: Função que recebe o DataFrame e constrói a estrutura
+
+        Returns:
+            Estrutura derivada (compartilhada entre requisições; não modificar)
+        """
+        value = self._derived.get(name, _MISSING)
+        if value is not _MISSING:
+            record_cache(name, hit=True)
+            return value
+
+        with self._lock:
+            value = self._derived.get(name, _MISSING)
+            if value is _MISSING:
+                record_cache(name, hit=False)
+                value = builder(self.df)
+                self._derived[name] = value
+                logger.debug(
+                    f"Estrutura derivada '{name}' construída (v{self.version})"
+                )
+            else:
+                record_cache(name, hit=True)
+        return value
+
+    def cached(
+        self,
+        name: str,
+        key: Hashable,
+        compute: Callable[[], Any],
+        max_entries: int = 256,
+    ) -> Any:
+        """
+        Resultado de consulta memorizado nesta versão do dataset (LRU)
+
+        Args:
+            name: Nome do cache (também usado como label nas métricas)
+            key: Chave da consulta (parâmetros normalizados)
+            compute: Função que calcula o resultado em caso de falta
+            max_entries: Entradas mantidas por cache
+
+        Returns:
+            Resultado (compartilhado entre requisições; não modificar)
+        """
+        with self._lock:
+            entries = self._results.setdefault(name, OrderedDict())
+            value = entries.get(key, _MISSING)
+            if value is not _MISSING:
+                entries.move_to_end(key)
+        if value is not _MISSING:
+            record_cache(name, hit=True)
+            return value
+
+        record_cache(name, hit=False)
+        value = compute()
+        with self._lock:
+            entries[key] = value
+            if len(entries) > max_entries:
+                entries.popitem(last=False)
+        return value
+
+
+class DatasetStore:
+    """
+    Dataset atual, recarregado quando o arquivo de origem muda
+
+    A verificação (stat do arquivo) acontece no máximo a cada
+    `check_interval` segundos, durante `current()`. A nova versão é
+    carregada em uma thread de fundo; as requisições continuam usando a
+    versão anterior até a troca, que é atômica (uma atribuição). Os
+    "aquecedores" registrados constroem estruturas derivadas antes da troca,
+    para que a primeira requisição após a recarga não pague a construção.
+    """
+
+    def __init__(self, filepath: str, check_interval: float = 5.0):
+        """
+        Args:
+            filepath: Caminho do CSV
+            check_interval: Segundos entre verificações (0 = sem recarga)
+        """
+        self.filepath = filepath
+        self.check_interval = check_interval
+        self.reloads = 0
+        self._warmers: Dict[str, Callable[[pd.DataFrame], Any]] = {}
+        self._dataset = BooksDataset(pd.DataFrame())
+        self._signature: Optional[tuple] = None
+        self._next_check = 0.0
+        self._reloading = False
+        self._lock = threading.Lock()
+
+    def add_warmer(self, name: str, builder: Callable[[pd.DataFrame], Any]):
+        """Registra estrutura derivada construída a cada carga"""
+        self._warmers[name] = builder
+        if not self._dataset.empty:
+            self._dataset.derived(name, builder)
+
+    def _file_signature(self) -> Optional[tuple]:
+        try:
+            stat = os.stat(self.filepath)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def load(self) -> BooksDataset:
+        """
+        Carrega (ou recarrega) o dataset imediatamente
+
+        Se o conteúdo não mudou (mesma versão) o dataset atual é mantido,
+        preservando as estruturas derivadas já construídas. Em caso de erro
+        o dataset atual também é mantido.
+        """
+        signature = self._file_signature()
+        try:
+            dataset = BooksDataset.from_csv(self.filepath)
+        except Exception as e:
+            logger.error(f"Erro ao carregar dados: {e}")
+            self._signature = signature
+            return self._dataset
+
+        self._signature = signature
+        if dataset.version == self._dataset.version:
+            return self._dataset
+
+        for name, builder in self._warmers.items():
+            dataset.derived(name, builder)
+        previous = self._dataset
+        self._dataset = dataset
+        if not previous.empty:
+            self.reloads += 1
+        logger.info(
+            f"Dados carregados: {len(dataset)} livros (versão {dataset.version})"
+        )
+        return dataset
+
+    def current(self) -> BooksDataset:
+        """Dataset atual; dispara recarga em segundo plano se o arquivo mudou"""
+        if self.check_interval > 0:
+            now = time.monotonic()
+            if now >= self._next_check:
+                self._next_check = now + self.check_interval
+                self._maybe_reload()
+        return self._dataset
+
+    def _maybe_reload(self):
+        if self._file_signature() == self._signature:
+            return
+        with self._lock:
+            if self._reloading:
+                return
+            self._reloading = True
+        threading.Thread(
+            target=self._reload_in_background, name="dataset-reload", daemon=True
+        ).start()
+
+    def _reload_in_background(self):
+        try:
+            self.load()
+        finally:
+            self._reloading = False
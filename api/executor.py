@@ -0,0 +1,143 @@
+"""
+Execução de trabalho bloqueante (pandas) fora do event loop
+
+Os endpoints são `async def`, então qualquer operação pandas executada
+diretamente no handler bloqueia todas as requisições do worker. Os pools
+abaixo são limitados e expõem métricas de fila para observabilidade.
+"""
+
+import asyncio
+import contextvars
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from api.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class BlockingExecutor:
+    """Pool de threads limitado com contadores de fila e execução"""
+
+    def __init__(self, name: str, max_workers: int):
+        """
+        Inicializa o pool (as threads são criadas sob demanda)
+
+        Args:
+            name: Nome do pool (usado nas threads e nas métricas)
+            max_workers: Número máximo de tarefas executando em paralelo
+        """
+        self.name = name
+        self.max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+        self.pending = 0  # submetidas e ainda não concluídas
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self.max_queue_depth = 0
+        self.total_wait_seconds = 0.0
+        self.total_run_seconds = 0.0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Cria o ThreadPoolExecutor na primeira utilização"""
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers,
+                        thread_name_prefix=f"api-{self.name}",
+                    )
+        return self._executor
+
+    @property
+    def queue_depth(self) -> int:
+        """Tarefas aguardando uma thread livre"""
+        return max(self.pending - self.running, 0)
+
+    async def run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Executa `func` em uma thread do pool e aguarda o resultado
+
+        O contexto (contextvars) da requisição é propagado para a thread.
+
+        Args:
+            func: Função síncrona a executar
+            *args, **kwargs: Argumentos repassados para a função
+
+        Returns:
+            Valor retornado por `func` (exceções são propagadas)
+        """
+        loop = asyncio.get_running_loop()
+        ctx = contextvars.copy_context()
+        submitted_at = time.perf_counter()
+
+        def job():
+            started_at = time.perf_counter()
+            with self._lock:
+                self.running += 1
+                self.total_wait_seconds += started_at - submitted_at
+            ok = False
+            try:
+                result = ctx.run(func, *args, **kwargs)
+                ok = True
+                return result
+            finally:
+                with self._lock:
+                    self.running -= 1
+                    self.total_run_seconds += time.perf_counter() - started_at
+                    if ok:
+                        self.completed += 1
+                    else:
+                        self.failed += 1
+
+        with self._lock:
+            self.pending += 1
+            self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+        try:
+            return await loop.run_in_executor(self._get_executor(), job)
+        finally:
+            with self._lock:
+                self.pending -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Retorna snapshot dos contadores do pool"""
+        with self._lock:
+            finished = self.completed + self.failed
+            return {
+                "nome": self.name,
+                "max_threads": self.max_workers,
+                "em_execucao": self.running,
+                "na_fila": self.queue_depth,
+                "fila_maxima": self.max_queue_depth,
+                "concluidas": self.completed,
+                "falhas": self.failed,
+                "espera_media_ms": (
+                    self.total_wait_seconds / finished * 1000 if finished else 0.0
+                ),
+                "execucao_media_ms": (
+                    self.total_run_seconds / finished * 1000 if finished else 0.0
+                ),
+            }
+
+    def shutdown(self):
+        """Finaliza as threads do pool"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+# Pool padrão: listagem, busca, gêneros
+default_pool = BlockingExecutor("default", settings.worker_threads)
+
+# Pool pesado: estatísticas e amostra ML (isolado para não esgotar o padrão)
+heavy_pool = BlockingExecutor("heavy", settings.heavy_worker_threads)
+
+
+def all_pools():
+    """Lista os pools registrados"""
+    return [default_pool, heavy_pool]
@@ -0,0 +1,121 @@
+"""
+Facetas (contagens por valor) sobre o resultado de uma consulta
+
+Cada campo facetável é codificado uma vez por versão do dataset em um
+array de códigos inteiros. A contagem para um conjunto de livros é um
+np.bincount dos códigos nas posições que casaram com a consulta.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+FACET_FIELDS = ("category", "rating", "price_bin")
+
+# Faixas de preço: (0, 20] economico, (20, 40] moderado, (40, 60] premium,
+# acima de 60 luxo (sem limite superior)
+PRICE_BIN_EDGES = np.array([20.0, 40.0, 60.0])
+PRICE_BIN_LABELS = ["economico", "moderado", "premium", "luxo"]
+
+
+def price_bin_codes(prices: np.ndarray) -> np.ndarray:
+    """Índice da faixa de preço (em PRICE_BIN_LABELS) de cada preço; -1 sem preço"""
+    codes = np.searchsorted(PRICE_BIN_EDGES, prices, side="left")
+    # searchsorted põe NaN depois de todas as bordas (na faixa "luxo")
+    return np.where(np.isfinite(prices), codes, -1)
+
+
+@dataclass
+class FacetColumn:
+    """Códigos de um campo e contagens no dataset inteiro"""
+
+    codes: np.ndarray
+    labels: list
+    totals: np.ndarray
+    by_count: bool  # ordena por contagem (senão pela ordem dos valores)
+
+
+def _column(codes: np.ndarray, labels: list, by_count: bool) -> FacetColumn:
+    """Códigos -1 (valor ausente) ficam fora das contagens"""
+    codes = codes.astype(np.int32)
+    totals = np.bincount(codes[codes >= 0], minlength=len(labels))
+    return FacetColumn(codes=codes, labels=labels, totals=totals, by_count=by_count)
+
+
+class FacetIndex:
+    """Campos facetáveis codificados para um DataFrame de livros"""
+
+    def __init__(self, df: pd.DataFrame):
+        self.columns: Dict[str, FacetColumn] = {}
+        if "category" in df.columns:
+            codes, uniques = pd.factorize(df["category"], sort=True)
+            self.columns["category"] = _column(codes, list(uniques), by_count=True)
+        if "rating" in df.columns:
+            codes, uniques = pd.factorize(df["rating"], sort=True)
+            self.columns["rating"] = _column(
+                codes, [int(value) for value in uniques], by_count=False
+            )
+        if "price" in df.columns:
+            codes = price_bin_codes(df["price"].to_numpy(dtype=np.float64))
+            self.columns["price_bin"] = _column(
+                codes, list(PRICE_BIN_LABELS), by_count=False
+            )
+
+    def counts(
+        self, fields: List[str], positions: Optional[np.ndarray] = None
+    ) -> Dict[str, List[dict]]:
+        """
+        Contagens por valor de cada campo
+
+        Args:
+            fields: Campos pedidos (de FACET_FIELDS)
+            positions: Posições dos livros que casaram; None = dataset inteiro
+
+        Returns:
+            {campo: [{"valor": ..., "contagem": ...}, ...]} sem valores zerados
+        """
+        result: Dict[str, List[dict]] = {}
+        for field in fields:
+            column = self.columns.get(field)
+            if column is None:
+                continue
+            if positions is None:
+                counts = column.totals
+            else:
+                codes = column.codes[positions]
+                counts = np.bincount(codes[codes >= 0], minlength=len(column.labels))
+            present = np.flatnonzero(counts)
+            if column.by_count:
+                # Maior contagem primeiro; empate pela ordem do valor
+                present = present[np.lexsort((present, -counts[present]))]
+            result[field] = [
+                {"valor": column.labels[code], "contagem": int(counts[code])}
+                for code in present
+            ]
+        return result
+
+
+def parse_facets(value: Optional[str]) -> List[str]:
+    """
+    Lê o parâmetro facets ("category,rating")
+
+    Raises:
+        ValueError: se algum campo não for facetável
+    """
+    if not value:
+        return []
+    fields = list(dict.fromkeys(f.strip() for f in value.split(",") if f.strip()))
+    unknown = [field for field in fields if field not in FACET_FIELDS]
+    if unknown:
+        raise ValueError(
+            f"Faceta(s) inválida(s): {', '.join(unknown)}. "
+            f"Disponíveis: {', '.join(FACET_FIELDS)}"
+        )
+    return fields
+
+
+def build_facet_index(df: pd.DataFrame) -> FacetIndex:
+    """Builder para BooksDataset.derived"""
+    return FacetIndex(df)
@@ -0,0 +1,427 @@
+"""
+Linguagem de filtros e plano de execução vetorizado
+
+Um filtro é uma lista de predicados (AND entre predicados, OR entre os
+valores de um predicado), escrito na query string ou em um corpo JSON:
+
+    filter=category:Poetry|Fiction;rating:3..5;availability_copies:>=5;in_stock
+    {"category": ["Poetry", "Fiction"], "rating": {"gte": 3, "lte": 5},
+     "availability_copies": {"gte": 5}, "in_stock": true}
+
+O plano estima quantos livros cada predicado seleciona usando as
+estatísticas do BitmapIndex (contagem por valor, busca binária nos arrays
+ordenados) e aplica primeiro o mais seletivo. Enquanto o resultado é
+grande os predicados são bitmaps combinados com AND; quando fica pequeno
+os demais predicados são avaliados só nas posições restantes.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from api.bitmaps import BitmapIndex
+from api.profiling import plan_step
+
+# Campos filtráveis e tipo dos valores
+FIELD_TYPES = {
+    "category": "texto",
+    "availability": "texto",
+    "price_bin": "texto",
+    "rating": "inteiro",
+    "availability_copies": "inteiro",
+    "price": "numero",
+    "scraped_at": "data",
+    "in_stock": "booleano",
+}
+
+# Abaixo desta fração do catálogo o plano troca bitmaps por posições
+POSITIONS_FRACTION = 1 / 32
+
+_COMPARISONS = (">=", "<=", ">", "<")
+_JSON_OPERATORS = ("gte", "gt", "lte", "lt")
+
+
+class FilterError(ValueError):
+    """Filtro malformado ou com campo/valor inválido"""
+
+
+@dataclass
+class Predicate:
+    """Predicado sobre um campo: igualdade (values) ou intervalo (low/high)"""
+
+    field: str
+    values: Optional[Tuple] = None
+    low: Any = None
+    high: Any = None
+    low_inclusive: bool = True
+    high_inclusive: bool = True
+    label: Optional[str] = None  # nome da etapa no plano
+
+    @property
+    def name(self) -> str:
+        return self.label or self.field
+
+    def describe(self) -> Any:
+        """Valor legível para o plano de consulta"""
+        if self.values is not None:
+            return list(self.values)
+        low = "[" if self.low_inclusive else "("
+        high = "]" if self.high_inclusive else ")"
+        return f"{low}{_show(self.low)}, {_show(self.high)}{high}"
+
+    def matches(self, value) -> bool:
+        """Avalia o predicado em um valor já convertido (como no índice)"""
+        if self.values is not None:
+            return value in self.values
+        return bool(_within(value, self))
+
+
+def is_in_stock(availability) -> bool:
+    """Disponibilidade conta como em estoque (predicado in_stock)"""
+    return str(availability).lower().startswith("in stock")
+
+
+def _show(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, (int, np.integer)) and abs(value) > 10**15:
+        return pd.Timestamp(int(value)).isoformat()
+    return str(value)
+
+
+# Conversão de valores
+
+
+def _convert(field: str, raw: Any) -> Any:
+    """Converte um valor do filtro para o tipo do campo"""
+    kind = FIELD_TYPES[field]
+    try:
+        if kind == "texto":
+            text = str(raw).strip()
+            return text.lower() if field == "category" else text
+        if kind == "inteiro":
+            return int(raw)
+        if kind == "numero":
+            return float(raw)
+        if kind == "data":
+            timestamp = pd.Timestamp(str(raw).strip())
+            if timestamp is pd.NaT:  # "" e "NaT" viram NaT sem erro
+                raise ValueError(raw)
+            if timestamp.tzinfo is not None:
+                timestamp = timestamp.tz_convert("UTC").tz_localize(None)
+            return timestamp.as_unit("ns").value
+        if kind == "booleano":
+            if isinstance(raw, bool):
+                return raw
+            text = str(raw).strip().lower()
+            if text in ("true", "1", "sim", "yes"):
+                return True
+            if text in ("false", "0", "nao", "não", "no"):
+                return False
+            raise ValueError(raw)
+    except (TypeError, ValueError):
+        raise FilterError(f"Valor inválido para '{field}': {raw!r}")
+    raise FilterError(f"Campo '{field}' não filtrável")
+
+
+def _check_field(field: str) -> str:
+    field = field.strip()
+    if field not in FIELD_TYPES:
+        raise FilterError(
+            f"Campo de filtro desconhecido: '{field}'. "
+            f"Disponíveis: {', '.join(FIELD_TYPES)}"
+        )
+    return field
+
+
+def _in_stock(value: bool) -> Predicate:
+    return Predicate("in_stock", values=(value,))
+
+
+def _comparison(field: str, operator: str, raw: Any) -> Predicate:
+    value = _convert(field, raw)
+    if operator in (">=", "gte"):
+        return Predicate(field, low=value)
+    if operator in (">", "gt"):
+        return Predicate(field, low=value, low_inclusive=False)
+    if operator in ("<=", "lte"):
+        return Predicate(field, high=value)
+    return Predicate(field, high=value, high_inclusive=False)
+
+
+# Leitura da query string e do JSON
+
+
+def parse_filter_query(text: Optional[str]) -> List[Predicate]:
+    """
+    Lê o filtro da query string
+
+    Cláusulas separadas por ';', cada uma `campo:valor`:
+
+    - `a|b|c`        qualquer um dos valores
+    - `min..max`     intervalo fechado (um dos lados pode faltar)
+    - `>=x`, `>x`, `<=x`, `<x`  comparação
+    - `in_stock`     atalho para in_stock:true
+
+    Raises:
+        FilterError: se o filtro for inválido
+    """
+    predicates: List[Predicate] = []
+    for clause in (text or "").split(";"):
+        clause = clause.strip()
+        if not clause:
+            continue
+        field, sep, expression = clause.partition(":")
+        field = _check_field(field)
+        expression = expression.strip()
+
+        if field == "in_stock":
+            predicates.append(_in_stock(_convert(field, expression) if sep else True))
+            continue
+        if not expression:
+            raise FilterError(f"Cláusula sem valor: '{clause}'")
+
+        operator = next((op for op in _COMPARISONS if expression.startswith(op)), None)
+        if operator:
+            predicates.append(_comparison(field, operator, expression[len(operator) :]))
+        elif ".." in expression:
+            low, _, high = expression.partition("..")
+            predicates.append(
+                Predicate(
+                    field,
+                    low=_convert(field, low) if low.strip() else None,
+                    high=_convert(field, high) if high.strip() else None,
+                )
+            )
+        else:
+            values = tuple(
+                _convert(field, value) for value in expression.split("|") if value
+            )
+            predicates.append(Predicate(field, values=values))
+    return predicates
+
+
+def parse_filter_json(body: Optional[Dict[str, Any]]) -> List[Predicate]:
+    """
+    Lê o filtro de um objeto JSON
+
+    Cada chave é um campo; o valor é um escalar (igualdade), uma lista
+    (qualquer um dos valores) ou um objeto com gte/gt/lte/lt.
+
+    Raises:
+        FilterError: se o filtro for inválido
+    """
+    if body is None:
+        return []
+    if not isinstance(body, dict):
+        raise FilterError("O filtro JSON deve ser um objeto {campo: condição}")
+
+    predicates: List[Predicate] = []
+    for field, condition in body.items():
+        field = _check_field(field)
+        if field == "in_stock":
+            predicates.append(_in_stock(_convert(field, condition)))
+        elif isinstance(condition, dict):
+            unknown = set(condition) - set(_JSON_OPERATORS)
+            if unknown or not condition:
+                raise FilterError(
+                    f"Operadores inválidos para '{field}': {sorted(unknown)}. "
+                    f"Use {', '.join(_JSON_OPERATORS)}"
+                )
+            for operator, value in condition.items():
+                predicates.append(_comparison(field, operator, value))
+        elif isinstance(condition, list):
+            predicates.append(
+                Predicate(field, values=tuple(_convert(field, v) for v in condition))
+            )
+        else:
+            predicates.append(Predicate(field, values=(_convert(field, condition),)))
+    return predicates
+
+
+def legacy_predicates(
+    category: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    min_rating: Optional[int] = None,
+) -> List[Predicate]:
+    """Predicados equivalentes aos parâmetros simples de /books"""
+    predicates: List[Predicate] = []
+    if category:
+        predicates.append(
+            Predicate("category", values=(category.lower(),), label="category")
+        )
+    if min_price is not None:
+        predicates.append(Predicate("price", low=min_price, label="min_price"))
+    if max_price is not None:
+        predicates.append(Predicate("price", high=max_price, label="max_price"))
+    if min_rating is not None:
+        predicates.append(Predicate("rating", low=min_rating, label="min_rating"))
+    return predicates
+
+
+# Plano de execução
+
+
+class FilterPlan:
+    """Predicados ordenados por seletividade estimada"""
+
+    def __init__(self, index: BitmapIndex, predicates: List[Predicate]):
+        self.index = index
+        estimated = [(self._estimate(p), i, p) for i, p in enumerate(predicates)]
+        # Mais seletivo primeiro; empate mantém a ordem pedida
+        self.steps: List[Tuple[int, Predicate]] = [
+            (estimate, predicate) for estimate, _, predicate in sorted(estimated)
+        ]
+
+    # Tradução dos predicados para o índice
+
+    def _bitmap_values(self, predicate: Predicate) -> List:
+        """Valores (do BitmapIndex) que satisfazem um predicado de bitmap"""
+        if predicate.field == "in_stock":
+            wanted = predicate.values[0]
+            return [
+                value
+                for value in self.index.columns["availability"].values
+                if is_in_stock(value) == wanted
+            ]
+        column = self.index.columns[predicate.field]
+        if predicate.values is not None:
+            return [v for v in predicate.values if v in column.lookup]
+        return [value for value in column.values if _within(value, predicate)]
+
+    def _column_of(self, predicate: Predicate) -> str:
+        return "availability" if predicate.field == "in_stock" else predicate.field
+
+    def _ranges(self, predicate: Predicate) -> List[Tuple[int, int]]:
+        """Intervalos [início, fim) no array ordenado"""
+        column = self.index.sorted[predicate.field]
+        if predicate.values is not None:
+            return [column.range(v, v) for v in dict.fromkeys(predicate.values)]
+        return [
+            column.range(
+                predicate.low,
+                predicate.high,
+                predicate.low_inclusive,
+                predicate.high_inclusive,
+            )
+        ]
+
+    def _estimate(self, predicate: Predicate) -> int:
+        """Livros selecionados pelo predicado (exato, sem varrer o catálogo)"""
+        name = self._column_of(predicate)
+        if name in self.index.sorted:
+            return sum(hi - lo for lo, hi in self._ranges(predicate))
+        if name in self.index.columns:
+            column = self.index.columns[name]
+            return int(
+                sum(
+                    column.counts[column.lookup[v]]
+                    for v in self._bitmap_values(predicate)
+                )
+            )
+        return self.index.n_rows
+
+    def _bitmap(self, predicate: Predicate) -> np.ndarray:
+        name = self._column_of(predicate)
+        if name in self.index.sorted:
+            column = self.index.sorted[predicate.field]
+            ranges = self._ranges(predicate)
+            positions = np.concatenate([column.order[lo:hi] for lo, hi in ranges])
+            return self.index.from_positions(positions)
+        if name in self.index.columns:
+            return self.index.isin(name, self._bitmap_values(predicate))
+        return self.index.empty()
+
+    def _mask(self, predicate: Predicate, positions: np.ndarray) -> np.ndarray:
+        """Avalia o predicado só nas posições dadas"""
+        name = self._column_of(predicate)
+        if name in self.index.sorted:
+            column = self.index.sorted[name]
+            values = column.raw[positions]
+            if predicate.values is not None:
+                mask = np.isin(values, np.asarray(predicate.values, dtype=values.dtype))
+            else:
+                mask = _within(values, predicate)
+            return mask & column.valid[positions]
+        if name in self.index.columns:
+            column = self.index.columns[name]
+            codes = [column.lookup[v] for v in self._bitmap_values(predicate)]
+            return np.isin(column.codes[positions], codes)
+        return np.zeros(len(positions), dtype=bool)
+
+    # Execução
+
+    def execute(self) -> Optional[np.ndarray]:
+        """
+        Executa o plano
+
+        Returns:
+            Posições dos livros que casam (ordem do catálogo), ou None se não
+            há predicados (dataset inteiro)
+        """
+        if not self.steps:
+            return None
+        bits, positions = self._run()
+        return positions if positions is not None else self.index.positions(bits)
+
+    def count(self) -> int:
+        """Quantidade de livros que casam (popcount, sem gerar posições)"""
+        if not self.steps:
+            return self.index.n_rows
+        bits, positions = self._run()
+        return len(positions) if positions is not None else self.index.count(bits)
+
+    def _run(self) -> Tuple[Optional[np.ndarray], Optional[np.ndarray]]:
+        """Aplica os passos; devolve (bitmap, None) ou (None, posições)"""
+        index = self.index
+        threshold = index.n_rows * POSITIONS_FRACTION
+        bits: Optional[np.ndarray] = None
+        positions: Optional[np.ndarray] = None
+
+        for estimate, predicate in self.steps:
+            with plan_step(
+                f"filtro_{predicate.name}",
+                valor=predicate.describe(),
+                estimativa=estimate,
+            ) as st:
+                if positions is not None:
+                    rows_in = len(positions)
+                    positions = positions[self._mask(predicate, positions)]
+                    rows_out = len(positions)
+                    st.set(indice="posicoes")
+                else:
+                    rows_in = index.n_rows if bits is None else index.count(bits)
+                    predicate_bits = self._bitmap(predicate)
+                    bits = (
+                        predicate_bits
+                        if bits is None
+                        else np.bitwise_and(bits, predicate_bits)
+                    )
+                    rows_out = index.count(bits)
+                    st.set(indice="bitmap")
+                    if rows_out <= threshold:
+                        positions = index.positions(bits)
+                st.set(linhas_entrada=rows_in, linhas_saida=rows_out)
+            if rows_out == 0:
+                return None, np.empty(0, dtype=np.int64)
+
+        return (None, positions) if positions is not None else (bits, None)
+
+
+def _within(value, predicate: Predicate):
+    """low <= value <= high respeitando limites abertos/fechados"""
+    result = True
+    if predicate.low is not None:
+        result = result & (
+            value >= predicate.low if predicate.low_inclusive else value > predicate.low
+        )
+    if predicate.high is not None:
+        result = result & (
+            value <= predicate.high
+            if predicate.high_inclusive
+            else value < predicate.high
+        )
+    return result
@@ -0,0 +1,139 @@
+"""
+Histogramas de colunas numéricas sobre arrays ordenados
+
+Cada coluna numérica é ordenada uma vez por versão do dataset. As
+contagens por faixa vêm de busca binária das bordas no array ordenado
+(np.searchsorted). Com filtros, as posições selecionadas viram uma máscara
+na ordem do array ordenado e as contagens saem da soma acumulada dessa
+máscara nas mesmas bordas, sem reordenar.
+
+Faixas seguem a convenção do np.histogram: [borda_i, borda_i+1), com a
+última fechada. Valores fora das bordas são contados em `abaixo`/`acima`.
+"""
+
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from api.bitmaps import SortedColumn, sortable_values
+
+# Colunas numéricas que não fazem sentido como distribuição
+EXCLUDED_FIELDS = ("id",)
+
+MAX_BINS = 1000
+
+
+def parse_edges(value: Optional[str]) -> Optional[np.ndarray]:
+    """
+    Lê bordas explícitas ("0,20,40,60,100")
+
+    Raises:
+        ValueError: se houver menos de duas bordas ou não forem crescentes
+    """
+    if not value:
+        return None
+    try:
+        edges = np.array([float(v) for v in value.split(",") if v.strip()])
+    except ValueError:
+        raise ValueError(f"Bordas inválidas: '{value}'")
+    if len(edges) < 2 or not np.isfinite(edges).all():
+        raise ValueError("Informe ao menos duas bordas numéricas finitas")
+    if len(edges) - 1 > MAX_BINS:
+        raise ValueError(f"No máximo {MAX_BINS} faixas")
+    if not (np.diff(edges) > 0).all():
+        raise ValueError("As bordas devem ser estritamente crescentes")
+    return edges
+
+
+class HistogramIndex:
+    """Valores ordenados de cada coluna numérica"""
+
+    def __init__(self, df: pd.DataFrame):
+        self.n_rows = len(df)
+        self.columns: Dict[str, SortedColumn] = {}
+        for name in df.select_dtypes("number").columns:
+            if name in EXCLUDED_FIELDS:
+                continue
+            raw, valid = sortable_values(df[name])
+            positions = np.flatnonzero(valid)
+            order = positions[np.argsort(raw[positions], kind="stable")]
+            self.columns[name] = SortedColumn(
+                values=raw[order], order=order, raw=raw, valid=valid
+            )
+
+    @property
+    def fields(self) -> List[str]:
+        return list(self.columns)
+
+    def histogram(
+        self,
+        field: str,
+        bins: int = 10,
+        edges: Optional[np.ndarray] = None,
+        positions: Optional[np.ndarray] = None,
+    ) -> dict:
+        """
+        Contagens por faixa de uma coluna
+
+        Args:
+            field: Coluna numérica (de `fields`)
+            bins: Quantidade de faixas de mesma largura entre o mínimo e o
+                máximo dos valores selecionados (ignorado se houver edges)
+            edges: Bordas explícitas, crescentes
+            positions: Posições dos livros filtrados; None = dataset inteiro
+
+        Returns:
+            Dicionário com campo, total, nulos, abaixo, acima e faixas
+        """
+        column = self.columns[field]
+        values = column.values
+
+        # running[i] = valores selecionados entre os i primeiros ordenados
+        running: Optional[np.ndarray] = None
+        if positions is None:
+            selected = np.arange(len(values))
+            nulls = self.n_rows - len(values)
+        else:
+            mask = np.zeros(self.n_rows, dtype=bool)
+            mask[positions] = True
+            in_order = mask[column.order]
+            running = np.concatenate(([0], np.cumsum(in_order)))
+            selected = np.flatnonzero(in_order)
+            nulls = len(positions) - len(selected)
+
+        if edges is None:
+            first, last = (
+                (values[selected[0]], values[selected[-1]]) if len(selected) else (0, 0)
+            )
+            if first == last:
+                first, last = first - 0.5, last + 0.5
+            edges = np.linspace(float(first), float(last), bins + 1)
+
+        # Última faixa fechada à direita
+        bounds = np.concatenate(
+            (
+                np.searchsorted(values, edges[:-1], side="left"),
+                np.searchsorted(values, edges[-1:], side="right"),
+            )
+        )
+        if running is not None:
+            bounds = running[bounds]
+        counts = np.diff(bounds)
+
+        return {
+            "campo": field,
+            "total": len(selected),
+            "nulos": int(nulls),
+            "abaixo": int(bounds[0]),
+            "acima": len(selected) - int(bounds[-1]),
+            "faixas": [
+                {"inicio": float(lo), "fim": float(hi), "contagem": int(count)}
+                for lo, hi, count in zip(edges[:-1], edges[1:], counts)
+            ],
+        }
+
+
+def build_histogram_index(df: pd.DataFrame) -> HistogramIndex:
+    """Builder para BooksDataset.derived"""
+    return HistogramIndex(df)
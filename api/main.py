@@ -3,22 +3,81 @@ API RESTful para Books to Scrape
 FastAPI application com endpoints para consumo dos dados de livros
 """
 
-from fastapi import FastAPI, HTTPException, Query
+from contextlib import asynccontextmanager
+import secrets
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from typing import List, Optional
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
+from typing import List, Optional, Tuple
+import numpy as np
 import pandas as pd
 from pathlib import Path
+import dataclasses
 import logging
 from datetime import datetime, timezone
 
-from api.models import Book, BookList, GenreList, StatsResponse, HealthResponse
-from api.utils import load_books_data, filter_books, sort_books, search_books
+from api.admission import AdmissionMiddleware
+from api.bitmaps import build_bitmap_index
+from api.config import settings
+from api.cube import build_aggregate_cube, parse_dimensions, parse_metrics
+from api.dataset import BooksDataset, DatasetStore
+from api.executor import BlockingExecutor, all_pools, default_pool, heavy_pool
+from api.facets import (
+    PRICE_BIN_LABELS,
+    build_facet_index,
+    parse_facets,
+    price_bin_codes,
+)
+from api.filters import (
+    FilterError,
+    FilterPlan,
+    Predicate,
+    legacy_predicates,
+    parse_filter_json,
+    parse_filter_query,
+)
+from api.histogram import MAX_BINS, build_histogram_index, parse_edges
+from api.metrics import (
+    DATASET_INFO,
+    DATASET_ROWS,
+    REGISTRY,
+    MetricsMiddleware,
+    render_metrics,
+    stage,
+)
+from api.models import (
+    Book,
+    BookList,
+    GenreList,
+    GroupByResult,
+    Histogram,
+    StatsResponse,
+    HealthResponse,
+    BookQuery,
+    SearchResult,
+    SimilarBooks,
+    SuggestionList,
+    TopBooks,
+)
+from api.profiling import ProfilerBusy, plan_step, run_with_diagnostics
+from api.search import SUGGEST_MAX_K, build_prefix_index, build_search_index
+from api.similar import build_similarity_index
+from api.utils import search_books, search_mask, select_top, sort_books
 
 # Configuração de logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Ciclo de vida da aplicação: finaliza os pools de threads ao encerrar"""
+    yield
+    for pool in all_pools():
+        pool.shutdown()
+
+
 # Inicializa FastAPI
 app = FastAPI(
     title="Books to Scrape API",
@@ -27,24 +86,163 @@ app = FastAPI(
     docs_url="/docs",
     redoc_url="/redoc",
     openapi_url="/openapi.json",
+    lifespan=lifespan,
 )
 
-# Configuração CORS - permite acesso público
+# Controle de admissão: recusa (429/503) antes de executar trabalho caro
+app.add_middleware(AdmissionMiddleware)
+
+# Configuração CORS - permite acesso público. Registrado depois da
+# admissão (fica por fora dela) para que as recusas também levem os
+# headers CORS e o navegador consiga ler o status e o Retry-After
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  # Em produção, especificar domínios permitidos
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Retry-After"],
 )
 
-# Carrega dados ao iniciar
-try:
-    BOOKS_DF = load_books_data()
-    logger.info(f"Dados carregados: {len(BOOKS_DF)} livros")
-except Exception as e:
-    logger.error(f"Erro ao carregar dados: {e}")
-    BOOKS_DF = pd.DataFrame()
+# Métricas por rota (middleware mais externo, mede inclusive as recusas)
+app.add_middleware(MetricsMiddleware)
+
+# Carrega dados ao iniciar; o CSV é recarregado quando o arquivo muda
+STORE = DatasetStore(settings.data_path, check_interval=settings.data_reload_interval)
+STORE.load()
+STORE.add_warmer("prefix_index", build_prefix_index)
+STORE.add_warmer("bitmap_index", build_bitmap_index)
+STORE.add_warmer("similarity_index", build_similarity_index)
+STORE.add_warmer("aggregate_cube", build_aggregate_cube)
+STORE.add_warmer("histogram_index", build_histogram_index)
+
+
+def _current_dataset() -> BooksDataset:
+    """Dataset atual (503 se os dados não foram carregados)"""
+    dataset = STORE.current()
+    if dataset.empty:
+        raise HTTPException(status_code=503, detail="Dados não disponíveis")
+    return dataset
+
+
+def _collect_dataset_metrics():
+    """Atualiza gauges do dataset no momento da coleta"""
+    dataset = STORE.current()
+    DATASET_ROWS.set(len(dataset))
+    DATASET_INFO.clear()
+    DATASET_INFO.set(1, dataset.version)
+
+
+REGISTRY.register_collector(_collect_dataset_metrics)
+
+
+def _diagnostics_requested(
+    request: Request, explain: bool, profile: bool
+) -> Tuple[bool, bool]:
+    """
+    Resolve os modos de diagnóstico (query ou headers X-Explain/X-Profile)
+
+    Os modos exigem o header X-Debug-Token igual a API_DEBUG_TOKEN; sem
+    token configurado o diagnóstico fica desabilitado.
+    """
+    explain = explain or request.headers.get("x-explain", "").lower() in ("1", "true")
+    profile = profile or request.headers.get("x-profile", "").lower() in ("1", "true")
+    if explain or profile:
+        token = settings.debug_token
+        provided = request.headers.get("x-debug-token", "")
+        if not token or not secrets.compare_digest(provided, token):
+            raise HTTPException(
+                status_code=403,
+                detail="Modo de diagnóstico requer header X-Debug-Token válido",
+            )
+    return explain, profile
+
+
+def _facet_fields(facets: Optional[str]) -> List[str]:
+    """Campos do parâmetro facets (422 se algum for inválido)"""
+    try:
+        return parse_facets(facets)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+def _parse_filter(parse, value) -> List[Predicate]:
+    """Predicados do filtro (422 se o filtro for inválido)"""
+    try:
+        return parse(value)
+    except FilterError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+async def _call_handler(
+    pool: BlockingExecutor, func, explain: bool = False, profile: bool = False, **kwargs
+) -> dict:
+    """
+    Executa o handler síncrono no pool, com a chave "diagnostico" se pedido
+
+    Um perfil de CPU por vez no processo: com outro em andamento, 409.
+    """
+    if not (explain or profile):
+        return await pool.run(func, **kwargs)
+
+    try:
+        result, diagnostics = await pool.run(
+            run_with_diagnostics, func, explain=explain, profile=profile, **kwargs
+        )
+    except ProfilerBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    result["diagnostico"] = diagnostics
+    return result
+
+
+async def _run_handler(
+    pool: BlockingExecutor, func, explain: bool = False, profile: bool = False, **kwargs
+):
+    """
+    Executa o handler síncrono no pool, anexando o diagnóstico quando pedido
+
+    Com diagnóstico a resposta inclui a chave "diagnostico" (plano de
+    consulta e/ou perfil de CPU) ao lado dos dados normais.
+    """
+    result = await _call_handler(pool, func, explain, profile, **kwargs)
+    if not (explain or profile):
+        return result
+    return JSONResponse(jsonable_encoder(result))
+
+
+# Header com o total nos modos de contagem
+TOTAL_COUNT_HEADER = "X-Total-Count"
+
+
+async def _count_response(
+    request: Request, func, explain: bool = False, profile: bool = False, **kwargs
+) -> Response:
+    """
+    Modo contagem (count_only=true ou HEAD): só o total, sem livros
+
+    O total vai no header X-Total-Count; o HEAD não tem corpo e o GET
+    retorna {"total": ...} (mais facetas e diagnóstico, se pedidos).
+    """
+    if request.method == "HEAD":
+        result = await default_pool.run(func, **kwargs)
+        return Response(headers={TOTAL_COUNT_HEADER: str(result["total"])})
+
+    result = await _call_handler(default_pool, func, explain, profile, **kwargs)
+    return JSONResponse(
+        jsonable_encoder(result), headers={TOTAL_COUNT_HEADER: str(result["total"])}
+    )
+
+
+# Campos numéricos aceitos por /books/top
+TOP_FIELDS = ("price", "rating", "availability_copies")
+
+# Campos retornados pelo autocompletar
+SUGGESTION_FIELDS = ["id", "title", "rating", "price", "category"]
+
+
+def _category_lower(df: pd.DataFrame) -> pd.Series:
+    """Coluna de categoria normalizada para comparações case-insensitive"""
+    return df["category"].str.lower()
 
 
 @app.get("/", tags=["Root"])
@@ -59,6 +257,7 @@ async def root():
             "livros": "/books",
             "livro_por_id": "/books/{id}",
             "busca": "/books/search",
+            "autocompletar": "/books/suggest",
             "generos": "/books/genres",
             "livros_por_genero": "/books/genre/{genre}",
             "estatisticas": "/stats",
@@ -69,14 +268,23 @@ async def root():
 @app.get("/health", response_model=HealthResponse, tags=["Health"])
 async def health_check():
     """Endpoint de verificação de saúde da API"""
+    dataset = STORE.current()
     return {
         "status": "saudavel",
         "timestamp": datetime.now(timezone.utc).isoformat(),
-        "total_livros": len(BOOKS_DF),
-        "dados_carregados": not BOOKS_DF.empty,
+        "total_livros": len(dataset),
+        "dados_carregados": not dataset.empty,
     }
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Métricas no formato texto do Prometheus"""
+    return PlainTextResponse(
+        render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
 @app.get("/debug", tags=["Debug"])
 async def debug_info():
     """Endpoint de debug para verificar o ambiente"""
@@ -84,6 +292,8 @@ async def debug_info():
     from pathlib import Path
     
     # Verificar se o arquivo existe
+    dataset = STORE.current()
+    books_df = dataset.df
     data_path = Path("data/books.csv")
     file_exists = data_path.exists()
     file_size = data_path.stat().st_size if file_exists else 0
@@ -98,14 +308,27 @@ async def debug_info():
         "tamanho_arquivo": file_size,
         "arquivos_em_data": data_files,
         "diretorio_atual": str(Path.cwd()),
-        "total_livros_carregados": len(BOOKS_DF),
-        "colunas_dataframe": list(BOOKS_DF.columns) if not BOOKS_DF.empty else [],
-        "primeiras_linhas": BOOKS_DF.head(3).to_dict("records") if not BOOKS_DF.empty else []
+        "total_livros_carregados": len(books_df),
+        "versao_dataset": dataset.version,
+        "carregado_em": dataset.loaded_at,
+        "recargas": STORE.reloads,
+        "colunas_dataframe": list(books_df.columns) if not books_df.empty else [],
+        "primeiras_linhas": books_df.head(3).to_dict("records") if not books_df.empty else [],
+        "executores": [pool.stats() for pool in all_pools()],
+        # explain/profile por requisição: /books?explain=true com X-Debug-Token
+        "diagnostico_habilitado": bool(settings.debug_token),
     }
 
 
+@app.head(
+    "/books",
+    tags=["Books"],
+    summary="Total da listagem no header X-Total-Count",
+    operation_id="count_books",
+)
 @app.get("/books", response_model=BookList, tags=["Books"])
 async def get_books(
+    request: Request,
     page: int = Query(1, ge=1, description="Número da página"),
     per_page: int = Query(20, ge=1, le=100, description="Livros por página"),
     sort: Optional[str] = Query(
@@ -116,6 +339,23 @@ async def get_books(
     min_price: Optional[float] = Query(None, ge=0, description="Preço mínimo"),
     max_price: Optional[float] = Query(None, ge=0, description="Preço máximo"),
     min_rating: Optional[int] = Query(None, ge=1, le=5, description="Rating mínimo"),
+    filter: Optional[str] = Query(
+        None,
+        description="Filtro avançado, ex: category:Poetry|Fiction;rating:3..5;in_stock",
+    ),
+    facets: Optional[str] = Query(
+        None,
+        description="Facetas separadas por vírgula (category, rating, price_bin)",
+    ),
+    count_only: bool = Query(
+        False, description="Retorna só o total (e as facetas), sem os livros"
+    ),
+    explain: bool = Query(
+        False, description="Inclui plano de consulta (requer X-Debug-Token)"
+    ),
+    profile: bool = Query(
+        False, description="Inclui perfil de CPU da requisição (requer X-Debug-Token)"
+    ),
 ):
     """
     Lista paginada de livros com filtros e ordenação
@@ -127,24 +367,115 @@ async def get_books(
     - **category**: filtrar por categoria específica
     - **min_price/max_price**: filtro de faixa de preço
     - **min_rating**: filtro de avaliação mínima
+    - **filter**: filtro avançado com cláusulas `campo:valor` separadas por
+      `;` (valores `a|b`, intervalos `3..5`, comparações `>=5`); campos:
+      category, rating, price, price_bin, availability, availability_copies,
+      in_stock, scraped_at
+    - **facets**: contagens por categoria, avaliação e faixa de preço
+      sobre todo o resultado filtrado (ex: `facets=category,price_bin`)
+    - **count_only**: só o total, também no header X-Total-Count (o mesmo
+      que `HEAD /books`)
+    - **explain/profile**: diagnóstico da consulta (requer header X-Debug-Token)
     """
-    if BOOKS_DF.empty:
-        raise HTTPException(status_code=503, detail="Dados não disponíveis")
-
-    df = BOOKS_DF.copy()
-
-    # Aplicar filtros
-    df = filter_books(
-        df,
+    dataset = _current_dataset()
+    facet_fields = _facet_fields(facets)
+    predicates = legacy_predicates(
         category=category,
         min_price=min_price,
         max_price=max_price,
         min_rating=min_rating,
+    ) + _parse_filter(parse_filter_query, filter)
+    explain, profile = _diagnostics_requested(request, explain, profile)
+    if count_only or request.method == "HEAD":
+        return await _count_response(
+            request,
+            _count_books,
+            explain=explain,
+            profile=profile,
+            dataset=dataset,
+            predicates=predicates,
+            facets=facet_fields,
+        )
+    return await _run_handler(
+        default_pool,
+        _list_books,
+        explain=explain,
+        profile=profile,
+        dataset=dataset,
+        page=page,
+        per_page=per_page,
+        sort=sort,
+        order=order,
+        predicates=predicates,
+        facets=facet_fields,
+    )
+
+
+@app.post("/books/query", response_model=BookList, tags=["Books"])
+async def query_books(
+    request: Request,
+    query: BookQuery,
+    explain: bool = Query(
+        False, description="Inclui plano de consulta (requer X-Debug-Token)"
+    ),
+    profile: bool = Query(
+        False, description="Inclui perfil de CPU da requisição (requer X-Debug-Token)"
+    ),
+):
+    """
+    Listagem com filtro avançado no corpo JSON
+
+    O campo `filter` é um objeto `{campo: condição}`; a condição é um valor
+    (igualdade), uma lista (qualquer um dos valores) ou um objeto com
+    `gte`, `gt`, `lte`, `lt`. Exemplo:
+
+    `{"filter": {"category": ["Poetry", "Fiction"], "rating": {"gte": 4},
+    "in_stock": true}, "sort": "price", "per_page": 10}`
+    """
+    dataset = _current_dataset()
+    facet_fields = _facet_fields(",".join(query.facets or []))
+    predicates = _parse_filter(parse_filter_json, query.filter)
+    explain, profile = _diagnostics_requested(request, explain, profile)
+    return await _run_handler(
+        default_pool,
+        _list_books,
+        explain=explain,
+        profile=profile,
+        dataset=dataset,
+        page=query.page,
+        per_page=query.per_page,
+        sort=query.sort,
+        order=query.order,
+        predicates=predicates,
+        facets=facet_fields,
     )
 
+
+def _list_books(
+    dataset: BooksDataset,
+    page: int,
+    per_page: int,
+    sort: Optional[str],
+    order: str,
+    predicates: List[Predicate],
+    facets: Optional[List[str]] = None,
+) -> dict:
+    """Filtra, ordena e pagina a listagem (executado no pool de threads)"""
+    # Aplicar filtros: plano ordenado por seletividade sobre os bitmaps
+    with stage("filter") as st:
+        index = dataset.derived("bitmap_index", build_bitmap_index)
+        positions = FilterPlan(index, predicates).execute()
+        df = dataset.df if positions is None else dataset.df.iloc[positions]
+        st.set(indice="bitmap", predicados=len(predicates), linhas_saida=len(df))
+
+    # Facetas sobre todo o resultado filtrado (antes da paginação)
+    facet_counts = _count_facets(dataset, facets, positions) if facets else None
+
     # Aplicar ordenação
     if sort:
-        df = sort_books(df, sort, order)
+        with stage("sort") as st:
+            df = sort_books(df, sort, order)
+            st.set(campo=sort, ordem=order, linhas=len(df))
 
     # Paginação
     total = len(df)
@@ -154,7 +485,12 @@ async def get_books(
     if start >= total and total > 0:
         raise HTTPException(status_code=404, detail="Página não encontrada")
 
-    books_page = df.iloc[start:end].to_dict("records")
+    with stage("paginate") as st:
+        page_df = df.iloc[start:end]
+        st.set(inicio=start, fim=end, linhas_saida=len(page_df))
+    with stage("serialize") as st:
+        books_page = page_df.to_dict("records")
+        st.set(linhas=len(books_page))
 
     return {
         "total": total,
@@ -162,14 +498,76 @@ async def get_books(
         "por_pagina": per_page,
         "total_paginas": (total + per_page - 1) // per_page,
         "livros": books_page,
+        "facetas": facet_counts,
     }
 
 
-@app.get("/books/search", response_model=BookList, tags=["Books"])
+def _count_books(
+    dataset: BooksDataset,
+    predicates: List[Predicate],
+    facets: Optional[List[str]] = None,
+) -> dict:
+    """Total da listagem pelo popcount dos bitmaps (executado no pool)"""
+    with stage("filter") as st:
+        index = dataset.derived("bitmap_index", build_bitmap_index)
+        plan = FilterPlan(index, predicates)
+        if facets:
+            positions = plan.execute()
+            total = len(dataset) if positions is None else len(positions)
+        else:
+            positions, total = None, plan.count()
+        st.set(indice="bitmap", predicados=len(predicates), linhas_saida=total)
+
+    result = {"total": total}
+    if facets:
+        result["facetas"] = _count_facets(dataset, facets, positions)
+    return result
+
+
+def _count_facets(
+    dataset: BooksDataset, facets: List[str], positions: Optional[np.ndarray]
+) -> dict:
+    """Contagens das facetas nas posições que casaram (None = todas)"""
+    with stage("facets") as st:
+        index = dataset.derived("facet_index", build_facet_index)
+        counts = index.counts(facets, positions)
+        st.set(
+            campos=facets,
+            linhas=len(dataset) if positions is None else len(positions),
+        )
+    return counts
+
+
+@app.head(
+    "/books/search",
+    tags=["Books"],
+    summary="Total da busca no header X-Total-Count",
+    operation_id="count_search",
+)
+@app.get("/books/search", response_model=SearchResult, tags=["Books"])
 async def search_books_endpoint(
+    request: Request,
     q: str = Query(..., min_length=1, description="Termo de busca"),
     page: int = Query(1, ge=1, description="Número da página"),
     per_page: int = Query(20, ge=1, le=100, description="Livros por página"),
+    mode: str = Query(
+        "substring",
+        pattern="^(substring|ranked)$",
+        description="substring (correspondência exata) ou ranked (BM25 tolerante a erros)",
+    ),
+    facets: Optional[str] = Query(
+        None,
+        description="Facetas separadas por vírgula (category, rating, price_bin)",
+    ),
+    count_only: bool = Query(
+        False, description="Retorna só o total (e as facetas), sem os livros"
+    ),
+    explain: bool = Query(
+        False, description="Inclui plano de consulta (requer X-Debug-Token)"
+    ),
+    profile: bool = Query(
+        False, description="Inclui perfil de CPU da requisição (requer X-Debug-Token)"
+    ),
 ):
     """
     Busca livros por título ou descrição
@@ -177,18 +575,90 @@ async def search_books_endpoint(
     - **q**: termo de busca (pesquisa em título e descrição)
     - **page**: número da página
     - **per_page**: quantidade de livros por página
+    - **mode**: `substring` (padrão, ordem do catálogo) ou `ranked`
+      (relevância BM25, com correção de termos digitados errado)
+    - **facets**: contagens por categoria, avaliação e faixa de preço
+      sobre todos os resultados da busca
+    - **count_only**: só o total, também no header X-Total-Count (o mesmo
+      que `HEAD /books/search`)
+    - **explain/profile**: diagnóstico da consulta (requer header X-Debug-Token)
     """
-    if BOOKS_DF.empty:
-        raise HTTPException(status_code=503, detail="Dados não disponíveis")
+    dataset = _current_dataset()
+    facet_fields = _facet_fields(facets)
+    explain, profile = _diagnostics_requested(request, explain, profile)
+    if count_only or request.method == "HEAD":
+        return await _count_response(
+            request,
+            _count_search,
+            explain=explain,
+            profile=profile,
+            dataset=dataset,
+            q=q,
+            mode=mode,
+            facets=facet_fields,
+        )
+    return await _run_handler(
+        default_pool,
+        _search_books,
+        explain=explain,
+        profile=profile,
+        dataset=dataset,
+        q=q,
+        page=page,
+        per_page=per_page,
+        mode=mode,
+        facets=facet_fields,
+    )
 
-    df = search_books(BOOKS_DF, q)
 
-    # Paginação
-    total = len(df)
+def _search_books(
+    dataset: BooksDataset,
+    q: str,
+    page: int,
+    per_page: int,
+    mode: str = "substring",
+    facets: Optional[List[str]] = None,
+) -> dict:
+    """Busca textual paginada (executado no pool de threads)"""
+    books_df = dataset.df
     start = (page - 1) * per_page
     end = start + per_page
-
-    books_page = df.iloc[start:end].to_dict("records")
+    suggestion = None
+
+    if mode == "ranked":
+        index = dataset.derived("search_index", build_search_index)
+        with stage("filter") as st:
+            term_ids, corrections = index.resolve_terms(q)
+            matched, scores = index.score(term_ids)
+            positions, _ = index.top_k(matched, scores, limit=end)
+            total = len(matched)
+            st.set(
+                indice="bm25",
+                linhas_entrada=len(books_df),
+                linhas_saida=total,
+                correcoes=corrections,
+            )
+        suggestion = index.suggest(q, corrections)
+        with stage("paginate") as st:
+            page_df = books_df.iloc[positions[start:end]]
+            st.set(inicio=start, fim=end, linhas_saida=len(page_df))
+    else:
+        with stage("filter"):
+            df = search_books(books_df, q)
+        matched = df.index.to_numpy()
+        total = len(df)
+        if total == 0:
+            index = dataset.derived("search_index", build_search_index)
+            suggestion = index.suggest(q)
+        with stage("paginate") as st:
+            page_df = df.iloc[start:end]
+            st.set(inicio=start, fim=end, linhas_saida=len(page_df))
+
+    facet_counts = _count_facets(dataset, facets, matched) if facets else None
+
+    with stage("serialize") as st:
+        books_page = page_df.to_dict("records")
+        st.set(linhas=len(books_page))
 
     return {
         "total": total,
@@ -196,18 +666,169 @@ async def search_books_endpoint(
         "por_pagina": per_page,
         "total_paginas": (total + per_page - 1) // per_page,
         "livros": books_page,
+        "facetas": facet_counts,
+        "modo": mode,
+        "sugestao": suggestion,
     }
 
 
+def _count_search(
+    dataset: BooksDataset,
+    q: str,
+    mode: str = "substring",
+    facets: Optional[List[str]] = None,
+) -> dict:
+    """Total da busca, sem ranquear nem paginar (executado no pool)"""
+    with stage("filter") as st:
+        if mode == "ranked":
+            index = dataset.derived("search_index", build_search_index)
+            term_ids, corrections = index.resolve_terms(q)
+            matched, _ = index.score(term_ids)
+            st.set(indice="bm25", correcoes=corrections)
+        else:
+            matched = np.flatnonzero(search_mask(dataset.df, q).to_numpy())
+            st.set(indice="varredura")
+        st.set(linhas_entrada=len(dataset), linhas_saida=len(matched))
+
+    result = {"total": len(matched), "modo": mode}
+    if facets:
+        result["facetas"] = _count_facets(dataset, facets, matched)
+    return result
+
+
+@app.get("/books/suggest", response_model=SuggestionList, tags=["Books"])
+async def suggest_books(
+    prefix: str = Query(..., min_length=1, description="Início do título digitado"),
+    k: int = Query(10, ge=1, le=SUGGEST_MAX_K, description="Quantidade de sugestões"),
+):
+    """
+    Autocompletar de títulos por prefixo
+
+    - **prefix**: início do título (sem diferenciar maiúsculas, acentos ou
+      pontuação; artigos iniciais como "The" podem ser omitidos)
+    - **k**: quantidade de sugestões, ordenadas por avaliação
+    """
+    dataset = _current_dataset()
+    index = dataset.derived("prefix_index", build_prefix_index)
+    with stage("filter") as st:
+        positions, total = index.suggest(prefix, k)
+        st.set(indice="prefixo", linhas_saida=total)
+    with stage("serialize"):
+        suggestions = dataset.df.iloc[positions][SUGGESTION_FIELDS].to_dict("records")
+
+    return {"prefixo": prefix, "total": total, "sugestoes": suggestions}
+
+
+@app.get("/books/top", response_model=TopBooks, tags=["Books"])
+async def top_books(
+    request: Request,
+    by: str = Query(
+        "price",
+        pattern="^(" + "|".join(TOP_FIELDS) + ")$",
+        description="Campo: price, rating ou availability_copies",
+    ),
+    order: str = Query("asc", pattern="^(asc|desc)$", description="asc ou desc"),
+    k: int = Query(10, ge=1, le=100, description="Quantidade de livros"),
+    category: Optional[str] = Query(None, description="Filtrar por categoria"),
+    min_price: Optional[float] = Query(None, ge=0, description="Preço mínimo"),
+    max_price: Optional[float] = Query(None, ge=0, description="Preço máximo"),
+    min_rating: Optional[int] = Query(None, ge=1, le=5, description="Rating mínimo"),
+    filter: Optional[str] = Query(
+        None, description="Filtro avançado (mesma sintaxe de /books)"
+    ),
+    explain: bool = Query(
+        False, description="Inclui plano de consulta (requer X-Debug-Token)"
+    ),
+    profile: bool = Query(
+        False, description="Inclui perfil de CPU da requisição (requer X-Debug-Token)"
+    ),
+):
+    """
+    Primeiros k livros por preço, avaliação ou cópias disponíveis
+
+    Equivale a `/books?sort=...&per_page=k` (mesma ordem e desempates), mas
+    usa seleção parcial em vez de ordenar todo o resultado, e guarda o
+    resultado por versão do dataset.
+
+    - **by**: campo (price, rating, availability_copies)
+    - **order**: asc (menores primeiro) ou desc (maiores primeiro)
+    - **k**: quantidade de livros (máximo 100)
+    - **category/min_price/max_price/min_rating/filter**: filtros, como em /books
+    """
+    dataset = _current_dataset()
+    predicates = legacy_predicates(
+        category=category,
+        min_price=min_price,
+        max_price=max_price,
+        min_rating=min_rating,
+    ) + _parse_filter(parse_filter_query, filter)
+    explain, profile = _diagnostics_requested(request, explain, profile)
+    return await _run_handler(
+        default_pool,
+        _top_books,
+        explain=explain,
+        profile=profile,
+        dataset=dataset,
+        by=by,
+        order=order,
+        k=k,
+        predicates=predicates,
+    )
+
+
+def _top_books(
+    dataset: BooksDataset, by: str, order: str, k: int, predicates: List[Predicate]
+) -> dict:
+    """Top-k com cache por versão do dataset (executado no pool de threads)"""
+    key = (by, order, k, tuple(dataclasses.astuple(p) for p in predicates))
+    misses = []
+
+    def compute() -> dict:
+        misses.append(key)
+        with stage("filter") as st:
+            index = dataset.derived("bitmap_index", build_bitmap_index)
+            positions = FilterPlan(index, predicates).execute()
+            st.set(indice="bitmap", predicados=len(predicates))
+        with stage("sort") as st:
+            values = dataset.df[by].to_numpy(dtype=np.float64)
+            if positions is not None:
+                values = values[positions]
+            top = select_top(values, k, descending=order == "desc")
+            if positions is not None:
+                top = positions[top]
+            st.set(campo=by, ordem=order, linhas=len(values), metodo="partition")
+        with stage("serialize") as st:
+            books = dataset.df.iloc[top].to_dict("records")
+            st.set(linhas=len(books))
+        return {
+            "campo": by,
+            "ordem": order,
+            "k": k,
+            "total": len(values),
+            "livros": books,
+        }
+
+    with plan_step("cache_top", versao=dataset.version) as st:
+        result = dataset.cached("top_books", key, compute)
+        st.set(acerto=not misses)
+    # Cópia rasa: o diagnóstico é anexado à resposta, não ao cache
+    return dict(result)
+
+
 @app.get("/books/genres", response_model=GenreList, tags=["Genres"])
 async def get_genres():
     """
     Lista todas as categorias/gêneros disponíveis com contagem de livros
     """
-    if BOOKS_DF.empty:
-        raise HTTPException(status_code=503, detail="Dados não disponíveis")
+    dataset = _current_dataset()
+    return await default_pool.run(_list_genres, dataset)
+
 
-    genre_counts = BOOKS_DF["category"].value_counts().to_dict()
+def _list_genres(dataset: BooksDataset) -> dict:
+    """Contagem de livros por categoria (executado no pool de threads)"""
+    genre_counts = dataset.derived(
+        "genre_counts", lambda df: df["category"].value_counts().to_dict()
+    )
     genres = [
         {"nome": genre, "contagem": count} for genre, count in genre_counts.items()
     ]
@@ -228,11 +849,20 @@ async def get_books_by_genre(
     - **page**: número da página
     - **per_page**: livros por página
     """
-    if BOOKS_DF.empty:
-        raise HTTPException(status_code=503, detail="Dados não disponíveis")
+    dataset = _current_dataset()
+    return await default_pool.run(
+        _list_books_by_genre, dataset, genre=genre, page=page, per_page=per_page
+    )
 
+
+def _list_books_by_genre(
+    dataset: BooksDataset, genre: str, page: int, per_page: int
+) -> dict:
+    """Livros de uma categoria, paginados (executado no pool de threads)"""
     # Busca case-insensitive
-    df = BOOKS_DF[BOOKS_DF["category"].str.lower() == genre.lower()]
+    with stage("filter"):
+        category_lower = dataset.derived("category_lower", _category_lower)
+        df = dataset.df[category_lower == genre.lower()]
 
     if df.empty:
         raise HTTPException(
@@ -244,7 +874,12 @@ async def get_books_by_genre(
     start = (page - 1) * per_page
     end = start + per_page
 
-    books_page = df.iloc[start:end].to_dict("records")
+    with stage("paginate") as st:
+        page_df = df.iloc[start:end]
+        st.set(inicio=start, fim=end, linhas_saida=len(page_df))
+    with stage("serialize") as st:
+        books_page = page_df.to_dict("records")
+        st.set(linhas=len(books_page))
 
     return {
         "total": total,
@@ -262,10 +897,8 @@ async def get_book_by_id(book_id: int):
 
     - **book_id**: ID único do livro
     """
-    if BOOKS_DF.empty:
-        raise HTTPException(status_code=503, detail="Dados não disponíveis")
-
-    book = BOOKS_DF[BOOKS_DF["id"] == book_id]
+    books_df = _current_dataset().df
+    book = books_df[books_df["id"] == book_id]
 
     if book.empty:
         raise HTTPException(
@@ -275,6 +908,65 @@ async def get_book_by_id(book_id: int):
     return book.iloc[0].to_dict()
 
 
+@app.get(
+    "/books/{book_id}/similar", response_model=SimilarBooks, tags=["Books"]
+)
+async def similar_books(
+    request: Request,
+    book_id: int,
+    k: int = Query(10, ge=1, le=50, description="Quantidade de livros"),
+    explain: bool = Query(
+        False, description="Inclui plano de consulta (requer X-Debug-Token)"
+    ),
+    profile: bool = Query(
+        False, description="Inclui perfil de CPU da requisição (requer X-Debug-Token)"
+    ),
+):
+    """
+    Livros mais semelhantes a um livro
+
+    A semelhança combina o cosseno TF-IDF de título + descrição com a
+    categoria e a proximidade de preço. A matriz é construída uma vez por
+    versão do dataset.
+
+    - **book_id**: ID do livro de referência
+    - **k**: quantidade de livros (máximo 50)
+    """
+    dataset = _current_dataset()
+    explain, profile = _diagnostics_requested(request, explain, profile)
+    return await _run_handler(
+        default_pool,
+        _similar_books,
+        explain=explain,
+        profile=profile,
+        dataset=dataset,
+        book_id=book_id,
+        k=k,
+    )
+
+
+def _similar_books(dataset: BooksDataset, book_id: int, k: int) -> dict:
+    """Top-k por similaridade (executado no pool de threads)"""
+    with stage("index") as st:
+        index = dataset.derived("similarity_index", build_similarity_index)
+        st.set(termos=len(index.terms))
+    position = index.position_of(book_id)
+    if position is None:
+        raise HTTPException(
+            status_code=404, detail=f"Livro com ID {book_id} não encontrado"
+        )
+    with stage("score") as st:
+        positions, scores = index.similar(position, k)
+        st.set(linhas=index.n_docs, metodo="tfidf_esparso")
+    with stage("serialize") as st:
+        books = dataset.df.iloc[positions].to_dict("records")
+        for book, score in zip(books, scores):
+            book["similaridade"] = round(float(score), 6)
+        st.set(linhas=len(books))
+
+    return {"livro_id": book_id, "k": k, "similares": books}
+
+
 @app.get("/stats", response_model=StatsResponse, tags=["Statistics"])
 async def get_statistics():
     """
@@ -287,11 +979,18 @@ async def get_statistics():
     - Top categorias
     - Features engenheiradas (faixas de preço, avaliação normalizada)
     """
-    if BOOKS_DF.empty:
-        raise HTTPException(status_code=503, detail="Dados não disponíveis")
+    dataset = _current_dataset()
+    return await heavy_pool.run(_compute_statistics, dataset)
 
-    df = BOOKS_DF.copy()
 
+def _compute_statistics(dataset: BooksDataset) -> dict:
+    """Estatísticas agregadas, calculadas uma vez por versão (pool pesado)"""
+    with stage("aggregate"):
+        return dataset.derived("statistics", _statistics)
+
+
+def _statistics(df: pd.DataFrame) -> dict:
+    """Builder das estatísticas agregadas para BooksDataset.derived"""
     # Estatísticas de preço
     price_stats = {
         "media": float(df["price"].mean()),
@@ -309,17 +1008,14 @@ async def get_statistics():
     top_categories = df["category"].value_counts().head(10).to_dict()
 
     # Features engenheiradas
-    # Faixas de preço
-    df["price_bin"] = pd.cut(
-        df["price"],
-        bins=[0, 20, 40, 60, 100],
-        labels=["economico", "moderado", "premium", "luxo"],
+    # Faixas de preço (a última sem limite superior)
+    prices = df["price"].to_numpy(dtype=np.float64)
+    bin_counts = np.bincount(
+        price_bin_codes(prices[~np.isnan(prices)]), minlength=len(PRICE_BIN_LABELS)
     )
-    price_bins = df["price_bin"].value_counts().to_dict()
-    price_bins = {str(k): int(v) for k, v in price_bins.items()}
-
-    # Avaliação normalizada (0-1)
-    df["normalized_rating"] = df["rating"] / 5.0
+    price_bins = {
+        label: int(count) for label, count in zip(PRICE_BIN_LABELS, bin_counts)
+    }
 
     # Estatísticas de disponibilidade
     availability_stats = df["availability"].value_counts().to_dict()
@@ -332,10 +1028,183 @@ async def get_statistics():
         "top_categorias": top_categories,
         "faixas_preco": price_bins,
         "estatisticas_disponibilidade": availability_stats,
-        "media_avaliacao_normalizada": float(df["normalized_rating"].mean()),
+        # Avaliação normalizada (0-1)
+        "media_avaliacao_normalizada": float((df["rating"] / 5.0).mean()),
+    }
+
+
+@app.get("/stats/groupby", response_model=GroupByResult, tags=["Statistics"])
+async def group_by_statistics(
+    request: Request,
+    by: str = Query(
+        ...,
+        description="Dimensões separadas por vírgula: category, rating, "
+        "availability, price_bin, availability_copies",
+    ),
+    metrics: str = Query(
+        "count",
+        description="Métricas: count, sum(campo), mean(campo), min(campo), "
+        "max(campo) com campo em price, availability_copies, rating",
+    ),
+    category: Optional[str] = Query(None, description="Filtrar por categoria"),
+    min_price: Optional[float] = Query(None, ge=0, description="Preço mínimo"),
+    max_price: Optional[float] = Query(None, ge=0, description="Preço máximo"),
+    min_rating: Optional[int] = Query(None, ge=1, le=5, description="Rating mínimo"),
+    filter: Optional[str] = Query(
+        None, description="Filtro avançado (mesma sintaxe de /books)"
+    ),
+    explain: bool = Query(
+        False, description="Inclui plano de consulta (requer X-Debug-Token)"
+    ),
+    profile: bool = Query(
+        False, description="Inclui perfil de CPU da requisição (requer X-Debug-Token)"
+    ),
+):
+    """
+    Métricas agregadas por uma ou mais dimensões
+
+    Agrupamentos e filtros sobre categoria, avaliação, disponibilidade e
+    faixa de preço são respondidos por um cubo pré-agregado na carga dos
+    dados; os demais agregam as linhas filtradas.
+
+    - **by**: dimensões (ex: `category,rating`)
+    - **metrics**: métricas (ex: `count,mean(price),sum(availability_copies)`)
+    - **category/min_price/max_price/min_rating/filter**: filtros, como em /books
+    """
+    try:
+        dimensions = parse_dimensions(by)
+        requested = parse_metrics(metrics)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    dataset = _current_dataset()
+    predicates = legacy_predicates(
+        category=category,
+        min_price=min_price,
+        max_price=max_price,
+        min_rating=min_rating,
+    ) + _parse_filter(parse_filter_query, filter)
+    explain, profile = _diagnostics_requested(request, explain, profile)
+    return await _run_handler(
+        default_pool,
+        _group_by,
+        explain=explain,
+        profile=profile,
+        dataset=dataset,
+        dimensions=dimensions,
+        metrics=requested,
+        predicates=predicates,
+    )
+
+
+def _group_by(
+    dataset: BooksDataset,
+    dimensions: List[str],
+    metrics: list,
+    predicates: List[Predicate],
+) -> dict:
+    """Agregação pelo cubo ou pelas linhas (executado no pool de threads)"""
+    cube = dataset.derived("aggregate_cube", build_aggregate_cube)
+    with stage("aggregate") as st:
+        result = cube.group_by(
+            dimensions,
+            metrics,
+            predicates,
+            dataset.derived("bitmap_index", build_bitmap_index),
+        )
+        st.set(fonte=result["fonte"], grupos=len(result["grupos"]))
+
+    return {
+        "dimensoes": dimensions,
+        "metricas": [metric.label for metric in metrics],
+        **result,
     }
 
 
+@app.get("/stats/histogram", response_model=Histogram, tags=["Statistics"])
+async def histogram_statistics(
+    request: Request,
+    field: str = Query("price", description="Coluna numérica"),
+    bins: int = Query(
+        10, ge=1, le=MAX_BINS, description="Faixas de mesma largura (mín. a máx.)"
+    ),
+    edges: Optional[str] = Query(
+        None, description="Bordas explícitas separadas por vírgula (ex: 0,20,40,60)"
+    ),
+    category: Optional[str] = Query(None, description="Filtrar por categoria"),
+    min_price: Optional[float] = Query(None, ge=0, description="Preço mínimo"),
+    max_price: Optional[float] = Query(None, ge=0, description="Preço máximo"),
+    min_rating: Optional[int] = Query(None, ge=1, le=5, description="Rating mínimo"),
+    filter: Optional[str] = Query(
+        None, description="Filtro avançado (mesma sintaxe de /books)"
+    ),
+    explain: bool = Query(
+        False, description="Inclui plano de consulta (requer X-Debug-Token)"
+    ),
+    profile: bool = Query(
+        False, description="Inclui perfil de CPU da requisição (requer X-Debug-Token)"
+    ),
+):
+    """
+    Histograma de uma coluna numérica
+
+    Todas as faixas são retornadas, inclusive as vazias; valores fora das
+    bordas aparecem em `abaixo` e `acima`.
+
+    - **field**: coluna (price, availability_copies, rating)
+    - **bins**: quantidade de faixas de mesma largura entre o menor e o maior valor
+    - **edges**: bordas explícitas (substituem `bins`)
+    - **category/min_price/max_price/min_rating/filter**: filtros, como em /books
+    """
+    try:
+        explicit_edges = parse_edges(edges)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    dataset = _current_dataset()
+    predicates = legacy_predicates(
+        category=category,
+        min_price=min_price,
+        max_price=max_price,
+        min_rating=min_rating,
+    ) + _parse_filter(parse_filter_query, filter)
+    explain, profile = _diagnostics_requested(request, explain, profile)
+    return await _run_handler(
+        default_pool,
+        _histogram,
+        explain=explain,
+        profile=profile,
+        dataset=dataset,
+        field=field,
+        bins=bins,
+        edges=explicit_edges,
+        predicates=predicates,
+    )
+
+
+def _histogram(
+    dataset: BooksDataset,
+    field: str,
+    bins: int,
+    edges,
+    predicates: List[Predicate],
+) -> dict:
+    """Contagens por faixa (executado no pool de threads)"""
+    histograms = dataset.derived("histogram_index", build_histogram_index)
+    if field not in histograms.fields:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Campo '{field}' não numérico. "
+            f"Disponíveis: {', '.join(histograms.fields)}",
+        )
+    with stage("filter") as st:
+        index = dataset.derived("bitmap_index", build_bitmap_index)
+        positions = FilterPlan(index, predicates).execute()
+        st.set(indice="bitmap", predicados=len(predicates))
+    with stage("aggregate") as st:
+        result = histograms.histogram(field, bins, edges, positions)
+        st.set(faixas=len(result["faixas"]), metodo="searchsorted")
+    return result
+
+
 # Endpoint extra para exportar amostra de dados para treinamento de ML
 @app.get("/ml/sample", tags=["Machine Learning"])
 async def get_ml_sample(
@@ -354,32 +1223,44 @@ async def get_ml_sample(
     - categoria_preco: categoria de preço
     - tem_descricao: flag indicando se tem descrição
     """
-    if BOOKS_DF.empty:
-        raise HTTPException(status_code=503, detail="Dados não disponíveis")
+    dataset = _current_dataset()
+    return await heavy_pool.run(
+        _build_ml_sample, dataset, size=size, random_state=random_state
+    )
 
-    df = BOOKS_DF.copy()
 
-    # Features engenheiradas
-    df["preco_normalizado"] = (df["price"] - df["price"].min()) / (
-        df["price"].max() - df["price"].min()
-    )
-    df["avaliacao_normalizada"] = df["rating"] / 5.0
-    df["tem_descricao"] = df["description"].str.len() > 0
-    df["categoria_preco"] = pd.cut(
-        df["price"],
-        bins=[0, 20, 40, 60, 100],
-        labels=["economico", "moderado", "premium", "luxo"],
-    ).astype(str)
-
-    # Amostragem
+def _build_ml_sample(dataset: BooksDataset, size: int, random_state: int) -> dict:
+    """Monta a amostra com features engenheiradas (executado no pool pesado)"""
+    df = dataset.df
+
+    # Amostragem (as features são calculadas só nas linhas sorteadas)
     sample_size = min(size, len(df))
-    sample = df.sample(n=sample_size, random_state=random_state)
+    with stage("sample"):
+        sample = df.sample(n=sample_size, random_state=random_state)
+
+    # Features engenheiradas
+    with stage("features"):
+        price_min, price_max = df["price"].min(), df["price"].max()
+        sample["preco_normalizado"] = (sample["price"] - price_min) / (
+            price_max - price_min
+        )
+        sample["avaliacao_normalizada"] = sample["rating"] / 5.0
+        sample["tem_descricao"] = sample["description"].str.len() > 0
+        prices = sample["price"].to_numpy(dtype=np.float64)
+        sample["categoria_preco"] = np.where(
+            np.isnan(prices),
+            "nan",
+            np.asarray(PRICE_BIN_LABELS)[price_bin_codes(prices)],
+        )
+
+    with stage("serialize"):
+        records = sample.to_dict("records")
 
     return {
         "tamanho_amostra": sample_size,
         "seed_aleatorio": random_state,
         "features": list(sample.columns),
-        "dados": sample.to_dict("records"),
+        "dados": records,
     }
 
 
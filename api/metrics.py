@@ -0,0 +1,400 @@
+"""
+Métricas no formato texto do Prometheus
+
+Implementação mínima (sem dependências) de contadores, gauges e histogramas
+com labels, um middleware ASGI que mede cada requisição pela rota (template)
+e o context manager `stage` para medir etapas dentro dos handlers.
+"""
+
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from starlette.routing import Match
+
+from api.config import settings
+from api.executor import all_pools
+from api.profiling import NULL_STAGE, StageInfo, current_plan
+
+LATENCY_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    """Formata labels no padrão {nome="valor",...}"""
+    if not names:
+        return ""
+    pairs = []
+    for name, value in zip(names, values):
+        escaped = (
+            str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        )
+        pairs.append(f'{name}="{escaped}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    """Formata número sem notação desnecessária para inteiros"""
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    """Base das métricas: nome, ajuda, labels e lock"""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _header(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Contador monotônico"""
+
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labelvalues: str, amount: float = 1.0):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0.0) + amount
+
+    def get(self, *labelvalues: str) -> float:
+        return self._values.get(labelvalues, 0.0)
+
+    def items(self) -> List[Tuple[Tuple[str, ...], float]]:
+        with self._lock:
+            return list(self._values.items())
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        for labels, value in sorted(self.items()):
+            lines.append(
+                f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+            )
+        return lines
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Gauge(Counter):
+    """Valor que sobe e desce"""
+
+    kind = "gauge"
+
+    def dec(self, *labelvalues: str, amount: float = 1.0):
+        self.inc(*labelvalues, amount=-amount)
+
+    def set(self, value: float, *labelvalues: str):
+        with self._lock:
+            self._values[labelvalues] = float(value)
+
+
+class Histogram(_Metric):
+    """Histograma com buckets fixos (cumulativos na exposição)"""
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [contagem por bucket (+Inf no final), soma, total]
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *labelvalues: str):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labelvalues)
+            if entry is None:
+                entry = [[0] * (len(self.buckets) + 1), 0.0, 0]
+                self._values[labelvalues] = entry
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def snapshot(self, *labelvalues: str) -> Optional[Tuple[List[int], float, int]]:
+        with self._lock:
+            entry = self._values.get(labelvalues)
+            if entry is None:
+                return None
+            return list(entry[0]), entry[1], entry[2]
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        with self._lock:
+            items = [(k, (list(v[0]), v[1], v[2])) for k, v in self._values.items()]
+        bucket_names = self.labelnames + ("le",)
+        for labels, (counts, total_sum, count) in sorted(items):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(bucket_names, labels + (le,))} {cumulative}"
+                )
+            label_str = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_str} {repr(total_sum)}")
+            lines.append(f"{self.name}_count{label_str} {count}")
+        return lines
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Registry:
+    """Conjunto de métricas e coletores executados antes da exposição"""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], None]] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector: Callable[[], None]):
+        """Registra função que atualiza gauges no momento da coleta"""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        for collector in self._collectors:
+            collector()
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def clear(self):
+        for metric in self._metrics:
+            metric.clear()
+
+
+REGISTRY = Registry()
+
+REQUESTS_TOTAL = REGISTRY.register(
+    Counter(
+        "http_requests_total",
+        "Total de requisições HTTP por rota e status",
+        ["method", "route", "status"],
+    )
+)
+REQUEST_DURATION = REGISTRY.register(
+    Histogram(
+        "http_request_duration_seconds",
+        "Latência das requisições HTTP por rota",
+        ["method", "route"],
+    )
+)
+REQUESTS_IN_FLIGHT = REGISTRY.register(
+    Gauge("http_requests_in_flight", "Requisições em andamento por rota", ["route"])
+)
+STAGE_DURATION = REGISTRY.register(
+    Histogram(
+        "handler_stage_duration_seconds",
+        "Tempo de cada etapa interna dos handlers (filter, sort, paginate, serialize...)",
+        ["route", "stage"],
+    )
+)
+CACHE_REQUESTS = REGISTRY.register(
+    Counter(
+        "books_cache_requests_total",
+        "Consultas aos caches internos por resultado (hit/miss)",
+        ["cache", "result"],
+    )
+)
+CACHE_HIT_RATIO = REGISTRY.register(
+    Gauge("books_cache_hit_ratio", "Proporção de acertos por cache", ["cache"])
+)
+DATASET_ROWS = REGISTRY.register(
+    Gauge("books_dataset_rows", "Número de livros carregados")
+)
+DATASET_INFO = REGISTRY.register(
+    Gauge("books_dataset_info", "Versão do dataset carregado", ["version"])
+)
+EXECUTOR_QUEUE_DEPTH = REGISTRY.register(
+    Gauge("executor_queue_depth", "Tarefas aguardando thread livre", ["pool"])
+)
+EXECUTOR_RUNNING = REGISTRY.register(
+    Gauge("executor_running", "Tarefas em execução", ["pool"])
+)
+EXECUTOR_COMPLETED = REGISTRY.register(
+    Gauge("executor_completed_total", "Tarefas concluídas por pool", ["pool"])
+)
+PROCESS_RSS = REGISTRY.register(
+    Gauge("process_resident_memory_bytes", "Memória residente do processo (RSS)")
+)
+
+# Rota (template) da requisição corrente, propagada para os pools de threads
+_current_route: ContextVar[str] = ContextVar("metrics_route", default=UNMATCHED_ROUTE)
+
+
+def record_cache(cache: str, hit: bool):
+    """Registra um acesso a cache interno"""
+    CACHE_REQUESTS.inc(cache, "hit" if hit else "miss")
+
+
+def process_rss_bytes() -> int:
+    """Memória residente atual do processo (Linux: /proc; demais: pico via resource)"""
+    try:
+        with open("/proc/self/statm") as statm:
+            pages = int(statm.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        try:
+            import resource
+
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+        except Exception:
+            return 0
+
+
+def _collect_runtime():
+    """Atualiza gauges calculados no momento da coleta"""
+    PROCESS_RSS.set(process_rss_bytes())
+
+    for pool in all_pools():
+        stats = pool.stats()
+        EXECUTOR_QUEUE_DEPTH.set(stats["na_fila"], pool.name)
+        EXECUTOR_RUNNING.set(stats["em_execucao"], pool.name)
+        EXECUTOR_COMPLETED.set(stats["concluidas"], pool.name)
+
+    totals: Dict[str, List[float]] = {}
+    for (cache, result), value in CACHE_REQUESTS.items():
+        hits_misses = totals.setdefault(cache, [0.0, 0.0])
+        hits_misses[0 if result == "hit" else 1] += value
+    for cache, (hits, misses) in totals.items():
+        CACHE_HIT_RATIO.set(hits / (hits + misses) if hits + misses else 0.0, cache)
+
+
+REGISTRY.register_collector(_collect_runtime)
+
+
+def render_metrics() -> str:
+    """Exposição completa no formato texto do Prometheus"""
+    return REGISTRY.render()
+
+
+@contextmanager
+def stage(name: str):
+    """
+    Mede uma etapa interna do handler (métricas e plano de explain)
+
+    Args:
+        name: Nome da etapa (filter, sort, paginate, serialize...)
+
+    Yields:
+        StageInfo para detalhar a etapa no plano (sem efeito fora do explain)
+    """
+    plan = current_plan()
+    if not settings.metrics_enabled and plan is None:
+        yield NULL_STAGE
+        return
+    info = StageInfo() if plan is not None else NULL_STAGE
+    start = time.perf_counter()
+    try:
+        yield info
+    finally:
+        elapsed = time.perf_counter() - start
+        if settings.metrics_enabled:
+            STAGE_DURATION.observe(elapsed, _current_route.get(), name)
+        if plan is not None:
+            plan.add(name, elapsed, **info.details)
+
+
+def resolve_route(scope) -> str:
+    """
+    Encontra o template da rota (ex: /books/{book_id}) sem executar o handler
+
+    O resultado fica em scope["books.route"] para os demais middlewares.
+    """
+    cached = scope.get("books.route")
+    if cached is not None:
+        return cached
+    route_path = _match_route(scope)
+    scope["books.route"] = route_path
+    return route_path
+
+
+def _match_route(scope) -> str:
+    router = getattr(scope.get("app"), "router", None)
+    if router is None:
+        return UNMATCHED_ROUTE
+    for route in router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return getattr(route, "path", UNMATCHED_ROUTE)
+    return UNMATCHED_ROUTE
+
+
+class MetricsMiddleware:
+    """Middleware ASGI: contagem, latência e requisições em andamento por rota"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.metrics_enabled:
+            await self.app(scope, receive, send)
+            return
+
+        route = resolve_route(scope)
+        method = scope["method"]
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        token = _current_route.set(route)
+        REQUESTS_IN_FLIGHT.inc(route)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            REQUEST_DURATION.observe(time.perf_counter() - start, method, route)
+            REQUESTS_TOTAL.inc(method, route, str(status_code))
+            REQUESTS_IN_FLIGHT.dec(route)
+            _current_route.reset(token)
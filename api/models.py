@@ -3,7 +3,7 @@ Modelos Pydantic para validação e documentação da API
 """
 
 from pydantic import BaseModel, Field, ConfigDict
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Union
 from datetime import datetime
 
 
@@ -43,6 +43,17 @@ class Book(BaseModel):
     )
 
 
+class FacetCount(BaseModel):
+    """Contagem de livros para um valor de faceta"""
+
+    valor: Union[int, str] = Field(..., description="Valor do campo", alias="valor")
+    contagem: int = Field(
+        ..., description="Livros do resultado com o valor", alias="contagem"
+    )
+
+    model_config = ConfigDict(populate_by_name=True)
+
+
 class BookList(BaseModel):
     """Lista paginada de livros"""
 
@@ -55,6 +66,45 @@ class BookList(BaseModel):
     livros: List[Book] = Field(
         ..., description="Lista de livros da página", alias="livros"
     )
+    facetas: Optional[Dict[str, List[FacetCount]]] = Field(
+        None,
+        description="Contagens por valor sobre todo o resultado (quando pedidas)",
+        alias="facetas",
+    )
+
+    model_config = ConfigDict(populate_by_name=True)
+
+
+class SimilarBook(Book):
+    """Livro semelhante com a pontuação de similaridade"""
+
+    similaridade: float = Field(
+        ..., description="Semelhança com o livro consultado (0 a 1)"
+    )
+
+
+class SimilarBooks(BaseModel):
+    """Livros mais semelhantes a um livro"""
+
+    livro_id: int = Field(..., description="ID do livro consultado", alias="livro_id")
+    k: int = Field(..., description="Quantidade pedida", alias="k")
+    similares: List[SimilarBook] = Field(
+        ..., description="Livros em ordem decrescente de semelhança", alias="similares"
+    )
+
+    model_config = ConfigDict(populate_by_name=True)
+
+
+class TopBooks(BaseModel):
+    """Primeiros k livros por um campo"""
+
+    campo: str = Field(..., description="Campo de ordenação", alias="campo")
+    ordem: str = Field(..., description="asc ou desc", alias="ordem")
+    k: int = Field(..., description="Quantidade pedida", alias="k")
+    total: int = Field(
+        ..., description="Livros que passaram pelos filtros", alias="total"
+    )
+    livros: List[Book] = Field(..., description="Livros em ordem", alias="livros")
 
     model_config = ConfigDict(populate_by_name=True)
 
@@ -98,6 +148,64 @@ class HealthResponse(BaseModel):
     model_config = ConfigDict(populate_by_name=True)
 
 
+class AggregateGroup(BaseModel):
+    """Um grupo do agrupamento"""
+
+    chave: Dict[str, Union[int, str]] = Field(
+        ..., description="Valor de cada dimensão", alias="chave"
+    )
+    valores: Dict[str, Optional[Union[int, float]]] = Field(
+        ..., description="Valor de cada métrica", alias="valores"
+    )
+
+    model_config = ConfigDict(populate_by_name=True)
+
+
+class GroupByResult(BaseModel):
+    """Métricas agregadas por dimensões"""
+
+    dimensoes: List[str] = Field(..., description="Dimensões", alias="dimensoes")
+    metricas: List[str] = Field(..., description="Métricas", alias="metricas")
+    fonte: str = Field(
+        ..., description="cubo (pré-agregado) ou linhas (agrupamento)", alias="fonte"
+    )
+    total: int = Field(
+        ..., description="Livros que passaram pelos filtros", alias="total"
+    )
+    grupos: List[AggregateGroup] = Field(..., description="Grupos", alias="grupos")
+
+    model_config = ConfigDict(populate_by_name=True)
+
+
+class HistogramBin(BaseModel):
+    """Faixa do histograma"""
+
+    inicio: float = Field(..., description="Borda inferior", alias="inicio")
+    fim: float = Field(..., description="Borda superior", alias="fim")
+    contagem: int = Field(..., description="Livros na faixa", alias="contagem")
+
+    model_config = ConfigDict(populate_by_name=True)
+
+
+class Histogram(BaseModel):
+    """Histograma de uma coluna numérica"""
+
+    campo: str = Field(..., description="Coluna", alias="campo")
+    total: int = Field(
+        ..., description="Valores não nulos após os filtros", alias="total"
+    )
+    nulos: int = Field(..., description="Livros sem valor", alias="nulos")
+    abaixo: int = Field(
+        ..., description="Valores abaixo da primeira borda", alias="abaixo"
+    )
+    acima: int = Field(..., description="Valores acima da última borda", alias="acima")
+    faixas: List[HistogramBin] = Field(
+        ..., description="Faixas [inicio, fim); a última inclui o fim", alias="faixas"
+    )
+
+    model_config = ConfigDict(populate_by_name=True)
+
+
 class StatsResponse(BaseModel):
     """Estatísticas agregadas dos dados"""
 
@@ -129,3 +237,73 @@ class StatsResponse(BaseModel):
     )
 
     model_config = ConfigDict(populate_by_name=True)
+
+
+class SearchResult(BookList):
+    """Resultado paginado da busca textual"""
+
+    modo: str = Field(
+        "substring", description="Modo de busca (substring ou ranked)", alias="modo"
+    )
+    sugestao: Optional[str] = Field(
+        None,
+        description="Consulta corrigida sugerida (você quis dizer)",
+        alias="sugestao",
+    )
+
+
+class Suggestion(BaseModel):
+    """Livro sugerido pelo autocompletar"""
+
+    id: int = Field(..., description="ID único do livro")
+    title: str = Field(..., description="Título do livro")
+    rating: int = Field(..., description="Rating de 1 a 5 estrelas")
+    price: float = Field(..., description="Preço do livro em libras")
+    category: str = Field(..., description="Categoria/gênero do livro")
+
+
+class SuggestionList(BaseModel):
+    """Sugestões de títulos para um prefixo"""
+
+    prefixo: str = Field(..., description="Prefixo consultado", alias="prefixo")
+    total: int = Field(
+        ..., description="Total de livros que começam com o prefixo", alias="total"
+    )
+    sugestoes: List[Suggestion] = Field(
+        ..., description="Melhores livros do prefixo", alias="sugestoes"
+    )
+
+    model_config = ConfigDict(populate_by_name=True)
+
+
+class BookQuery(BaseModel):
+    """Consulta de livros com filtro avançado (corpo JSON)"""
+
+    filter: Optional[Dict[str, Any]] = Field(
+        None,
+        description="Filtro {campo: valor | [valores] | {gte, gt, lte, lt}}",
+    )
+    page: int = Field(1, ge=1, description="Número da página")
+    per_page: int = Field(20, ge=1, le=100, description="Livros por página")
+    sort: Optional[str] = Field(None, description="Campo para ordenação")
+    order: str = Field("asc", pattern="^(asc|desc)$", description="asc ou desc")
+    facets: Optional[List[str]] = Field(
+        None, description="Facetas (category, rating, price_bin)"
+    )
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "filter": {
+                    "category": ["Poetry", "Fiction"],
+                    "rating": {"gte": 4},
+                    "availability_copies": {"gte": 5},
+                    "in_stock": True,
+                    "scraped_at": {"gte": "2025-10-01"},
+                },
+                "sort": "price",
+                "order": "asc",
+                "per_page": 10,
+            }
+        }
+    )
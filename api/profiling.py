@@ -0,0 +1,183 @@
+"""
+Diagnóstico por requisição: plano de consulta (explain) e perfil de CPU
+
+O plano só é coletado quando há um QueryPlan ativo no contexto da
+requisição; fora disso `plan_step` não mede nada e o custo é de uma
+leitura de ContextVar.
+
+Só um perfil de CPU roda por vez no processo: a partir do Python 3.12 o
+cProfile usa sys.monitoring, que é global, e um segundo profiler ativo
+falha ao ser habilitado.
+"""
+
+import cProfile
+import io
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+class ProfilerBusy(RuntimeError):
+    """Já existe um perfil de CPU em andamento no processo"""
+
+
+# Um perfil por vez (sys.monitoring é do processo inteiro no Python 3.12+)
+_profile_lock = threading.Lock()
+
+
+class StageInfo:
+    """Detalhes de uma etapa preenchidos pelo handler (linhas, índice...)"""
+
+    __slots__ = ("details",)
+
+    def __init__(self):
+        self.details: Dict[str, Any] = {}
+
+    def set(self, **details):
+        self.details.update(details)
+
+
+class _NullStageInfo(StageInfo):
+    """StageInfo que descarta os detalhes (nenhum plano ativo)"""
+
+    def set(self, **details):
+        pass
+
+
+NULL_STAGE = _NullStageInfo()
+
+
+class QueryPlan:
+    """Etapas executadas por uma requisição, na ordem em que terminaram"""
+
+    def __init__(self):
+        self.steps: List[Dict[str, Any]] = []
+        self._start = time.perf_counter()
+
+    def add(self, name: str, seconds: float, **details):
+        step = {"etapa": name, "tempo_ms": round(seconds * 1000, 4)}
+        step.update(details)
+        self.steps.append(step)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "etapas": self.steps,
+            "tempo_total_ms": round((time.perf_counter() - self._start) * 1000, 4),
+        }
+
+
+_active_plan: ContextVar[Optional[QueryPlan]] = ContextVar(
+    "query_plan", default=None
+)
+
+
+def current_plan() -> Optional[QueryPlan]:
+    """Plano ativo na requisição corrente (ou None)"""
+    return _active_plan.get()
+
+
+@contextmanager
+def plan_step(name: str, **details):
+    """
+    Registra uma etapa no plano ativo (sem efeito se não houver plano)
+
+    Args:
+        name: Nome da etapa
+        **details: Detalhes iniciais (ex: valor do filtro)
+
+    Yields:
+        StageInfo para completar detalhes (linhas_entrada, linhas_saida, indice...)
+    """
+    plan = _active_plan.get()
+    if plan is None:
+        yield NULL_STAGE
+        return
+    info = StageInfo()
+    info.details.update(details)
+    start = time.perf_counter()
+    try:
+        yield info
+    finally:
+        plan.add(name, time.perf_counter() - start, **info.details)
+
+
+def _profile_summary(profiler: cProfile.Profile, limit: int) -> Dict[str, Any]:
+    """Resumo do perfil: funções mais caras por tempo acumulado"""
+    stats = pstats.Stats(profiler, stream=io.StringIO())
+    stats.sort_stats(pstats.SortKey.CUMULATIVE)
+
+    functions = []
+    for func in stats.fcn_list[:limit]:
+        primitive_calls, total_calls, own_time, cumulative_time, _ = stats.stats[func]
+        filename, line, name = func
+        functions.append(
+            {
+                "funcao": f"{filename}:{line}({name})",
+                "chamadas": total_calls,
+                "tempo_proprio_ms": round(own_time * 1000, 4),
+                "tempo_acumulado_ms": round(cumulative_time * 1000, 4),
+            }
+        )
+    return {
+        "total_chamadas": stats.total_calls,
+        "tempo_total_ms": round(stats.total_tt * 1000, 4),
+        "funcoes": functions,
+    }
+
+
+def run_with_diagnostics(
+    func: Callable[..., Any],
+    *args,
+    explain: bool = False,
+    profile: bool = False,
+    profile_limit: int = 25,
+    **kwargs,
+) -> Tuple[Any, Dict[str, Any]]:
+    """
+    Executa `func` coletando plano de consulta e/ou perfil de CPU
+
+    Deve ser chamada na thread que executa o trabalho. O perfil não é
+    isolado por requisição: no Python 3.12+ o cProfile observa todas as
+    threads do processo, então trabalho de requisições simultâneas pode
+    aparecer no resumo. Perfis não rodam em paralelo: se outro estiver em
+    andamento, levanta ProfilerBusy sem executar `func`.
+
+    Args:
+        func: Função síncrona do handler
+        explain: Coletar plano de consulta
+        profile: Coletar perfil de CPU
+        profile_limit: Número de funções no resumo do perfil
+
+    Returns:
+        Tupla (resultado de func, diagnóstico)
+
+    Raises:
+        ProfilerBusy: profile=True com outro perfil em andamento
+    """
+    if profile and not _profile_lock.acquire(blocking=False):
+        raise ProfilerBusy("Já existe um perfil de CPU em andamento")
+    plan = QueryPlan() if explain else None
+    token = _active_plan.set(plan)
+    profiler = cProfile.Profile() if profile else None
+    try:
+        if profiler is not None:
+            profiler.enable()
+        try:
+            result = func(*args, **kwargs)
+        finally:
+            if profiler is not None:
+                profiler.disable()
+    finally:
+        _active_plan.reset(token)
+        if profile:
+            _profile_lock.release()
+
+    diagnostics: Dict[str, Any] = {}
+    if plan is not None:
+        diagnostics["plano"] = plan.to_dict()
+    if profiler is not None:
+        diagnostics["perfil"] = _profile_summary(profiler, profile_limit)
+    return result, diagnostics
@@ -0,0 +1,453 @@
+"""
+Busca ranqueada: BM25 sobre índice invertido + índice de trigramas
+
+O índice é construído uma vez por versão do dataset (vetorizado com
+pandas/numpy) e guardado em formato CSR:
+
+- termo -> (livros, frequência) para título e descrição
+- trigrama -> termos do vocabulário, usado para corrigir termos com erro
+  de digitação ("himalya" -> "himalayas") e sugerir "você quis dizer"
+
+O autocompletar (PrefixIndex) usa um array ordenado de títulos
+normalizados: o intervalo que começa com o prefixo é encontrado por busca
+binária e os melhores livros do intervalo por seleção parcial.
+"""
+
+import bisect
+import re
+import unicodedata
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+TOKEN_PATTERN = r"[a-z0-9]+"
+_TOKEN_RE = re.compile(TOKEN_PATTERN)
+
+# Parâmetros BM25 e peso de cada campo na pontuação final
+BM25_K1 = 1.2
+BM25_B = 0.75
+FIELD_WEIGHTS = {"title": 2.0, "description": 1.0}
+
+# Correção por trigramas
+MIN_FUZZY_LENGTH = 4
+MIN_SIMILARITY = 0.3
+
+# Autocompletar: máximo de sugestões, prefixos curtos pré-calculados e
+# artigos iniciais ignorados ("the hobbit" também casa com "hob")
+SUGGEST_MAX_K = 20
+PRECOMPUTED_PREFIX_LENGTH = 2
+LEADING_ARTICLES = ("the ", "a ", "an ")
+
+
+def normalize_text(text: str) -> str:
+    """Minúsculas e sem acentos"""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return decomposed.encode("ascii", "ignore").decode("ascii")
+
+
+def tokenize(text: str) -> List[str]:
+    """Tokeniza texto da mesma forma que o índice"""
+    return _TOKEN_RE.findall(normalize_text(text))
+
+
+def _normalize_series(texts: pd.Series) -> pd.Series:
+    """Versão vetorizada de normalize_text"""
+    return (
+        texts.fillna("")
+        .astype(str)
+        .str.lower()
+        .str.normalize("NFKD")
+        .str.encode("ascii", "ignore")
+        .str.decode("ascii")
+    )
+
+
+def normalize_title(text: str) -> str:
+    """Título normalizado para prefixos (pontuação vira espaço)"""
+    return " ".join(tokenize(text))
+
+
+def _normalize_titles(titles: pd.Series) -> pd.Series:
+    """Versão vetorizada de normalize_title"""
+    return (
+        _normalize_series(titles)
+        .str.replace(r"[^a-z0-9]+", " ", regex=True)
+        .str.strip()
+    )
+
+
+def trigrams(term: str) -> List[str]:
+    """Trigramas do termo com bordas (' hi', 'him', ..., 'as ')"""
+    padded = f" {term} "
+    return [padded[i : i + 3] for i in range(len(padded) - 2)]
+
+
+@dataclass
+class FieldPostings:
+    """Postings de um campo em formato CSR (termo -> livros)"""
+
+    indptr: np.ndarray  # n_terms + 1
+    docs: np.ndarray  # posições dos livros (int32)
+    tfs: np.ndarray  # frequência do termo no livro (float32)
+    doc_lengths: np.ndarray  # tokens por livro
+    avg_length: float
+    weight: float
+
+
+class SearchIndex:
+    """Índice invertido (BM25) e de trigramas para um DataFrame de livros"""
+
+    def __init__(self, df: pd.DataFrame):
+        """
+        Constrói o índice
+
+        Args:
+            df: DataFrame com colunas 'title' e 'description'
+        """
+        self.n_docs = len(df)
+        fields = [name for name in FIELD_WEIGHTS if name in df.columns]
+
+        # Tokens de todos os campos com vocabulário compartilhado
+        exploded = []
+        for name in fields:
+            tokens = _normalize_series(df[name]).str.findall(TOKEN_PATTERN)
+            lengths = tokens.str.len().fillna(0).to_numpy(dtype=np.float32)
+            flat = tokens.explode().dropna()
+            exploded.append((name, flat, lengths))
+
+        all_tokens = (
+            pd.concat([flat for _, flat, _ in exploded])
+            if exploded
+            else pd.Series([], dtype=object)
+        )
+        codes, uniques = pd.factorize(all_tokens)
+        self.terms: np.ndarray = np.asarray(uniques, dtype=object)
+        self.vocabulary: Dict[str, int] = {
+            term: term_id for term_id, term in enumerate(self.terms)
+        }
+        n_terms = len(self.terms)
+
+        self.fields: Dict[str, FieldPostings] = {}
+        offset = 0
+        for name, flat, lengths in exploded:
+            field_codes = codes[offset : offset + len(flat)].astype(np.int64)
+            docs = flat.index.to_numpy(dtype=np.int64)
+            offset += len(flat)
+            self.fields[name] = self._build_postings(
+                field_codes, docs, lengths, n_terms, FIELD_WEIGHTS[name]
+            )
+
+        # Frequência de documento total (para desempate nas correções)
+        self.doc_freq = np.zeros(n_terms, dtype=np.int64)
+        for postings in self.fields.values():
+            self.doc_freq += np.diff(postings.indptr)
+
+        self._build_trigram_index()
+
+    def _build_postings(
+        self,
+        term_ids: np.ndarray,
+        docs: np.ndarray,
+        lengths: np.ndarray,
+        n_terms: int,
+        weight: float,
+    ) -> FieldPostings:
+        """Agrupa (termo, livro) com contagem e monta o CSR"""
+        keys = term_ids * max(self.n_docs, 1) + docs
+        unique_keys, counts = np.unique(keys, return_counts=True)
+        term_of = unique_keys // max(self.n_docs, 1)
+        indptr = np.zeros(n_terms + 1, dtype=np.int64)
+        np.cumsum(np.bincount(term_of, minlength=n_terms), out=indptr[1:])
+        nonzero = lengths[lengths > 0]
+        return FieldPostings(
+            indptr=indptr,
+            docs=(unique_keys % max(self.n_docs, 1)).astype(np.int32),
+            tfs=counts.astype(np.float32),
+            doc_lengths=lengths,
+            avg_length=float(nonzero.mean()) if len(nonzero) else 1.0,
+            weight=weight,
+        )
+
+    def _build_trigram_index(self):
+        """Trigrama -> termos do vocabulário (CSR) e nº de trigramas por termo"""
+        gram_ids: Dict[str, int] = {}
+        gram_of: List[int] = []
+        term_of: List[int] = []
+        self.term_gram_counts = np.zeros(len(self.terms), dtype=np.int32)
+        for term_id, term in enumerate(self.terms):
+            grams = set(trigrams(term))
+            self.term_gram_counts[term_id] = len(grams)
+            for gram in grams:
+                gram_of.append(gram_ids.setdefault(gram, len(gram_ids)))
+                term_of.append(term_id)
+
+        gram_of_arr = np.asarray(gram_of, dtype=np.int64)
+        order = np.argsort(gram_of_arr, kind="stable")
+        self.gram_ids = gram_ids
+        self.gram_terms = np.asarray(term_of, dtype=np.int32)[order]
+        self.gram_indptr = np.zeros(len(gram_ids) + 1, dtype=np.int64)
+        np.cumsum(
+            np.bincount(gram_of_arr, minlength=len(gram_ids)),
+            out=self.gram_indptr[1:],
+        )
+
+    def correct(self, term: str) -> Optional[Tuple[str, float]]:
+        """
+        Termo do vocabulário mais parecido (similaridade de Jaccard de trigramas)
+
+        Args:
+            term: Termo normalizado ausente do vocabulário
+
+        Returns:
+            (termo corrigido, similaridade) ou None se nada for parecido
+        """
+        grams = {gram for gram in trigrams(term) if gram in self.gram_ids}
+        if len(term) < MIN_FUZZY_LENGTH or not grams:
+            return None
+
+        slices = []
+        for gram in grams:
+            gram_id = self.gram_ids[gram]
+            start, end = self.gram_indptr[gram_id], self.gram_indptr[gram_id + 1]
+            slices.append(self.gram_terms[start:end])
+        candidates = np.concatenate(slices)
+        term_ids, shared = np.unique(candidates, return_counts=True)
+        query_grams = len(set(trigrams(term)))
+        similarity = shared / (
+            query_grams + self.term_gram_counts[term_ids] - shared
+        ).astype(np.float64)
+
+        # Melhor similaridade; empate decidido pelo termo mais frequente
+        best = np.lexsort((-self.doc_freq[term_ids], -similarity))[0]
+        if similarity[best] < MIN_SIMILARITY:
+            return None
+        return str(self.terms[term_ids[best]]), float(similarity[best])
+
+    def resolve_terms(self, query: str) -> Tuple[List[int], Dict[str, str]]:
+        """
+        Converte a consulta em ids de termos, corrigindo termos desconhecidos
+
+        Returns:
+            (ids dos termos, correções aplicadas {original: corrigido})
+        """
+        term_ids: List[int] = []
+        corrections: Dict[str, str] = {}
+        for token in dict.fromkeys(tokenize(query)):
+            term_id = self.vocabulary.get(token)
+            if term_id is None:
+                corrected = self.correct(token)
+                if corrected is None:
+                    continue
+                corrections[token] = corrected[0]
+                term_id = self.vocabulary[corrected[0]]
+            term_ids.append(term_id)
+        return term_ids, corrections
+
+    def suggest(
+        self, query: str, corrections: Optional[Dict[str, str]] = None
+    ) -> Optional[str]:
+        """
+        Consulta corrigida ("você quis dizer")
+
+        Args:
+            query: Consulta original
+            corrections: Correções já calculadas por resolve_terms/search
+
+        Returns:
+            Consulta com os termos corrigidos, ou None se não houver correção
+        """
+        if corrections is None:
+            _, corrections = self.resolve_terms(query)
+        if not corrections:
+            return None
+        return " ".join(corrections.get(token, token) for token in tokenize(query))
+
+    def score(self, term_ids: List[int]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Pontuação BM25 (soma ponderada dos campos) dos livros que contêm algum termo
+
+        Returns:
+            (posições dos livros, pontuações) sem ordem definida
+        """
+        doc_parts: List[np.ndarray] = []
+        score_parts: List[np.ndarray] = []
+        for postings in self.fields.values():
+            for term_id in term_ids:
+                start, end = postings.indptr[term_id], postings.indptr[term_id + 1]
+                if start == end:
+                    continue
+                docs = postings.docs[start:end]
+                tfs = postings.tfs[start:end]
+                df_t = end - start
+                idf = np.log(1.0 + (self.n_docs - df_t + 0.5) / (df_t + 0.5))
+                norm = BM25_K1 * (
+                    1.0
+                    - BM25_B
+                    + BM25_B * postings.doc_lengths[docs] / postings.avg_length
+                )
+                doc_parts.append(docs)
+                score_parts.append(
+                    postings.weight * idf * tfs * (BM25_K1 + 1.0) / (tfs + norm)
+                )
+
+        if not doc_parts:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+
+        docs = np.concatenate(doc_parts)
+        scores = np.concatenate(score_parts).astype(np.float64)
+        # Muitos postings: acumulação densa; poucos: agrupamento esparso
+        if len(docs) * 8 > self.n_docs:
+            dense = np.bincount(docs, weights=scores, minlength=self.n_docs)
+            matched = np.flatnonzero(dense)
+            return matched, dense[matched]
+        unique_docs, inverse = np.unique(docs, return_inverse=True)
+        return unique_docs, np.bincount(inverse, weights=scores)
+
+    def search(
+        self, query: str, limit: int
+    ) -> Tuple[np.ndarray, np.ndarray, int, Dict[str, str]]:
+        """
+        Busca ranqueada
+
+        Args:
+            query: Texto da consulta
+            limit: Quantidade de resultados ordenados necessários (offset + página)
+
+        Returns:
+            (posições ordenadas por relevância, pontuações, total de resultados,
+            correções aplicadas)
+        """
+        term_ids, corrections = self.resolve_terms(query)
+        docs, scores = self.score(term_ids)
+        positions, top_scores = self.top_k(docs, scores, limit)
+        return positions, top_scores, len(docs), corrections
+
+    @staticmethod
+    def top_k(
+        docs: np.ndarray, scores: np.ndarray, limit: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Melhores `limit` livros por pontuação, em ordem decrescente
+
+        Args:
+            docs: Posições dos livros (saída de score)
+            scores: Pontuações correspondentes
+            limit: Quantidade de resultados
+
+        Returns:
+            (posições ordenadas por relevância, pontuações)
+        """
+        total = len(docs)
+        if total == 0 or limit <= 0:
+            return docs[:0], scores[:0]
+
+        # Seleção parcial dos `limit` melhores e ordenação só deles
+        if limit < total:
+            top = np.argpartition(-scores, limit - 1)[:limit]
+        else:
+            top = np.arange(total)
+        # Empate: posição no catálogo (resultado determinístico)
+        order = top[np.lexsort((docs[top], -scores[top]))]
+        return docs[order], scores[order]
+
+
+def build_search_index(df: pd.DataFrame) -> SearchIndex:
+    """Builder para BooksDataset.derived"""
+    return SearchIndex(df)
+
+
+class PrefixIndex:
+    """Títulos normalizados ordenados para autocompletar por prefixo"""
+
+    def __init__(self, df: pd.DataFrame):
+        """
+        Constrói o índice
+
+        Args:
+            df: DataFrame com colunas 'title' e 'rating'
+        """
+        titles = _normalize_titles(df["title"]).reset_index(drop=True)
+        positions = np.arange(len(titles), dtype=np.int64)
+
+        # Chaves: título completo e título sem artigo inicial
+        key_parts = [titles]
+        position_parts = [positions]
+        for article in LEADING_ARTICLES:
+            mask = titles.str.startswith(article).to_numpy()
+            key_parts.append(titles[mask].str[len(article) :])
+            position_parts.append(positions[mask])
+        keys = pd.concat(key_parts, ignore_index=True).to_numpy(dtype=object)
+        entry_positions = np.concatenate(position_parts)
+
+        order = np.argsort(keys, kind="stable")
+        self.keys: List[str] = keys[order].tolist()
+
+        # Cada livro tem no máximo duas chaves; para a chave sem artigo guarda
+        # a posição (no array ordenado) da chave do título completo
+        slot_of_entry = np.empty(len(order), dtype=np.int64)
+        slot_of_entry[order] = np.arange(len(order))
+        full_slot = np.full(len(order), -1, dtype=np.int64)
+        full_slot[len(titles) :] = slot_of_entry[entry_positions[len(titles) :]]
+        self.full_slot = full_slot[order]
+
+        # Prioridade do livro: maior avaliação, depois título (ordem alfabética)
+        ratings = df["rating"].fillna(0).to_numpy(dtype=np.float64)
+        self.book_by_rank = np.lexsort((titles.to_numpy(dtype=object), -ratings))
+        book_rank = np.empty(len(titles), dtype=np.int64)
+        book_rank[self.book_by_rank] = np.arange(len(titles))
+        self.entry_ranks = book_rank[entry_positions[order]]
+
+        # Prefixos curtos casam com muitos títulos: resposta pronta
+        self._precomputed: Dict[str, Tuple[np.ndarray, int]] = {}
+        for length in range(1, PRECOMPUTED_PREFIX_LENGTH + 1):
+            for prefix in {key[:length] for key in self.keys if len(key) >= length}:
+                self._precomputed[prefix] = self._top_ranks(prefix, SUGGEST_MAX_K)
+
+    def _range(self, prefix: str) -> Tuple[int, int]:
+        """Intervalo [início, fim) das chaves que começam com o prefixo"""
+        lo = bisect.bisect_left(self.keys, prefix)
+        hi = bisect.bisect_left(self.keys, prefix + "\uffff", lo)
+        return lo, hi
+
+    def _top_ranks(self, prefix: str, k: int) -> Tuple[np.ndarray, int]:
+        """Prioridades dos k melhores livros do prefixo e total de livros"""
+        lo, hi = self._range(prefix)
+        ranks = self.entry_ranks[lo:hi]
+        # Livro com as duas chaves no intervalo conta uma vez só
+        full_slot = self.full_slot[lo:hi]
+        total = (hi - lo) - int(np.count_nonzero((full_slot >= lo) & (full_slot < hi)))
+
+        # As 2k menores prioridades contêm ao menos k livros distintos
+        if len(ranks) > 2 * k:
+            ranks = ranks[np.argpartition(ranks, 2 * k - 1)[: 2 * k]]
+        return np.unique(ranks)[:k], total
+
+    def suggest(self, prefix: str, k: int = 10) -> Tuple[np.ndarray, int]:
+        """
+        Livros cujo título (ou título sem artigo) começa com o prefixo
+
+        Args:
+            prefix: Texto digitado
+            k: Quantidade de sugestões (até SUGGEST_MAX_K)
+
+        Returns:
+            (posições dos livros em ordem de prioridade, total de livros que casam)
+        """
+        normalized = normalize_title(prefix)
+        if not normalized or k <= 0:
+            return np.empty(0, dtype=np.int64), 0
+
+        k = min(k, SUGGEST_MAX_K)
+        cached = self._precomputed.get(normalized)
+        if cached is not None:
+            ranks, total = cached
+        else:
+            ranks, total = self._top_ranks(normalized, k)
+        return self.book_by_rank[ranks[:k]], total
+
+
+def build_prefix_index(df: pd.DataFrame) -> PrefixIndex:
+    """Builder para BooksDataset.derived"""
+    return PrefixIndex(df)
@@ -0,0 +1,186 @@
+"""
+Livros semelhantes: TF-IDF de título + descrição, categoria e preço
+
+A matriz TF-IDF (livros x termos, normalizada por linha) é construída uma
+vez por versão do dataset, guardada em CSR (por livro) e CSC (por termo)
+com arrays numpy. A similaridade de um livro com todos os outros é um
+produto matriz-vetor esparso: só os termos do livro consultado são
+percorridos.
+
+A pontuação final é o produto interno de vetores de features unitários:
+
+- TF-IDF do texto (peso TEXT_WEIGHT)
+- categoria one-hot (peso CATEGORY_WEIGHT)
+- preço como ângulo em [0, pi/2] pela escala log (peso PRICE_WEIGHT)
+
+ou seja, TEXT_WEIGHT * cosseno + CATEGORY_WEIGHT * mesma categoria +
+PRICE_WEIGHT * cos(diferença de ângulo do preço).
+"""
+
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from api.search import TOKEN_PATTERN, _normalize_series
+from api.utils import select_top
+
+# Peso de cada componente na pontuação final (soma 1: vetor unitário)
+TEXT_WEIGHT = 0.7
+CATEGORY_WEIGHT = 0.2
+PRICE_WEIGHT = 0.1
+
+# Termos no título contam como várias ocorrências na descrição
+TITLE_TERM_WEIGHT = 3.0
+
+# Termos presentes em mais desta fração dos livros não discriminam
+MAX_DOC_FREQ = 0.5
+
+STOPWORDS = frozenset("""
+    a an and are as at be but by for from has have he her his i in is it its
+    more my not of on or our she so than that the their them there they this
+    to was we were what when which who will with you your
+    """.split())
+
+
+def _ranges(starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """Concatena arange(start, end) para cada par (vetorizado)"""
+    lengths = ends - starts
+    total = int(lengths.sum())
+    if total == 0:
+        return np.empty(0, dtype=np.int64)
+    offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+    return offsets + np.arange(total)
+
+
+class SimilarityIndex:
+    """Matriz TF-IDF esparsa + features de categoria e preço"""
+
+    def __init__(self, df: pd.DataFrame):
+        """
+        Constrói o índice
+
+        Args:
+            df: DataFrame com id, title, description, category e price
+        """
+        self.n_docs = n = len(df)
+        self.id_positions = pd.Index(df["id"])
+
+        # (termo, livro, peso) de título e descrição, sem stopwords
+        parts = []
+        for field, weight in (("title", TITLE_TERM_WEIGHT), ("description", 1.0)):
+            if field not in df.columns:
+                continue
+            tokens = (
+                _normalize_series(df[field])
+                .reset_index(drop=True)
+                .str.findall(TOKEN_PATTERN)
+                .explode()
+                .dropna()
+            )
+            tokens = tokens[(tokens.str.len() > 1) & ~tokens.isin(STOPWORDS)]
+            parts.append((tokens, weight))
+        tokens = (
+            pd.concat([t for t, _ in parts]) if parts else pd.Series([], dtype=object)
+        )
+        weights = np.concatenate(
+            [np.full(len(t), w, dtype=np.float64) for t, w in parts] or [np.empty(0)]
+        )
+        codes, vocabulary = pd.factorize(tokens)
+        docs = tokens.index.to_numpy(dtype=np.int64)
+
+        # Soma dos pesos por (termo, livro); chaves ordenadas = ordem CSC
+        keys, inverse = np.unique(codes * max(n, 1) + docs, return_inverse=True)
+        counts = np.bincount(inverse, weights=weights)
+        term_of = keys // max(n, 1)
+        doc_of = keys % max(n, 1)
+
+        doc_freq = np.bincount(term_of, minlength=len(vocabulary))
+        keep = doc_freq[term_of] <= max(MAX_DOC_FREQ * n, 1)
+        term_of, doc_of, counts = term_of[keep], doc_of[keep], counts[keep]
+
+        idf = np.log((1.0 + n) / (1.0 + doc_freq)) + 1.0
+        values = (1.0 + np.log(counts)) * idf[term_of]
+        norms = np.sqrt(np.bincount(doc_of, weights=values**2, minlength=n))
+        values = (values / np.where(norms > 0, norms, 1.0)[doc_of]).astype(np.float32)
+
+        # CSC: termo -> (livros, pesos)
+        n_terms = len(vocabulary)
+        self.terms = np.asarray(vocabulary, dtype=object)
+        self.col_ptr = np.zeros(n_terms + 1, dtype=np.int64)
+        np.cumsum(np.bincount(term_of, minlength=n_terms), out=self.col_ptr[1:])
+        self.col_docs = doc_of.astype(np.int32)
+        self.col_values = values
+
+        # CSR: livro -> (termos, pesos)
+        order = np.argsort(doc_of, kind="stable")
+        self.row_ptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(doc_of, minlength=n), out=self.row_ptr[1:])
+        self.row_terms = term_of[order].astype(np.int32)
+        self.row_values = values[order]
+
+        # Features densas
+        self.category_codes = pd.factorize(df["category"])[0].astype(np.int32)
+        log_prices = np.log(np.clip(df["price"].to_numpy(dtype=np.float64), 0.01, None))
+        spread = np.nanmax(log_prices) - np.nanmin(log_prices) if n else 0.0
+        self.price_angles = np.nan_to_num(
+            (log_prices - np.nanmin(log_prices)) / (spread or 1.0) * (np.pi / 2)
+            if n
+            else log_prices
+        )
+
+    # Texto
+
+    def _row(self, position: int) -> Tuple[np.ndarray, np.ndarray]:
+        start, end = self.row_ptr[position], self.row_ptr[position + 1]
+        return self.row_terms[start:end], self.row_values[start:end]
+
+    def text_similarity(self, position: int) -> np.ndarray:
+        """Cosseno TF-IDF do livro com todos os livros (produto esparso)"""
+        terms, weights = self._row(position)
+        starts, ends = self.col_ptr[terms], self.col_ptr[terms + 1]
+        entries = _ranges(starts, ends)
+        products = self.col_values[entries] * np.repeat(weights, ends - starts)
+        return np.bincount(
+            self.col_docs[entries], weights=products, minlength=self.n_docs
+        )
+
+    # Pontuação combinada
+
+    def _combine(self, position: int, text: np.ndarray) -> np.ndarray:
+        """Pontuação final de todos os livros em relação ao da posição"""
+        same_category = self.category_codes == self.category_codes[position]
+        price = np.cos(self.price_angles - self.price_angles[position])
+        return (
+            TEXT_WEIGHT * text + CATEGORY_WEIGHT * same_category + PRICE_WEIGHT * price
+        )
+
+    def similar(self, position: int, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Livros mais semelhantes ao da posição dada
+
+        Args:
+            position: Posição do livro consultado
+            k: Quantidade de resultados
+
+        Returns:
+            (posições, pontuações) em ordem decrescente de semelhança, sem o
+            próprio livro (no máximo n - 1 resultados)
+        """
+        scores = self._combine(position, self.text_similarity(position))
+        candidates = np.delete(np.arange(len(scores)), position)
+        top = candidates[select_top(scores[candidates], k, descending=True)]
+        return top, scores[top]
+
+    def position_of(self, book_id: int) -> Optional[int]:
+        """Posição do livro pelo id (None se não existir)"""
+        try:
+            position = self.id_positions.get_loc(book_id)
+        except KeyError:
+            return None
+        return position if isinstance(position, (int, np.integer)) else None
+
+
+def build_similarity_index(df: pd.DataFrame) -> SimilarityIndex:
+    """Builder para BooksDataset.derived"""
+    return SimilarityIndex(df)
@@ -2,11 +2,14 @@
 Funções utilitárias para a API
 """
 
+import numpy as np
 import pandas as pd
 from pathlib import Path
 from typing import Optional
 import logging
 
+from api.profiling import plan_step
+
 logger = logging.getLogger(__name__)
 
 
@@ -111,14 +114,52 @@ def sort_books(df: pd.DataFrame, sort_by: str, order: str = "asc") -> pd.DataFra
         order: 'asc' ou 'desc'
 
     Returns:
-        DataFrame ordenado
+        DataFrame ordenado (estável: empates mantêm a ordem original, como
+        em select_top)
     """
     if sort_by not in df.columns:
         logger.warning(f"Campo '{sort_by}' não encontrado. Ignorando ordenação.")
         return df
 
     ascending = order.lower() == "asc"
-    return df.sort_values(by=sort_by, ascending=ascending)
+    return df.sort_values(by=sort_by, ascending=ascending, kind="stable")
+
+
+def select_top(values: np.ndarray, k: int, descending: bool = False) -> np.ndarray:
+    """
+    Posições dos k menores (ou maiores) valores, em ordem, sem ordenar tudo
+
+    Usa seleção parcial (np.partition, O(n)) e ordena só os k escolhidos.
+    Empates são decididos pela posição, como numa ordenação estável.
+
+    Args:
+        values: Valores numéricos
+        k: Quantidade de posições
+        descending: True para os maiores valores
+
+    Returns:
+        Posições (índices de `values`) dos k primeiros
+    """
+    n = len(values)
+    if k <= 0 or n == 0:
+        return np.empty(0, dtype=np.int64)
+
+    keys = -values if descending else values
+    missing = np.isnan(keys)
+    if missing.any():
+        # Valores nulos ficam por último, como em sort_values
+        present = np.flatnonzero(~missing)
+        top = present[select_top(values[present], k, descending)]
+        return np.concatenate([top, np.flatnonzero(missing)[: k - len(top)]])
+
+    if k < n:
+        kth = np.partition(keys, k - 1)[k - 1]
+        better = np.flatnonzero(keys < kth)
+        ties = np.flatnonzero(keys == kth)[: k - len(better)]
+        chosen = np.concatenate([better, ties])
+    else:
+        chosen = np.arange(n)
+    return chosen[np.lexsort((chosen, keys[chosen]))]
 
 
 def search_books(df: pd.DataFrame, query: str) -> pd.DataFrame:
@@ -132,11 +173,27 @@ def search_books(df: pd.DataFrame, query: str) -> pd.DataFrame:
     Returns:
         DataFrame com resultados da busca
     """
+    with plan_step("busca_substring", termo=query, indice="varredura") as st:
+        result = df[search_mask(df, query)]
+        st.set(linhas_entrada=len(df), linhas_saida=len(result))
+
+    return result
+
+
+def search_mask(df: pd.DataFrame, query: str) -> pd.Series:
+    """
+    Máscara dos livros com o termo no título ou descrição
+
+    Args:
+        df: DataFrame original
+        query: Termo de busca
+
+    Returns:
+        Series booleana alinhada ao DataFrame
+    """
     query_lower = query.lower()
 
     # Busca em título e descrição
-    mask = df["title"].str.lower().str.contains(query_lower, na=False) | df[
+    return df["title"].str.lower().str.contains(query_lower, na=False) | df[
         "description"
     ].str.lower().str.contains(query_lower, na=False)
-
-    return df[mask]
@@ -0,0 +1,168 @@
+"""
+Benchmark dos motores de crawl contra um site local
+
+Serve um ResponseCache (gravado com `scraper.py --record` ou gerado a
+partir de data/books.csv) num FixtureServer com latência e erros
+injetados e mede páginas/s do scraper sequencial e do AsyncCrawler pela
+pilha de rede real, sem acessar books.toscrape.com. Também confere que os
+dois motores extraem os mesmos registros.
+
+Uso:
+    python -m scripts.bench_crawl [--latency 0.02] [--error-rate 0.01]
+    python -m scripts.bench_crawl --cache data/http_cache --engines async
+    python -m scripts.bench_crawl --capacity 4 --per-host 12 --adaptive
+"""
+
+import argparse
+import logging
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from scripts.crawler.engine import AsyncCrawler
+from scripts.crawler.replay import FixtureServer, ResponseCache, build_cache
+from scripts.crawler.site import generate_site, load_books
+from scripts.crawler.state import Fetched
+from scripts.scraper import BooksToScrapeScraper
+
+ENGINES = ("sequential", "async")
+
+
+def _without_timestamps(books: List[Dict]) -> List[Dict]:
+    return [{k: v for k, v in book.items() if k != "scraped_at"} for book in books]
+
+
+def generated_cache(
+    csv_path: str, root: str, categories: Optional[int] = None
+) -> ResponseCache:
+    """Site gerado do CSV; com `categories`, só as primeiras categorias"""
+    if categories is None:
+        return build_cache(csv_path, root)
+    books = load_books(csv_path)
+    keep = list(dict.fromkeys(book["category"] for book in books))[:categories]
+    cache = ResponseCache(root)
+    for path, content in generate_site(
+        [book for book in books if book["category"] in keep]
+    ).items():
+        cache.store(path, Fetched(200, content))
+    cache.save()
+    return cache
+
+
+def run_engine(engine: str, server: FixtureServer, args) -> Dict:
+    """Um crawl completo contra o servidor; páginas/s e registros"""
+    server.reset()
+    start = time.perf_counter()
+    if engine == "async":
+        crawler = AsyncCrawler(
+            base_url=server.base_url,
+            rate=args.rate,
+            per_host=args.per_host,
+            max_connections=args.per_host,
+            max_retries=args.max_retries,
+            backoff_factor=args.backoff,
+            parse_workers=args.parse_workers,
+            adaptive=args.adaptive,
+        )
+        books = crawler.run()
+    else:
+        scraper = BooksToScrapeScraper(
+            delay=0,
+            max_retries=args.max_retries,
+            base_url=server.base_url,
+            adaptive=args.adaptive,
+            max_rate=args.max_rate,
+        )
+        books = scraper.scrape_all_books()
+    elapsed = time.perf_counter() - start
+    pages = sum(server.requests.values())
+    return {
+        "engine": engine,
+        "books": books,
+        "pages": pages,
+        "errors": server.errors,
+        "elapsed": elapsed,
+        "pages_per_s": pages / elapsed if elapsed else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--cache",
+        default=None,
+        help="Cache gravado (padrão: site gerado do CSV num diretório temporário)",
+    )
+    parser.add_argument("--csv", default="data/books.csv")
+    parser.add_argument(
+        "--categories", type=int, default=None, help="Só as N primeiras categorias"
+    )
+    parser.add_argument("--engines", nargs="+", choices=ENGINES, default=ENGINES)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--capacity",
+        type=int,
+        default=None,
+        help="Requisições simultâneas que o servidor atende (o resto recebe 503)",
+    )
+    parser.add_argument("--per-host", type=int, default=8)
+    parser.add_argument("--rate", type=float, default=0.0, help="0 = sem limite")
+    parser.add_argument("--max-retries", type=int, default=3)
+    parser.add_argument("--backoff", type=float, default=0.0)
+    parser.add_argument("--parse-workers", type=int, default=0)
+    parser.add_argument(
+        "--adaptive", action="store_true", help="Ritmo AIMD nos dois motores"
+    )
+    parser.add_argument(
+        "--max-rate", type=float, default=100.0, help="Teto do AIMD (sequential)"
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    if args.cache and (Path(args.cache) / "index.json").exists():
+        cache = ResponseCache(args.cache)
+    else:
+        root = args.cache or tempfile.mkdtemp(prefix="http_cache_")
+        cache = generated_cache(args.csv, root, args.categories)
+    print(f"Cache: {cache.root} ({cache.stats()})")
+    print(
+        f"Servidor: latência {args.latency * 1e3:.0f} ms"
+        f" (+ até {args.jitter * 1e3:.0f} ms), erros {args.error_rate:.1%}\n"
+    )
+
+    results = []
+    with FixtureServer(
+        cache,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        retry_after=args.retry_after,
+        seed=args.seed,
+        capacity=args.capacity,
+    ) as server:
+        for engine in args.engines:
+            result = run_engine(engine, server, args)
+            results.append(result)
+            print(
+                f"  {engine:<11} {result['pages']:5d} páginas"
+                f" ({result['errors']} erros) em {result['elapsed']:6.2f}s"
+                f" | {result['pages_per_s']:7.1f} páginas/s"
+                f" | {len(result['books'])} livros"
+            )
+
+    if len(results) > 1:
+        reference = _without_timestamps(results[0]["books"])
+        same = all(_without_timestamps(r["books"]) == reference for r in results)
+        speedup = results[-1]["pages_per_s"] / max(results[0]["pages_per_s"], 1e-9)
+        print(f"\nMesmos registros: {'sim' if same else 'não'}")
+        print(f"{results[-1]['engine']} / {results[0]['engine']}: {speedup:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
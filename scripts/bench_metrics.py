@@ -0,0 +1,91 @@
+"""
+Benchmark do custo da instrumentação de métricas da API
+
+Mede:
+1. Micro: custo de Histogram.observe e do context manager stage()
+2. Ponta a ponta: latência por requisição (TestClient) com métricas ligadas x desligadas
+
+Uso:
+    python -m scripts.bench_metrics [--requests 2000]
+"""
+
+import argparse
+import statistics
+import time
+
+from fastapi.testclient import TestClient
+
+from api.config import settings
+from api.main import app
+from api.metrics import Histogram, stage
+
+
+def _per_call_us(func, iterations: int) -> float:
+    """Tempo médio por chamada em microssegundos"""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def bench_micro(iterations: int = 200_000) -> dict:
+    """Custo isolado das primitivas de instrumentação"""
+    histogram = Histogram("bench_seconds", "Benchmark", ["route"])
+
+    def observe():
+        histogram.observe(0.003, "/books")
+
+    def timed_stage():
+        with stage("bench"):
+            pass
+
+    def empty():
+        pass
+
+    baseline = _per_call_us(empty, iterations)
+    return {
+        "histogram_observe_us": _per_call_us(observe, iterations) - baseline,
+        "stage_us": _per_call_us(timed_stage, iterations) - baseline,
+    }
+
+
+def bench_requests(path: str, requests: int, enabled: bool) -> float:
+    """Mediana de latência (µs) de uma rota via TestClient"""
+    settings.metrics_enabled = enabled
+    client = TestClient(app)
+    for _ in range(50):  # aquecimento
+        client.get(path)
+    samples = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        client.get(path)
+        samples.append((time.perf_counter() - start) * 1e6)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    original = settings.metrics_enabled
+    try:
+        micro = bench_micro()
+        print("Primitivas:")
+        for name, value in micro.items():
+            print(f"  {name:<24} {value:8.2f} µs")
+
+        print(f"\nPonta a ponta (mediana de {args.requests} requisições):")
+        for path in ["/health", "/books?per_page=20"]:
+            off = bench_requests(path, args.requests, enabled=False)
+            on = bench_requests(path, args.requests, enabled=True)
+            print(
+                f"  {path:<24} sem métricas {off:8.1f} µs | com métricas {on:8.1f} µs"
+                f" | overhead {on - off:+7.1f} µs ({(on - off) / off * 100:+.1f}%)"
+            )
+    finally:
+        settings.metrics_enabled = original
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Benchmark do parse das páginas de Books to Scrape
+
+Mede o tempo de parse_page por página salva em tests/fixtures/books_toscrape
+para cada backend instalado (lxml, html.parser), com a árvore inteira e
+com o parse parcial (SoupStrainer), e confere que todas as combinações
+produzem o mesmo resultado.
+
+Uso:
+    python -m scripts.bench_parse [--repeat 50]
+"""
+
+import argparse
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from scripts.crawler.parsing import (
+    BASE_URL,
+    CATEGORY,
+    DETAIL,
+    INDEX,
+    LISTING,
+    available_backends,
+    parse_page,
+)
+
+FIXTURES_DIR = Path(__file__).resolve().parent.parent / "tests/fixtures/books_toscrape"
+
+CATEGORY_URL = f"{BASE_URL}/catalogue/category/books/mystery_3"
+
+# Arquivo -> (tipo da página, URL de origem)
+FIXTURES = {
+    "index.html": (INDEX, BASE_URL),
+    "category.html": (CATEGORY, f"{CATEGORY_URL}/index.html"),
+    "category-page-2.html": (LISTING, f"{CATEGORY_URL}/page-2.html"),
+    "book-1.html": (DETAIL, f"{BASE_URL}/catalogue/book-1/index.html"),
+    "book-2.html": (DETAIL, f"{BASE_URL}/catalogue/book-2/index.html"),
+    "book-3.html": (DETAIL, f"{BASE_URL}/catalogue/book-3/index.html"),
+}
+
+
+def load_fixtures() -> List[Tuple[str, str, str, bytes]]:
+    """(arquivo, tipo, URL, HTML) de cada página salva"""
+    return [
+        (name, kind, url, (FIXTURES_DIR / name).read_bytes())
+        for name, (kind, url) in FIXTURES.items()
+    ]
+
+
+def bench_parse(backend: str, partial: bool, repeat: int) -> Dict[str, float]:
+    """Tempo médio de parse_page por página (ms)"""
+    timings = {}
+    for name, kind, url, content in load_fixtures():
+        start = time.perf_counter()
+        for _ in range(repeat):
+            parse_page(kind, content, url, backend=backend, partial=partial)
+        timings[name] = (time.perf_counter() - start) / repeat * 1e3
+    return timings
+
+
+def check_outputs() -> List[str]:
+    """Combinações (backend, parcial) cujo resultado difere do html.parser"""
+    differences = []
+    for name, kind, url, content in load_fixtures():
+        reference = parse_page(kind, content, url, backend="html.parser", partial=False)
+        for backend in available_backends():
+            for partial in (False, True):
+                parsed = parse_page(
+                    kind, content, url, backend=backend, partial=partial
+                )
+                if parsed != reference:
+                    differences.append(f"{name} ({backend}, parcial={partial})")
+    return differences
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    differences = check_outputs()
+    print("Resultados idênticos entre backends:", "sim" if not differences else "não")
+    for difference in differences:
+        print(f"  difere: {difference}")
+
+    baseline = None
+    print(f"\nTempo por página (média de {args.repeat} execuções):")
+    for backend in available_backends():
+        for partial in (False, True):
+            timings = bench_parse(backend, partial, args.repeat)
+            total = sum(timings.values())
+            baseline = baseline or total
+            mode = "parcial" if partial else "completo"
+            print(
+                f"  {backend:<12} {mode:<9} {total / len(timings):7.2f} ms/página"
+                f" | {baseline / total:4.1f}x"
+            )
+            for name, value in timings.items():
+                print(f"    {name:<22} {value:7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
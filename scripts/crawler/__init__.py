@@ -0,0 +1,3 @@
+"""
+Componentes do crawler de Books to Scrape (parsing e motor concorrente)
+"""
@@ -0,0 +1,210 @@
+"""
+Controle adaptativo (AIMD) do ritmo do crawl
+
+O controlador mantém um limite que sobe de forma aditiva enquanto o site
+responde bem e cai de forma multiplicativa quando ele reclama, como o
+controle de congestionamento do TCP:
+
+- a cada `window` respostas saudáveis seguidas o limite sobe `increase`,
+  até o teto configurado;
+- 429, 5xx, erros de rede e picos de latência (acima de `spike_factor`
+  vezes a latência de referência) multiplicam o limite por `decrease`;
+  depois de uma redução, as respostas das requisições que já estavam em
+  andamento não reduzem de novo;
+- Retry-After pausa todas as requisições ao host até o prazo pedido.
+
+No motor assíncrono o limite é o número de requisições simultâneas por
+host (ConcurrencyLimit); no sequencial, que faz uma requisição por vez, é
+o número de requisições por segundo. Cada decisão vai para o log com a
+taxa efetiva e fica em history.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Dict, List, Mapping, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+# Status que indicam sobrecarga do site
+OVERLOAD_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+def parse_retry_after(headers: Mapping[str, str]) -> Optional[float]:
+    """Segundos pedidos no header Retry-After (só o formato numérico)"""
+    try:
+        return float(headers["Retry-After"])
+    except (KeyError, ValueError):
+        return None
+
+
+class AimdController:
+    """Limite com aumento aditivo e redução multiplicativa"""
+
+    def __init__(
+        self,
+        initial: float,
+        ceiling: float,
+        minimum: float = 1.0,
+        increase: float = 1.0,
+        decrease: float = 0.5,
+        window: int = 10,
+        spike_factor: float = 3.0,
+        min_spike: float = 0.05,
+        unit: str = "simultâneas",
+    ):
+        """
+        Args:
+            initial: Limite inicial
+            ceiling: Teto do limite
+            minimum: Piso do limite
+            increase: Aumento após `window` respostas saudáveis seguidas
+            decrease: Fator de redução (0 < decrease < 1)
+            window: Respostas saudáveis seguidas por aumento
+            spike_factor: Latência acima de spike_factor x a referência é pico
+            min_spike: Diferenças de latência abaixo disso (s) não são pico
+            unit: Unidade do limite nos logs
+        """
+        self.ceiling = ceiling
+        self.minimum = minimum
+        self.limit = self.initial = max(minimum, min(initial, ceiling))
+        self.increase = increase
+        self.decrease = decrease
+        self.window = window
+        self.spike_factor = spike_factor
+        self.min_spike = min_spike
+        self.unit = unit
+        self.baseline: Optional[float] = None  # EWMA da latência saudável
+        self.history: List[Dict] = []
+        self.increases = 0
+        self.decreases = 0
+        self._healthy = 0
+        self._since_change = 0
+        self._cooling = False
+        self._samples = 0
+        self._paused_until = 0.0
+        self._start = time.monotonic()
+        self._last_change = self._start
+
+    def pause(self) -> float:
+        """Segundos que ainda faltam do último Retry-After"""
+        return max(0.0, self._paused_until - time.monotonic())
+
+    def observe(
+        self,
+        status: Union[int, str],
+        latency: Optional[float] = None,
+        retry_after: Optional[float] = None,
+    ):
+        """
+        Registra uma resposta e ajusta o limite
+
+        Args:
+            status: Status HTTP ou "erro" (falha de rede)
+            latency: Tempo até os headers (segundos)
+            retry_after: Segundos pedidos no header Retry-After
+        """
+        self._since_change += 1
+        if retry_after:
+            self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+        if status == "erro" or status in OVERLOAD_STATUSES:
+            self._cut(f"HTTP {status}" if status != "erro" else "erro de rede")
+            return
+
+        if latency is not None:
+            if self._is_spike(latency):
+                self._cut(
+                    f"pico de latência ({latency * 1e3:.0f} ms,"
+                    f" referência {self.baseline * 1e3:.0f} ms)"
+                )
+                return
+            self._samples += 1
+            self.baseline = (
+                latency
+                if self.baseline is None
+                else 0.9 * self.baseline + 0.1 * latency
+            )
+
+        self._healthy += 1
+        if self._healthy >= self.window and self.limit < self.ceiling:
+            self._change(
+                min(self.ceiling, self.limit + self.increase),
+                f"{self._healthy} respostas saudáveis",
+            )
+            self.increases += 1
+            self._cooling = False
+
+    def _is_spike(self, latency: float) -> bool:
+        if self.baseline is None or self._samples < self.window:
+            return False
+        return (
+            latency > self.spike_factor * self.baseline
+            and latency - self.baseline > self.min_spike
+        )
+
+    def _cut(self, reason: str):
+        self._healthy = 0
+        # Uma redução por "janela": as respostas das requisições que já
+        # estavam em andamento refletem o limite anterior
+        if self._cooling and self._since_change < max(1, int(self.limit)):
+            return
+        if self.limit <= self.minimum:
+            return
+        self._change(max(self.minimum, self.limit * self.decrease), reason)
+        self.decreases += 1
+        self._cooling = True
+
+    def _change(self, limit: float, reason: str):
+        now = time.monotonic()
+        rate = self._since_change / max(now - self._last_change, 1e-9)
+        logger.info(
+            f"AIMD: {reason}; limite {self.limit:g} -> {limit:g} {self.unit}"
+            f" (taxa efetiva {rate:.1f} req/s)"
+        )
+        self.history.append(
+            {
+                "t_s": round(now - self._start, 3),
+                "limite": round(limit, 3),
+                "motivo": reason,
+                "taxa_efetiva": round(rate, 2),
+            }
+        )
+        self.limit = limit
+        self._healthy = 0
+        self._since_change = 0
+        self._last_change = now
+
+    def stats(self) -> Dict:
+        limits = [self.initial] + [entry["limite"] for entry in self.history]
+        return {
+            "unidade": self.unit,
+            "teto": self.ceiling,
+            "limite_final": round(self.limit, 3),
+            "limite_min": round(min(limits), 3),
+            "limite_max": round(max(limits), 3),
+            "aumentos": self.increases,
+            "reducoes": self.decreases,
+            "decisoes": self.history,
+        }
+
+
+class ConcurrencyLimit:
+    """Semáforo assíncrono com a capacidade dada pelo controlador"""
+
+    def __init__(self, controller: AimdController):
+        self.controller = controller
+        self.active = 0
+        self._condition = asyncio.Condition()
+
+    async def __aenter__(self):
+        async with self._condition:
+            await self._condition.wait_for(
+                lambda: self.active < max(1, int(self.controller.limit))
+            )
+            self.active += 1
+
+    async def __aexit__(self, *exc):
+        async with self._condition:
+            self.active -= 1
+            # O limite pode ter subido: acorda todos para reavaliar
+            self._condition.notify_all()
@@ -0,0 +1,174 @@
+"""
+Checkpoints duráveis do crawl (SQLite)
+
+O checkpoint guarda os registros extraídos até ali (com a chave de ordem
+de cada um), as URLs vistas, a chave do registro de cada detalhe extraído
+e o snapshot da fronteira (fila e contadores). Registros, URLs e
+detalhes são tabelas que só recebem o que é novo desde a gravação
+anterior; só o snapshot é reescrito. Tudo vai na mesma transação a cada
+`every` URLs concluídas, então o arquivo é sempre consistente: na
+retomada nada do que foi concluído é buscado de novo, e as URLs que
+estavam em andamento voltam para a fila.
+
+A fronteira busca aqui os detalhes de um livro repetido em outra
+listagem (record()), em vez de manter os detalhes de todo o catálogo em
+memória.
+
+Os ids saem da chave de ordem (categoria, página, posição) e não da
+ordem de conclusão, então são os mesmos com ou sem retomada.
+"""
+
+import json
+import logging
+import sqlite3
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from scripts.crawler.frontier import Frontier, Key
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHECKPOINT_PATH = "data/crawl_checkpoint.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    key TEXT PRIMARY KEY,
+    record TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS seen (
+    url TEXT PRIMARY KEY
+);
+CREATE TABLE IF NOT EXISTS details (
+    url TEXT PRIMARY KEY,
+    key TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS frontier (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    snapshot TEXT NOT NULL
+);
+"""
+
+
+class Checkpoint:
+    """Checkpoint periódico da fronteira e dos registros de um crawl"""
+
+    def __init__(
+        self,
+        path: str = DEFAULT_CHECKPOINT_PATH,
+        every: int = 50,
+        resume: bool = False,
+    ):
+        """
+        Abre o checkpoint
+
+        Args:
+            path: Arquivo SQLite
+            every: URLs concluídas entre dois commits
+            resume: Continua do último checkpoint (senão começa do zero)
+        """
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.every = max(1, every)
+        self.resume = resume
+        self._conn = sqlite3.connect(path)
+        self._conn.executescript(_SCHEMA)
+        self._buffer: List[Tuple[Key, Dict]] = []
+        self._since_save = 0
+        self.saves = 0
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def frontier(self, base_url: str) -> Frontier:
+        """Fronteira restaurada (resume) ou nova, com o checkpoint limpo"""
+        row = self._conn.execute("SELECT snapshot FROM frontier").fetchone()
+        if self.resume and row is not None:
+            frontier = Frontier.restore(
+                json.loads(row[0]),
+                (url for (url,) in self._conn.execute("SELECT url FROM seen")),
+                (
+                    (url, tuple(json.loads(key)))
+                    for url, key in self._conn.execute("SELECT url, key FROM details")
+                ),
+                self.record,
+                journal=True,
+            )
+            count = self._conn.execute("SELECT COUNT(*) FROM records").fetchone()[0]
+            logger.info(
+                f"Retomando do checkpoint: {len(frontier)} URLs na fila, "
+                f"{count} registros extraídos"
+            )
+            return frontier
+
+        if self.resume:
+            logger.warning(f"Nenhum checkpoint em {self.path}; começando do zero")
+        self.clear()
+        return Frontier(base_url, self.record, journal=True)
+
+    def update(self, frontier: Frontier, records: List[Tuple[Key, Dict]]):
+        """Registra uma URL concluída; grava a cada `every` URLs"""
+        self._buffer.extend(records)
+        self._since_save += 1
+        if self._since_save >= self.every:
+            self.save(frontier)
+
+    def save(self, frontier: Frontier):
+        """
+        Grava os registros pendentes, as URLs vistas e os detalhes novos
+        (frontier.drain()) e o snapshot na mesma transação
+        """
+        seen, details = frontier.drain()
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO records VALUES (?, ?)",
+                [
+                    (json.dumps(list(key)), json.dumps(record))
+                    for key, record in self._buffer
+                ],
+            )
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO seen VALUES (?)", [(url,) for url in seen]
+            )
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO details VALUES (?, ?)",
+                [(url, json.dumps(list(key))) for url, key in details],
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO frontier VALUES (1, ?)",
+                (json.dumps(frontier.snapshot()),),
+            )
+        self._buffer.clear()
+        self._since_save = 0
+        self.saves += 1
+
+    def record(self, key: Key) -> Optional[Dict]:
+        """Registro da chave (pendente ou já gravado), ou None"""
+        for buffered_key, record in reversed(self._buffer):
+            if buffered_key == key:
+                return record
+        row = self._conn.execute(
+            "SELECT record FROM records WHERE key = ?", (json.dumps(list(key)),)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def records(self) -> List[Tuple[Key, Dict]]:
+        """Todos os registros gravados, com a chave de ordem"""
+        return [
+            (tuple(json.loads(key)), json.loads(record))
+            for key, record in self._conn.execute("SELECT key, record FROM records")
+        ]
+
+    def clear(self):
+        """Descarta o checkpoint (crawl concluído e salvo)"""
+        with self._conn:
+            for table in ("records", "seen", "details", "frontier"):
+                self._conn.execute(f"DELETE FROM {table}")
+        self._buffer.clear()
+        self._since_save = 0
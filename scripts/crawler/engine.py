@@ -0,0 +1,433 @@
+"""
+Motor de crawl assíncrono (asyncio + httpx)
+
+Um único AsyncClient (pool de conexões compartilhado) atende todas as
+tarefas. Para cada host há um limite de requisições simultâneas e um
+orçamento de cortesia em requisições por segundo: os inícios das
+requisições são espaçados em 1/rate segundos, em vez de um sleep fixo
+depois de cada página. As categorias e as páginas de detalhe são
+buscadas em paralelo dentro desses limites; os registros são montados na
+mesma ordem do scraper sequencial (categoria, página, posição), então os
+ids e o CSV são os mesmos, e vão para o sink à medida que saem.
+
+Os fetchers consomem a mesma Frontier do modo sequencial: cada URL é
+buscada uma única vez e os contadores ficam em last_stats. O HTML baixado
+passa por uma fila limitada até os parsers, que usam um pool de processos
+com parse_workers > 0 (scripts/crawler/pipeline.py).
+
+Com adaptive=True o limite de simultâneas de cada host deixa de ser fixo:
+um controlador AIMD (scripts/crawler/adaptive.py) o sobe enquanto o site
+responde bem e o corta em 429/5xx ou picos de latência, com per_host como
+teto; Retry-After pausa o host e as novas tentativas não usam backoff fixo.
+"""
+
+import asyncio
+import functools
+import logging
+import time
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from scripts.crawler.adaptive import (
+    AimdController,
+    ConcurrencyLimit,
+    parse_retry_after,
+)
+from scripts.crawler.checkpoint import Checkpoint
+from scripts.crawler.frontier import Frontier
+from scripts.crawler.metrics import CrawlMetrics
+from scripts.crawler.parsing import BASE_URL, parse_page
+from scripts.crawler.pipeline import (
+    DEFAULT_QUEUE_SIZE,
+    PageQueue,
+    ParsePool,
+    StageStats,
+)
+from scripts.crawler.replay import ResponseCache
+from scripts.crawler.sinks import ListSink, RecordStream
+from scripts.crawler.state import CrawlState, Fetched
+
+logger = logging.getLogger(__name__)
+
+# Status que disparam nova tentativa (os mesmos do Retry do modo sequencial)
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+
+
+class RateLimiter:
+    """Espaça os inícios de requisição em 1/rate segundos (rate <= 0: livre)"""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        if not self.interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+class AsyncCrawler:
+    """Crawler concorrente com o mesmo resultado de scrape_all_books"""
+
+    def __init__(
+        self,
+        base_url: str = BASE_URL,
+        rate: float = 5.0,
+        per_host: int = 4,
+        max_connections: int = 16,
+        max_retries: int = 3,
+        backoff_factor: float = 1.0,
+        timeout: float = 10.0,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        state: Optional[CrawlState] = None,
+        checkpoint: Optional[Checkpoint] = None,
+        parser: Optional[str] = None,
+        partial: bool = True,
+        parse_workers: int = 0,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        recorder: Optional[ResponseCache] = None,
+        live_metrics: float = 0.0,
+        adaptive: bool = False,
+    ):
+        """
+        Configura o crawler
+
+        Args:
+            base_url: Raiz do site
+            rate: Orçamento de cortesia por host (requisições/segundo)
+            per_host: Requisições simultâneas por host
+            max_connections: Tamanho do pool de conexões
+            max_retries: Tentativas extras para falhas de rede e RETRY_STATUSES
+            backoff_factor: Espera base entre tentativas (dobra a cada uma)
+            timeout: Timeout de cada requisição (segundos)
+            transport: Transporte httpx alternativo (testes)
+            state: Estado do crawl anterior (re-scrape incremental)
+            checkpoint: Checkpoint periódico (crawl retomável)
+            parser: Backend do BeautifulSoup (padrão: lxml se instalado)
+            partial: Monta só as subárvores usadas de cada página
+            parse_workers: Processos de parse (0: parse no laço de eventos)
+            queue_size: Páginas baixadas aguardando parse (backpressure)
+            recorder: Grava as respostas 200 (reprodução offline)
+            live_metrics: Segundos entre os resumos de métricas no log (0: sem)
+            adaptive: Simultâneas por host ajustadas por AIMD (teto per_host)
+        """
+        self.base_url = base_url
+        self.rate = rate
+        self.per_host = per_host
+        self.max_connections = max_connections
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.timeout = timeout
+        self.transport = transport
+        self.state = state
+        self.checkpoint = checkpoint
+        self.parse_workers = parse_workers
+        self.queue_size = queue_size
+        self.recorder = recorder
+        self.live_metrics = live_metrics
+        self.adaptive = adaptive
+        self.metrics = CrawlMetrics()
+        self._parse = functools.partial(
+            parse_page, base_url=base_url, backend=parser, partial=partial
+        )
+        self._client: Optional[httpx.AsyncClient] = None
+        self._hosts: Dict[str, tuple] = {}
+        self.controllers: Dict[str, AimdController] = {}
+        self.last_stats: Dict = {}
+        self.last_changed: List[Dict] = []
+        self.last_report: Dict = {}
+
+    def run(self) -> List[Dict]:
+        """Executa o crawl completo (bloqueante)"""
+        return asyncio.run(self.crawl())
+
+    def run_to(self, sink, changes=None) -> int:
+        """Executa o crawl gravando no sink (bloqueante)"""
+        return asyncio.run(self.crawl_to(sink, changes))
+
+    async def crawl(self) -> List[Dict]:
+        """
+        Extrai todos os livros de todas as categorias
+
+        Com estado, os livros novos ou alterados ficam em self.last_changed.
+
+        Returns:
+            Lista com todos os livros, com ids na ordem do crawl sequencial
+        """
+        books, changes = ListSink(), ListSink()
+        await self.crawl_to(books, changes)
+        self.last_changed = changes.records
+        return books.records
+
+    async def crawl_to(self, sink, changes=None) -> int:
+        """
+        Extrai todos os livros gravando cada um no sink em ordem
+
+        Um registro é liberado quando todas as URLs com chave menor foram
+        concluídas, então os ids são atribuídos na hora e são os mesmos do
+        crawl sequencial.
+
+        Args:
+            sink: Destino de todos os livros (RecordSink ou ListSink)
+            changes: Destino dos livros novos ou alterados (com estado)
+
+        Returns:
+            Número de livros gravados
+        """
+        logger.info("Iniciando scraping concorrente do site")
+        start_time = time.time()
+        metrics = self.metrics = CrawlMetrics(live_interval=self.live_metrics)
+        self.controllers = {}
+
+        limits = httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_connections,
+        )
+        async with httpx.AsyncClient(
+            limits=limits,
+            timeout=self.timeout,
+            headers={"User-Agent": USER_AGENT},
+            transport=self.transport,
+        ) as client:
+            self._client = client
+            stream = RecordStream(sink, self.state, changes)
+            if self.checkpoint is not None:
+                frontier = self.checkpoint.frontier(self.base_url)
+                with metrics.measure("escrita"):
+                    stream.push(self.checkpoint.records(), frontier.watermark())
+            else:
+                frontier = Frontier(self.base_url)
+            changed = asyncio.Condition()
+            queue = PageQueue(self.queue_size)
+            stages = {"busca": StageStats(), "parse": StageStats()}
+            try:
+                with ParsePool(self._parse, self.parse_workers) as pool:
+                    await self._pipeline(frontier, stream, changed, queue, pool, stages)
+            finally:
+                self._client = None
+                self._hosts.clear()
+
+        if self.checkpoint is not None:
+            self.checkpoint.save(frontier)
+        with metrics.measure("escrita"):
+            stream.finish()
+        self.last_stats = frontier.stats()
+        self.last_stats["etapas"] = {
+            **{name: stats.as_dict() for name, stats in stages.items()},
+            "fila": queue.as_dict(),
+        }
+        if self.state is not None:
+            self.last_stats["estado"] = self.state.stats()
+        extra = {}
+        if self.controllers:
+            extra["adaptativo"] = {
+                host: controller.stats()
+                for host, controller in self.controllers.items()
+            }
+        self.last_report = metrics.report(
+            motor="async", livros=stream.count, fronteira=self.last_stats, **extra
+        )
+
+        elapsed_time = time.time() - start_time
+        logger.info(
+            f"Scraping concluído! Total: {stream.count} livros em {elapsed_time:.2f}s"
+        )
+        logger.info(f"Fronteira: {self.last_stats}")
+        return stream.count
+
+    async def _pipeline(self, frontier, stream, changed, queue, pool, stages):
+        """Fetchers e parsers ligados pela fila; termina quando a fronteira esgota"""
+        parsers = [
+            asyncio.create_task(
+                self._parser(frontier, stream, changed, queue, pool, stages["parse"])
+            )
+            for _ in range(max(1, pool.workers))
+        ]
+        fetching = asyncio.gather(
+            *(
+                self._fetcher(frontier, changed, queue, stages["busca"])
+                for _ in range(self.max_connections)
+            )
+        )
+        parsing = asyncio.gather(*parsers)
+        try:
+            # Os parsers só terminam antes dos fetchers se falharem
+            await asyncio.wait({fetching, parsing}, return_when=asyncio.FIRST_COMPLETED)
+            if parsing.done():
+                parsing.result()
+            await fetching
+            await queue.close(len(parsers))
+            await parsing
+        finally:
+            for future in (fetching, parsing):
+                future.cancel()
+
+    async def _fetcher(
+        self,
+        frontier: Frontier,
+        changed: asyncio.Condition,
+        queue: PageQueue,
+        stats: StageStats,
+    ):
+        """Busca as URLs da fronteira e coloca as respostas na fila"""
+        while True:
+            async with changed:
+                while not len(frontier) and frontier.in_progress:
+                    await changed.wait()
+                task = frontier.pop()
+                if task is None:
+                    changed.notify_all()
+                    return
+
+            start = time.perf_counter()
+            headers = self.state.headers(task.url) if self.state is not None else None
+            fetched = await self._fetch(task.url, headers)
+            stats.busy += time.perf_counter() - start
+            stats.items += 1
+            # Fila cheia: o fetcher espera o parse (backpressure)
+            await queue.put((task, fetched, time.perf_counter()), stats)
+
+    async def _parser(
+        self,
+        frontier: Frontier,
+        stream: RecordStream,
+        changed: asyncio.Condition,
+        queue: PageQueue,
+        pool: ParsePool,
+        stats: StageStats,
+    ):
+        """Parseia as respostas da fila (no pool) e conclui as Tasks"""
+        while True:
+            item = await queue.get(stats)
+            if item is None:
+                return
+            task, fetched, queued_at = item
+            metrics = self.metrics
+            metrics.timing("espera_fila", time.perf_counter() - queued_at)
+
+            parsed = None
+            if fetched is not None and self.state is not None:
+                parsed = self.state.cached(task.url, fetched)
+            if parsed is None and fetched is not None and fetched.status != 304:
+                start = time.perf_counter()
+                parsed = await pool.run(task.kind, fetched.content, task.url)
+                metrics.timing("parse", time.perf_counter() - start)
+                stats.busy += time.perf_counter() - start
+                stats.items += 1
+                if self.state is not None:
+                    self.state.store(task.url, fetched, parsed)
+
+            async with changed:
+                done = frontier.complete(task, parsed)
+                if self.checkpoint is not None:
+                    self.checkpoint.update(frontier, done)
+                with metrics.measure("escrita"):
+                    stream.push(done, frontier.watermark())
+                metrics.page()
+                changed.notify_all()
+
+    # Requisições
+
+    def _host_limits(self, url: str) -> tuple:
+        host = urlsplit(url).netloc
+        if host not in self._hosts:
+            if self.adaptive:
+                controller = self.controllers[host] = AimdController(
+                    initial=min(2, self.per_host), ceiling=self.per_host
+                )
+                semaphore = ConcurrencyLimit(controller)
+            else:
+                controller, semaphore = None, asyncio.Semaphore(self.per_host)
+            self._hosts[host] = (semaphore, RateLimiter(self.rate), controller)
+        return self._hosts[host]
+
+    async def _fetch(
+        self, url: str, headers: Optional[Dict] = None
+    ) -> Optional[Fetched]:
+        """
+        Baixa a página respeitando os limites do host
+
+        Args:
+            url: URL da página
+            headers: Headers extras (requisição condicional)
+
+        Returns:
+            Resposta ou None em caso de erro
+        """
+        metrics = self.metrics
+        semaphore, limiter, controller = self._host_limits(url)
+        for attempt in range(self.max_retries + 1):
+            retry_after = None
+            waiting = time.perf_counter()
+            async with semaphore:
+                await limiter.wait()
+                if controller is not None and controller.pause():
+                    # Retry-After recente: o host inteiro espera
+                    await asyncio.sleep(controller.pause())
+                metrics.timing("cortesia", time.perf_counter() - waiting)
+                try:
+                    logger.info(f"Acessando: {url}")
+                    start = time.perf_counter()
+                    request = self._client.build_request("GET", url, headers=headers)
+                    response = await self._client.send(request, stream=True)
+                    headers_at = time.perf_counter()
+                    try:
+                        await response.aread()
+                    finally:
+                        await response.aclose()
+                    metrics.timing("conexao", headers_at - start)
+                    metrics.timing("download", time.perf_counter() - headers_at)
+                    metrics.response(response.status_code, len(response.content))
+                    if controller is not None:
+                        controller.observe(
+                            response.status_code,
+                            headers_at - start,
+                            parse_retry_after(response.headers),
+                        )
+                    if response.status_code not in RETRY_STATUSES:
+                        if response.status_code != 304:
+                            response.raise_for_status()
+                        fetched = Fetched(
+                            response.status_code,
+                            response.content,
+                            response.headers.get("ETag"),
+                            response.headers.get("Last-Modified"),
+                        )
+                        if self.recorder is not None and fetched.status == 200:
+                            self.recorder.store(url, fetched)
+                        return fetched
+                    error = f"HTTP {response.status_code}"
+                    retry_after = parse_retry_after(response.headers)
+                except httpx.HTTPStatusError as e:
+                    logger.error(f"Erro ao acessar {url}: {e}")
+                    return None
+                except httpx.TransportError as e:
+                    metrics.response("erro")
+                    if controller is not None:
+                        controller.observe("erro")
+                    error = repr(e)
+
+            if attempt == self.max_retries:
+                logger.error(f"Erro ao acessar {url}: {error}")
+                return None
+            if controller is not None:
+                # O controlador já reduziu o limite; só o Retry-After espera
+                delay = controller.pause()
+            else:
+                delay = self.backoff_factor * 2**attempt
+                if retry_after is not None:
+                    delay = max(delay, retry_after)
+            metrics.retry()
+            logger.warning(f"Nova tentativa em {delay:.1f}s para {url}: {error}")
+            await asyncio.sleep(delay)
+        return None
@@ -0,0 +1,325 @@
+"""
+Fronteira do crawl: fila de URLs tipadas com conjunto de vistas
+
+Cada URL entra na fila uma única vez, com um tipo (index, category,
+listing, detail) e uma chave de ordem (categoria, página, posição). A fila
+é um heap pela chave, então um único worker visita as páginas na mesma
+ordem do scraper original e vários workers começam pelas categorias.
+Cada listagem é baixada e parseada uma vez para extrair os livros e o
+link da próxima página. Um livro que aparece em mais de uma listagem tem
+a página de detalhes baixada uma vez e gera um registro por ocorrência.
+
+Para as ocorrências que aparecem depois do detalhe extraído, a fronteira
+guarda só a chave do primeiro registro de cada detalhe; os dados vêm de
+`lookup` (o registro gravado no checkpoint). Sem lookup os detalhes
+ficam em memória.
+
+Os contadores por execução (enfileiradas, buscadas, duplicadas ignoradas,
+buscas repetidas) mostram que cada URL foi buscada exatamente uma vez.
+"""
+
+import heapq
+import logging
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from scripts.crawler.parsing import (
+    BASE_URL,
+    CATEGORY,
+    DETAIL,
+    DETAIL_FIELDS,
+    INDEX,
+    LISTING,
+    build_record,
+)
+
+logger = logging.getLogger(__name__)
+
+Key = Tuple[int, ...]
+
+
+@dataclass(order=True)
+class Task:
+    """URL a buscar; ordenada pela chave (categoria, página, posição)"""
+
+    key: Key
+    kind: str = field(compare=False)
+    url: str = field(compare=False)
+    category: Optional[str] = field(default=None, compare=False)
+    page: int = field(default=0, compare=False)
+    # Detalhes: (chave, dados da listagem, categoria) de cada ocorrência
+    occurrences: list = field(default_factory=list, compare=False)
+
+
+class Frontier:
+    """Fila de prioridade de Tasks com deduplicação por URL"""
+
+    def __init__(
+        self,
+        base_url: str = BASE_URL,
+        lookup: Optional[Callable[[Key], Optional[Dict]]] = None,
+        journal: bool = False,
+    ):
+        """
+        Args:
+            base_url: Raiz do site (primeira URL da fila)
+            lookup: Registro já extraído pela chave (ex: Checkpoint.record);
+                sem ele os detalhes extraídos ficam em memória
+            journal: Acumula as URLs vistas e os detalhes extraídos para
+                drain() (checkpoint incremental)
+        """
+        self.base_url = base_url
+        self.in_progress = 0
+        self.lookup = lookup
+        self._journal: Optional[Tuple[List[str], List[Tuple[str, Key]]]] = (
+            ([], []) if journal else None
+        )
+        self._heap: List[Task] = []
+        self._seen = set()
+        self._pending: Dict[str, Task] = {}  # detalhes enfileirados
+        self._details: Dict[str, Key] = {}  # detalhe extraído -> 1º registro
+        self._kept: Dict[str, Dict] = {}  # detalhes em memória (sem lookup)
+        self._active: Dict[str, Task] = {}  # retiradas e ainda não concluídas
+
+        self.enqueued: Counter = Counter()
+        self.fetched: Counter = Counter()
+        self.failed: Counter = Counter()
+        self.duplicates: Counter = Counter()
+        self._dispatches: Counter = Counter()
+
+        self._push(Task((), INDEX, base_url))
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def _push(self, task: Task) -> bool:
+        if task.url in self._seen:
+            self.duplicates[task.kind] += 1
+            return False
+        self._seen.add(task.url)
+        if self._journal is not None:
+            self._journal[0].append(task.url)
+        heapq.heappush(self._heap, task)
+        self.enqueued[task.kind] += 1
+        return True
+
+    def pop(self) -> Optional[Task]:
+        """Próxima URL (menor chave) ou None se a fila estiver vazia"""
+        if not self._heap:
+            return None
+        task = heapq.heappop(self._heap)
+        self.in_progress += 1
+        self._active[task.url] = task
+        self._dispatches[task.url] += 1
+        return task
+
+    def complete(self, task: Task, parsed: Optional[Dict]) -> List[Tuple[Key, Dict]]:
+        """
+        Registra o resultado de uma Task e enfileira as URLs encontradas
+
+        Args:
+            task: Task retirada com pop()
+            parsed: Resultado de parse_page ou None se a busca falhou
+
+        Returns:
+            Registros concluídos, cada um com sua chave de ordem
+        """
+        self.in_progress -= 1
+        self._active.pop(task.url, None)
+        self.fetched[task.kind] += 1
+        if parsed is None:
+            self.failed[task.kind] += 1
+
+        if task.kind == INDEX:
+            self._add_categories(parsed["categories"] if parsed else [])
+            return []
+        if task.kind in (CATEGORY, LISTING):
+            return self._add_listing(task, parsed) if parsed else []
+
+        # Falha no detalhe: registro com os valores padrão, como no original
+        details = parsed["details"] if parsed else {}
+        self._pending.pop(task.url, None)
+        self._details[task.url] = task.occurrences[0][0]
+        if self._journal is not None:
+            self._journal[1].append((task.url, task.occurrences[0][0]))
+        if self.lookup is None:
+            self._kept[task.url] = details
+        return [
+            self._record(key, entry, category, details)
+            for key, entry, category in task.occurrences
+        ]
+
+    def _add_categories(self, categories: List[Dict]):
+        logger.info(f"Encontradas {len(categories)} categorias")
+        for index, category in enumerate(categories, 1):
+            self._push(
+                Task((index, 1), CATEGORY, category["url"], category["name"], page=1)
+            )
+
+    def _add_listing(self, task: Task, parsed: Dict) -> List[Tuple[Key, Dict]]:
+        logger.info(f"Processando {task.category} - página {task.page}")
+        records = []
+        category_index = task.key[0]
+        for position, entry in enumerate(parsed["entries"]):
+            key = (category_index, task.page, position)
+            url = entry["product_page_url"]
+            occurrence = (key, entry, task.category)
+            if url in self._details:
+                records.append(
+                    self._record(key, entry, task.category, self._extracted(url))
+                )
+                self.duplicates[DETAIL] += 1
+            elif url in self._pending:
+                self._pending[url].occurrences.append(occurrence)
+                self.duplicates[DETAIL] += 1
+            else:
+                detail = Task(key, DETAIL, url, task.category, occurrences=[occurrence])
+                self._push(detail)
+                self._pending[url] = detail
+
+        if parsed["next"]:
+            self._push(
+                Task(
+                    (category_index, task.page + 1),
+                    LISTING,
+                    parsed["next"],
+                    task.category,
+                    page=task.page + 1,
+                )
+            )
+        return records
+
+    def _extracted(self, url: str) -> Dict:
+        """Detalhes já extraídos da URL (do registro gravado, com lookup)"""
+        if self.lookup is None:
+            return self._kept[url]
+        record = self.lookup(self._details[url])
+        if record is None:
+            logger.warning(f"Registro de {url} não encontrado; usando valores padrão")
+            return {}
+        return {name: record[name] for name in DETAIL_FIELDS}
+
+    def _record(
+        self, key: Key, entry: Dict, category: str, details: Dict
+    ) -> Tuple[Key, Dict]:
+        logger.info(f"Extraído: {entry['title']} ({category})")
+        return key, build_record(entry, details, category)
+
+    def watermark(self) -> Optional[Key]:
+        """
+        Menor chave ainda não concluída (None: fronteira esgotada)
+
+        As URLs novas sempre têm chave maior que a da Task que as
+        encontrou, então os registros abaixo da marca d'água são finais.
+        """
+        keys = [task.key for task in self._active.values()]
+        if self._heap:
+            keys.append(self._heap[0].key)
+        return min(keys) if keys else None
+
+    # Checkpoint
+
+    def drain(self) -> Tuple[List[str], List[Tuple[str, Key]]]:
+        """
+        URLs vistas e detalhes extraídos (URL, chave) desde a última chamada
+
+        Só com journal=True; o checkpoint grava isso de forma incremental e
+        o snapshot() fica só com a fila e os contadores.
+        """
+        seen, details = self._journal
+        self._journal = ([], [])
+        return seen, details
+
+    def snapshot(self) -> Dict:
+        """
+        Fila e contadores, serializáveis em JSON (ver restore)
+
+        As URLs vistas e os detalhes extraídos ficam de fora (ver drain).
+        As Tasks retiradas e ainda não concluídas voltam para a fila: só o
+        trabalho concluído fica de fora na retomada.
+        """
+        queue = list(self._heap) + list(self._active.values())
+        return {
+            "base_url": self.base_url,
+            "queue": [_task_to_json(task) for task in queue],
+            "kept": self._kept,
+            "counters": {
+                "enqueued": self.enqueued,
+                "fetched": self.fetched,
+                "failed": self.failed,
+                "duplicates": self.duplicates,
+            },
+        }
+
+    @classmethod
+    def restore(
+        cls,
+        snapshot: Dict,
+        seen: Iterable[str],
+        details: Iterable[Tuple[str, Key]],
+        lookup: Optional[Callable[[Key], Optional[Dict]]] = None,
+        journal: bool = False,
+    ) -> "Frontier":
+        """
+        Fronteira no ponto de um snapshot()
+
+        Args:
+            snapshot: Resultado de snapshot()
+            seen: Todas as URLs vistas (drain() acumulado)
+            details: Todos os (URL, chave) de detalhes extraídos
+            lookup, journal: Como em __init__
+        """
+        frontier = cls.__new__(cls)
+        frontier.base_url = snapshot["base_url"]
+        frontier.in_progress = 0
+        frontier.lookup = lookup
+        frontier._journal = ([], []) if journal else None
+        frontier._heap = [_task_from_json(data) for data in snapshot["queue"]]
+        heapq.heapify(frontier._heap)
+        frontier._seen = set(seen)
+        frontier._pending = {
+            task.url: task for task in frontier._heap if task.kind == DETAIL
+        }
+        frontier._details = {url: tuple(key) for url, key in details}
+        frontier._kept = snapshot["kept"]
+        frontier._active = {}
+        for name, values in snapshot["counters"].items():
+            setattr(frontier, name, Counter(values))
+        frontier._dispatches = Counter()
+        return frontier
+
+    def stats(self) -> Dict:
+        """Contadores da execução"""
+        return {
+            "enfileiradas": dict(self.enqueued),
+            "buscadas": dict(self.fetched),
+            "falhas": dict(self.failed),
+            "duplicadas_ignoradas": dict(self.duplicates),
+            "urls_unicas": len(self._seen),
+            "buscas_repetidas": sum(1 for n in self._dispatches.values() if n > 1),
+        }
+
+
+def _task_to_json(task: Task) -> Dict:
+    return {
+        "key": list(task.key),
+        "kind": task.kind,
+        "url": task.url,
+        "category": task.category,
+        "page": task.page,
+        "occurrences": [
+            [list(key), entry, category] for key, entry, category in task.occurrences
+        ],
+    }
+
+
+def _task_from_json(data: Dict) -> Task:
+    return Task(
+        tuple(data["key"]),
+        data["kind"],
+        data["url"],
+        data["category"],
+        data["page"],
+        [(tuple(key), entry, category) for key, entry, category in data["occurrences"]],
+    )
@@ -0,0 +1,152 @@
+"""
+Instrumentação do crawl e relatório da execução
+
+CrawlMetrics acompanha um crawl (sequencial ou assíncrono):
+
+- tempo por etapa: cortesia (delay / limites do host), conexao (da
+  requisição até os headers: conexão + espera do servidor), download
+  (corpo), espera_fila (página baixada aguardando o parse), parse e
+  escrita (sinks);
+- bytes recebidos, contagem por status HTTP (inclusive das tentativas
+  refeitas) e novas tentativas;
+- páginas concluídas por intervalo (páginas/s ao longo do crawl).
+
+report() devolve o relatório em JSON-serializável; com live_interval > 0
+uma linha de resumo vai para o log a cada live_interval segundos.
+"""
+
+import json
+import logging
+import os
+import time
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Union
+
+logger = logging.getLogger(__name__)
+
+STAGES = ("cortesia", "conexao", "download", "espera_fila", "parse", "escrita")
+
+DEFAULT_REPORT_PATH = "logs/crawl_report.json"
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class CrawlMetrics:
+    """Contadores e tempos de um crawl"""
+
+    def __init__(self, interval: float = 1.0, live_interval: float = 0.0):
+        """
+        Args:
+            interval: Largura (segundos) de cada ponto da série de páginas/s
+            live_interval: Segundos entre as linhas de resumo no log (0: sem)
+        """
+        self.interval = interval
+        self.live_interval = live_interval
+        self.timings: Dict[str, List[float]] = {stage: [] for stage in STAGES}
+        self.statuses: Counter = Counter()
+        self.bytes = 0
+        self.retries = 0
+        self.pages = 0
+        self._buckets: Counter = Counter()
+        self._start = time.perf_counter()
+        self._started_at = time.time()
+        self._last_live = self._start
+        self._pages_at_live = 0
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._start
+
+    def timing(self, stage: str, seconds: float):
+        self.timings[stage].append(seconds)
+
+    @contextmanager
+    def measure(self, stage: str):
+        """Mede o bloco como uma ocorrência da etapa"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timing(stage, time.perf_counter() - start)
+
+    def response(self, status: Union[int, str], size: int = 0):
+        """Uma resposta (ou "erro" de rede) recebida"""
+        self.statuses[str(status)] += 1
+        self.bytes += size
+
+    def retry(self, count: int = 1):
+        self.retries += count
+
+    def page(self):
+        """Uma URL concluída; registra na série e emite o resumo ao vivo"""
+        now = time.perf_counter()
+        self.pages += 1
+        self._buckets[int((now - self._start) // self.interval)] += 1
+        if self.live_interval and now - self._last_live >= self.live_interval:
+            rate = (self.pages - self._pages_at_live) / (now - self._last_live)
+            logger.info(
+                f"Métricas: {self.pages} páginas em {now - self._start:.1f}s"
+                f" ({rate:.1f} páginas/s), {self.bytes / 1e6:.2f} MB,"
+                f" {self.retries} novas tentativas, status {dict(self.statuses)}"
+            )
+            self._last_live = now
+            self._pages_at_live = self.pages
+
+    def stages(self) -> Dict[str, Dict]:
+        summary = {}
+        for stage, values in self.timings.items():
+            if not values:
+                continue
+            summary[stage] = {
+                "n": len(values),
+                "total_s": round(sum(values), 4),
+                "media_ms": round(sum(values) / len(values) * 1e3, 3),
+                "p50_ms": round(_percentile(values, 0.5) * 1e3, 3),
+                "p95_ms": round(_percentile(values, 0.95) * 1e3, 3),
+                "max_ms": round(max(values) * 1e3, 3),
+            }
+        return summary
+
+    def timeline(self) -> List[Dict]:
+        """Páginas concluídas em cada intervalo (inclusive os vazios)"""
+        last = max(self._buckets, default=-1)
+        return [
+            {
+                "t_s": round(index * self.interval, 3),
+                "paginas": self._buckets[index],
+                "paginas_por_s": round(self._buckets[index] / self.interval, 2),
+            }
+            for index in range(last + 1)
+        ]
+
+    def report(self, **extra) -> Dict:
+        """Relatório da execução; `extra` entra no topo (motor, fronteira...)"""
+        elapsed = self.elapsed()
+        return {
+            **extra,
+            "inicio": time.strftime(
+                "%Y-%m-%dT%H:%M:%S", time.localtime(self._started_at)
+            ),
+            "duracao_s": round(elapsed, 3),
+            "paginas": self.pages,
+            "paginas_por_s": round(self.pages / elapsed, 2) if elapsed else 0.0,
+            "bytes": self.bytes,
+            "status": dict(sorted(self.statuses.items())),
+            "novas_tentativas": self.retries,
+            "etapas": self.stages(),
+            "serie": self.timeline(),
+        }
+
+
+def write_report(report: Dict, path: str = DEFAULT_REPORT_PATH):
+    """Grava o relatório em JSON (troca atômica do arquivo)"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp, path)
+    logger.info(f"Relatório do crawl em {path}")
@@ -0,0 +1,332 @@
+"""
+Extração dos dados das páginas de Books to Scrape
+
+Funções puras sobre o HTML já baixado, compartilhadas pelo scraper
+sequencial e pelo motor assíncrono: os dois produzem exatamente os mesmos
+registros.
+
+O backend do BeautifulSoup é lxml quando instalado (bem mais rápido) e
+html.parser caso contrário. Com partial=True só as subárvores usadas por
+cada tipo de página entram na árvore (SoupStrainer): o menu de categorias,
+os article.product_pod e o link da próxima página, ou a tabela do produto,
+a descrição e os <p>. O resultado é o mesmo em qualquer combinação
+(tests/test_parsing.py; benchmark em scripts/bench_parse.py).
+"""
+
+import importlib.util
+import logging
+import re
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+logger = logging.getLogger(__name__)
+
+BASE_URL = "https://books.toscrape.com"
+RATING_MAP = {"One": 1, "Two": 2, "Three": 3, "Four": 4, "Five": 5}
+
+# Ordem das colunas do CSV
+FIELDNAMES = [
+    "id",
+    "title",
+    "price",
+    "availability",
+    "availability_copies",
+    "rating",
+    "category",
+    "product_page_url",
+    "upc",
+    "description",
+    "image_url",
+    "scraped_at",
+]
+
+
+# Tipos de página (URLs da fronteira)
+INDEX = "index"
+CATEGORY = "category"
+LISTING = "listing"
+DETAIL = "detail"
+
+BACKENDS = ("lxml", "html.parser")
+
+
+def available_backends() -> List[str]:
+    """Backends instalados, do mais rápido para o mais lento"""
+    return [
+        backend
+        for backend in BACKENDS
+        if backend == "html.parser" or importlib.util.find_spec(backend)
+    ]
+
+
+DEFAULT_BACKEND = available_backends()[0]
+
+
+def _classes(attrs) -> set:
+    value = attrs.get("class") or ""
+    return set(value.split() if isinstance(value, str) else value)
+
+
+def _index_tags(name: str, attrs) -> bool:
+    return name == "ul" and {"nav", "nav-list"} <= _classes(attrs)
+
+
+def _listing_tags(name: str, attrs) -> bool:
+    if name == "article":
+        return "product_pod" in _classes(attrs)
+    return name == "li" and "next" in _classes(attrs)
+
+
+def _book_tags(name: str, attrs) -> bool:
+    # Todos os <p> ficam: a descrição é o primeiro <p> depois do div
+    if name == "p":
+        return True
+    if name == "table":
+        return "table-striped" in _classes(attrs)
+    return name == "div" and attrs.get("id") == "product_description"
+
+
+STRAINERS = {
+    INDEX: SoupStrainer(_index_tags),
+    CATEGORY: SoupStrainer(_listing_tags),
+    LISTING: SoupStrainer(_listing_tags),
+    DETAIL: SoupStrainer(_book_tags),
+}
+
+
+def make_soup(
+    content: bytes,
+    kind: Optional[str] = None,
+    backend: Optional[str] = None,
+) -> BeautifulSoup:
+    """
+    Árvore do documento
+
+    Args:
+        content: HTML da página
+        kind: Tipo da página; com ele, só as subárvores usadas são montadas
+        backend: Parser do BeautifulSoup (padrão: DEFAULT_BACKEND)
+    """
+    return BeautifulSoup(
+        content,
+        backend or DEFAULT_BACKEND,
+        parse_only=STRAINERS.get(kind) if kind else None,
+    )
+
+
+def extract_rating(book_element) -> int:
+    """Extrai rating do livro"""
+    try:
+        rating_class = book_element.find("p", class_="star-rating")
+        if rating_class:
+            rating_text = rating_class.get("class")[1]
+            return RATING_MAP.get(rating_text, 0)
+    except Exception as e:
+        logger.warning(f"Erro ao extrair rating: {e}")
+    return 0
+
+
+def extract_price(price_text: str) -> float:
+    """Extrai valor numérico do preço"""
+    try:
+        # Remove símbolos de moeda e converte para float
+        return float(price_text.replace("£", "").replace("€", "").strip())
+    except ValueError:
+        return 0.0
+
+
+def parse_availability(availability_text: str) -> Dict:
+    """
+    Parse da string de disponibilidade
+
+    Returns:
+        Dict com 'status' e 'copies'
+    """
+    try:
+        # Ex: "In stock (22 available)"
+        if "In stock" in availability_text:
+            match = re.search(r"\((\d+) available\)", availability_text)
+            copies = int(match.group(1)) if match else 0
+            return {"status": "In stock", "copies": copies}
+        return {"status": "Out of stock", "copies": 0}
+    except Exception as e:
+        logger.warning(f"Erro ao parsear disponibilidade: {e}")
+        return {"status": "Unknown", "copies": 0}
+
+
+def parse_categories(soup: BeautifulSoup, base_url: str = BASE_URL) -> List[Dict]:
+    """
+    Categorias listadas na página inicial
+
+    Returns:
+        Lista de dicts com 'name' e 'url' de cada categoria
+    """
+    categories = []
+    category_list = soup.find("ul", class_="nav nav-list")
+
+    if category_list:
+        # Pula o primeiro item (Books)
+        category_items = category_list.find("ul").find_all("li")
+
+        for item in category_items:
+            link = item.find("a")
+            if link:
+                name = link.text.strip()
+                url = f"{base_url}/{link.get('href')}"
+                categories.append({"name": name, "url": url})
+
+    return categories
+
+
+def parse_listing(
+    soup: BeautifulSoup, page_url: str, base_url: str = BASE_URL
+) -> Tuple[List[Dict], Optional[str]]:
+    """
+    Livros de uma página de listagem e o link da próxima página
+
+    Args:
+        soup: Página de listagem
+        page_url: URL da página (base do link relativo da próxima)
+        base_url: Raiz do site
+
+    Returns:
+        (dados básicos de cada livro, URL da próxima página ou None)
+    """
+    entries = []
+    for idx, book in enumerate(soup.find_all("article", class_="product_pod"), 1):
+        try:
+            # Dados básicos
+            title_element = book.find("h3").find("a")
+            title = title_element.get("title", "")
+            book_path = title_element.get("href", "")
+
+            # Constrói URL completa do livro
+            if book_path.startswith("../../.."):
+                book_path = book_path.replace("../../..", "")
+            book_url = f"{base_url}/catalogue{book_path}"
+
+            # Preço
+            price_element = book.find("p", class_="price_color")
+            price = extract_price(price_element.text) if price_element else 0.0
+
+            # Imagem
+            img_element = book.find("img")
+            img_url = img_element.get("src", "") if img_element else ""
+            if img_url and not img_url.startswith("http"):
+                img_url = f"{base_url}/{img_url.lstrip('../')}"
+
+            entries.append(
+                {
+                    "title": title,
+                    "price": price,
+                    "rating": extract_rating(book),
+                    "product_page_url": book_url,
+                    "image_url": img_url,
+                }
+            )
+        except Exception as e:
+            logger.error(f"Erro ao processar livro {idx}: {e}")
+
+    next_url = None
+    next_button = soup.find("li", class_="next")
+    if next_button:
+        next_link = next_button.find("a")
+        if next_link:
+            base = "/".join(page_url.split("/")[:-1])
+            next_url = f"{base}/{next_link.get('href')}"
+
+    return entries, next_url
+
+
+def parse_book(soup: BeautifulSoup, book_url: str = "") -> Dict:
+    """
+    Detalhes da página de um livro
+
+    Returns:
+        Dict com upc, availability, availability_copies e description
+        (vazio em caso de erro)
+    """
+    try:
+        details = {}
+
+        # UPC e tabela de informações
+        table = soup.find("table", class_="table table-striped")
+        if table:
+            for row in table.find_all("tr"):
+                header = row.find("th").text.strip()
+                value = row.find("td").text.strip()
+                if header == "UPC":
+                    details["upc"] = value
+                elif header == "Availability":
+                    availability = parse_availability(value)
+                    details["availability"] = availability["status"]
+                    details["availability_copies"] = availability["copies"]
+
+        # Descrição do produto
+        product_desc = soup.find("div", id="product_description")
+        if product_desc:
+            desc_p = product_desc.find_next("p")
+            details["description"] = desc_p.text.strip() if desc_p else ""
+        else:
+            details["description"] = ""
+
+        return details
+
+    except Exception as e:
+        logger.error(f"Erro ao extrair detalhes de {book_url}: {e}")
+        return {}
+
+
+# Campos do registro que vêm da página de detalhes
+DETAIL_FIELDS = ("upc", "availability", "availability_copies", "description")
+
+
+def build_record(entry: Dict, details: Dict, category: str) -> Dict:
+    """Registro completo a partir da listagem e da página de detalhes"""
+    return {
+        "title": entry["title"],
+        "price": entry["price"],
+        "rating": entry["rating"],
+        "category": category,
+        "product_page_url": entry["product_page_url"],
+        "image_url": entry["image_url"],
+        "upc": details.get("upc", ""),
+        "availability": details.get("availability", "Unknown"),
+        "availability_copies": details.get("availability_copies", 0),
+        "description": details.get("description", ""),
+        "scraped_at": datetime.utcnow().isoformat(),
+    }
+
+
+def parse_page(
+    kind: str,
+    content: bytes,
+    url: str,
+    base_url: str = BASE_URL,
+    backend: Optional[str] = None,
+    partial: bool = True,
+) -> Dict:
+    """
+    Extrai o conteúdo de uma página conforme o tipo
+
+    Args:
+        kind: Tipo da página (INDEX, CATEGORY, LISTING ou DETAIL)
+        content: HTML da página
+        url: URL da página
+        base_url: Raiz do site
+        backend: Parser do BeautifulSoup (padrão: DEFAULT_BACKEND)
+        partial: Monta só as subárvores usadas (SoupStrainer)
+
+    Returns:
+        {"categories": [...]} para index, {"entries": [...], "next": url}
+        para category/listing e {"details": {...}} para detail
+    """
+    soup = make_soup(content, kind if partial else None, backend)
+    if kind == INDEX:
+        return {"categories": parse_categories(soup, base_url)}
+    if kind in (CATEGORY, LISTING):
+        entries, next_url = parse_listing(soup, url, base_url)
+        return {"entries": entries, "next": next_url}
+    return {"details": parse_book(soup, url)}
@@ -0,0 +1,96 @@
+"""
+Etapas do pipeline do motor assíncrono: busca -> fila -> parse
+
+Os fetchers colocam o HTML bruto numa fila limitada; os parsers retiram
+as páginas e as entregam a um pool de processos, então o parse (CPU) não
+disputa o GIL com o laço de eventos e escala com os núcleos. Fila cheia
+segura os fetchers (backpressure): a memória fica limitada ao tamanho da
+fila mesmo quando a rede é mais rápida que o parse.
+
+Cada etapa conta itens, tempo ocupado e tempo bloqueado na fila (cheia
+para quem coloca, vazia para quem retira).
+"""
+
+import asyncio
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional
+
+DEFAULT_QUEUE_SIZE = 64
+
+
+@dataclass
+class StageStats:
+    """Contadores de uma etapa"""
+
+    items: int = 0
+    busy: float = 0.0  # soma das durações dos itens (sobrepostas com paralelismo)
+    blocked: float = 0.0  # segundos esperando a fila
+
+    def as_dict(self) -> Dict:
+        return {
+            "itens": self.items,
+            "ocupado_s": round(self.busy, 4),
+            "bloqueado_s": round(self.blocked, 4),
+        }
+
+
+class PageQueue:
+    """asyncio.Queue limitada que mede as esperas e a profundidade máxima"""
+
+    def __init__(self, maxsize: int = DEFAULT_QUEUE_SIZE):
+        self.maxsize = maxsize
+        self.max_depth = 0
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize)
+
+    async def put(self, item, stats: StageStats):
+        start = time.perf_counter()
+        await self._queue.put(item)
+        stats.blocked += time.perf_counter() - start
+        self.max_depth = max(self.max_depth, self._queue.qsize())
+
+    async def get(self, stats: StageStats):
+        start = time.perf_counter()
+        item = await self._queue.get()
+        stats.blocked += time.perf_counter() - start
+        return item
+
+    async def close(self, consumers: int):
+        """Um None por consumidor: sinal de fim para os parsers"""
+        for _ in range(consumers):
+            await self._queue.put(None)
+
+    def as_dict(self) -> Dict:
+        return {"capacidade": self.maxsize, "profundidade_maxima": self.max_depth}
+
+
+class ParsePool:
+    """
+    Executa parse(kind, content, url) num pool de processos
+
+    Com workers=0 o parse roda no próprio laço de eventos (sem pool).
+    """
+
+    def __init__(self, parse: Callable[[str, bytes, str], Dict], workers: int = 0):
+        self.parse = parse
+        self.workers = workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def __enter__(self):
+        if self.workers > 0:
+            self._executor = ProcessPoolExecutor(self.workers)
+        return self
+
+    def __exit__(self, *exc):
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+    async def run(self, kind: str, content: bytes, url: str) -> Dict:
+        if self._executor is None:
+            return self.parse(kind, content, url)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, self.parse, kind, content, url
+        )
@@ -0,0 +1,320 @@
+"""
+Gravação e reprodução de respostas HTTP para benchmarks sem rede
+
+ResponseCache guarda as respostas 200 de um crawl em disco, endereçadas
+pelo conteúdo: o corpo fica em objects/<sha256[:2]>/<sha256[2:]> (páginas
+iguais ocupam um arquivo só) e index.json liga o caminho da URL ao hash e
+aos validadores (ETag, Last-Modified). O host não entra na chave, então o
+que foi gravado de books.toscrape.com pode ser servido em qualquer
+endereço.
+
+FixtureServer serve um ResponseCache num servidor HTTP local (uma thread
+por conexão, keep-alive) com latência e erros injetados, para medir os
+dois motores de crawl pela pilha de rede real sem sair da máquina.
+
+Uso:
+    python scripts/scraper.py --record data/http_cache      # grava
+    python -m scripts.crawler.replay build --csv data/books.csv
+    python -m scripts.crawler.replay serve --latency 0.05 --error-rate 0.01
+    python scripts/scraper.py --base-url http://127.0.0.1:8000
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+from scripts.crawler.site import generate_site, load_books
+from scripts.crawler.state import Fetched
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = "data/http_cache"
+
+
+def cache_key(url: str) -> str:
+    """Caminho e query da URL, sem o host ('/' para a raiz)"""
+    parts = urlsplit(url)
+    path = parts.path.rstrip("/") or "/"
+    return f"{path}?{parts.query}" if parts.query else path
+
+
+class ResponseCache:
+    """Respostas gravadas em disco, endereçadas pelo SHA-256 do corpo"""
+
+    def __init__(self, root: str = DEFAULT_CACHE_DIR):
+        self.root = Path(root)
+        self._index_path = self.root / "index.json"
+        self._lock = threading.Lock()
+        self._index: Dict[str, Dict] = {}
+        if self._index_path.exists():
+            self._index = json.loads(self._index_path.read_text(encoding="utf-8"))
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, url: str) -> bool:
+        return cache_key(url) in self._index
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.save()
+
+    def _object(self, digest: str) -> Path:
+        return self.root / "objects" / digest[:2] / digest[2:]
+
+    def store(self, url: str, fetched: Fetched):
+        """Grava o corpo (se ainda não existe) e aponta a URL para ele"""
+        digest = hashlib.sha256(fetched.content).hexdigest()
+        path = self._object(digest)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+            tmp.write_bytes(fetched.content)
+            os.replace(tmp, path)
+        with self._lock:
+            self._index[cache_key(url)] = {
+                "sha256": digest,
+                "etag": fetched.etag,
+                "last_modified": fetched.last_modified,
+            }
+
+    def load(self, url: str) -> Optional[Fetched]:
+        """Resposta gravada para a URL (None se não houver)"""
+        entry = self._index.get(cache_key(url))
+        if entry is None:
+            return None
+        return Fetched(
+            200,
+            self._object(entry["sha256"]).read_bytes(),
+            entry["etag"] or f'"{entry["sha256"][:16]}"',
+            entry["last_modified"],
+        )
+
+    def save(self):
+        """Grava o índice (troca atômica do arquivo)"""
+        self.root.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            data = json.dumps(self._index, indent=1, sort_keys=True)
+        tmp = self._index_path.with_name(f".index.json.{os.getpid()}.tmp")
+        tmp.write_text(data, encoding="utf-8")
+        os.replace(tmp, self._index_path)
+
+    def stats(self) -> Dict:
+        objects = {entry["sha256"] for entry in self._index.values()}
+        return {"urls": len(self._index), "objetos": len(objects)}
+
+
+def build_cache(
+    csv_path: str = "data/books.csv",
+    root: str = DEFAULT_CACHE_DIR,
+    per_page: int = 20,
+) -> ResponseCache:
+    """Cache com o site gerado a partir do CSV (scripts/crawler/site.py)"""
+    cache = ResponseCache(root)
+    for path, content in generate_site(load_books(csv_path), per_page).items():
+        cache.store(path, Fetched(200, content))
+    cache.save()
+    return cache
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive: os clientes reaproveitam conexões
+
+    def do_GET(self):
+        server: "FixtureServer" = self.server.fixture
+        status, fetched = server.respond(self.path)
+        if status >= 400:
+            self.send_response(status)
+            if status == server.error_status and server.retry_after is not None:
+                self.send_header("Retry-After", str(server.retry_after))
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        if fetched.etag and self.headers.get("If-None-Match") == fetched.etag:
+            status = 304
+        self.send_response(status)
+        if fetched.etag:
+            self.send_header("ETag", fetched.etag)
+        if fetched.last_modified:
+            self.send_header("Last-Modified", fetched.last_modified)
+        body = fetched.content if status == 200 else b""
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FixtureServer:
+    """Servidor HTTP local que responde a partir de um ResponseCache"""
+
+    def __init__(
+        self,
+        cache: ResponseCache,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        retry_after: Optional[int] = None,
+        seed: Optional[int] = None,
+        capacity: Optional[int] = None,
+    ):
+        """
+        Configura o servidor (start() ou `with` para iniciar)
+
+        Args:
+            cache: Respostas servidas
+            host: Endereço de escuta
+            port: Porta (0: qualquer uma livre)
+            latency: Espera antes de cada resposta (segundos)
+            jitter: Espera extra aleatória, de 0 a jitter segundos
+            error_rate: Fração das requisições respondidas com error_status
+            error_status: Status dos erros injetados
+            retry_after: Segundos no Retry-After dos erros injetados
+            seed: Semente dos sorteios (erros e jitter reproduzíveis)
+            capacity: Requisições simultâneas atendidas; as excedentes
+                recebem error_status (servidor sobrecarregado)
+        """
+        self.cache = cache
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.retry_after = retry_after
+        self.capacity = capacity
+        self.active = 0
+        self.max_active = 0
+        self.requests: Counter = Counter()
+        self.errors = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.fixture = self
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def start(self) -> "FixtureServer":
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever, name="fixture-server", daemon=True
+        )
+        self._thread.start()
+        logger.info(f"Servindo {len(self.cache)} páginas em {self.base_url}")
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def reset(self):
+        """Zera os contadores (entre duas medições)"""
+        with self._lock:
+            self.requests.clear()
+            self.errors = 0
+            self.max_active = 0
+
+    def respond(self, path: str) -> Tuple[int, Optional[Fetched]]:
+        """Status e resposta para o caminho, após a latência simulada"""
+        with self._lock:
+            self.requests[cache_key(path)] += 1
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+            delay = self.latency + self._random.uniform(0, self.jitter)
+            failed = self._random.random() < self.error_rate or (
+                self.capacity is not None and self.active > self.capacity
+            )
+            if failed:
+                self.errors += 1
+        try:
+            if delay:
+                time.sleep(delay)
+        finally:
+            with self._lock:
+                self.active -= 1
+        if failed:
+            return self.error_status, None
+        fetched = self.cache.load(path)
+        if fetched is None:
+            return 404, None
+        return 200, fetched
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build = commands.add_parser("build", help="Gera o site a partir do CSV")
+    build.add_argument("--csv", default="data/books.csv")
+    build.add_argument("--cache", default=DEFAULT_CACHE_DIR)
+    build.add_argument("--per-page", type=int, default=20)
+
+    serve = commands.add_parser("serve", help="Serve o cache num servidor local")
+    serve.add_argument("--cache", default=DEFAULT_CACHE_DIR)
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8000)
+    serve.add_argument("--latency", type=float, default=0.0)
+    serve.add_argument("--jitter", type=float, default=0.0)
+    serve.add_argument("--error-rate", type=float, default=0.0)
+    serve.add_argument("--error-status", type=int, default=503)
+    serve.add_argument("--retry-after", type=int, default=None)
+    serve.add_argument("--seed", type=int, default=None)
+    serve.add_argument("--capacity", type=int, default=None)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s - %(message)s")
+    if args.command == "build":
+        cache = build_cache(args.csv, args.cache, args.per_page)
+        logger.info(f"Cache em {args.cache}: {cache.stats()}")
+        return
+
+    server = FixtureServer(
+        ResponseCache(args.cache),
+        host=args.host,
+        port=args.port,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        retry_after=args.retry_after,
+        seed=args.seed,
+        capacity=args.capacity,
+    )
+    with server:
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,297 @@
+"""
+Destinos de registros gravados à medida que o crawl avança
+
+Os sinks recebem um livro por vez (memória constante) e escrevem num
+arquivo temporário no mesmo diretório; close() faz fsync e troca o
+arquivo final com os.replace, então a API nunca lê um data/books.csv
+pela metade. Um crawl que termina sem registros (ou com erro) descarta o
+temporário e mantém o arquivo anterior.
+
+Formatos: CSV, NDJSON e colunar em row groups (Parquet com pyarrow; sem
+pyarrow, .npz com um array por coluna e row group, lido por
+read_columnar).
+
+RecordStream fica entre a fronteira e os sinks: libera os registros na
+ordem do crawl (chave abaixo da marca d'água da fronteira) e atribui os
+ids na hora, os mesmos do crawl sequencial.
+"""
+
+import csv
+import heapq
+import io
+import itertools
+import json
+import logging
+import os
+import zipfile
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from scripts.crawler.frontier import Key
+from scripts.crawler.parsing import FIELDNAMES
+from scripts.crawler.state import CrawlState
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # dependência opcional
+    pa = pq = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ROW_GROUP_SIZE = 1000
+
+
+class RecordSink:
+    """Destino de registros em arquivo, trocado atomicamente no close()"""
+
+    def __init__(self, path: str, allow_empty: bool = False):
+        self.path = Path(path)
+        self.allow_empty = allow_empty
+        self.count = 0
+        self._tmp = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        self._file = None
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def open(self) -> "RecordSink":
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self._tmp, "w+b")
+        self._start()
+        return self
+
+    def write(self, record: Dict):
+        self._write(record)
+        self.count += 1
+
+    def close(self):
+        """Finaliza o arquivo e o coloca no lugar do anterior"""
+        if self._file is None:
+            return
+        if not self.count and not self.allow_empty:
+            logger.warning("Nenhum livro para salvar")
+            self.abort()
+            return
+        self._finish()
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        self._file = None
+        os.replace(self._tmp, self.path)
+        logger.info(f"Dados salvos em {self.path} ({self.count} registros)")
+
+    def abort(self):
+        """Descarta o temporário e mantém o arquivo anterior"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._tmp.unlink(missing_ok=True)
+
+    def _start(self):
+        pass
+
+    def _write(self, record: Dict):
+        raise NotImplementedError
+
+    def _finish(self):
+        pass
+
+
+class CsvSink(RecordSink):
+    """CSV com as colunas de FIELDNAMES (o formato lido pela API)"""
+
+    def _start(self):
+        self._text = io.TextIOWrapper(
+            self._file, encoding="utf-8", newline="", write_through=True
+        )
+        self._writer = csv.DictWriter(self._text, fieldnames=FIELDNAMES)
+        self._writer.writeheader()
+
+    def _write(self, record: Dict):
+        self._writer.writerow(record)
+
+    def _finish(self):
+        self._text.flush()
+        self._text.detach()
+
+
+class NdjsonSink(RecordSink):
+    """Um objeto JSON por linha, com as chaves na ordem de FIELDNAMES"""
+
+    def _write(self, record: Dict):
+        line = json.dumps({name: record.get(name) for name in FIELDNAMES})
+        self._file.write(line.encode("utf-8") + b"\n")
+
+
+class ColumnarSink(RecordSink):
+    """
+    Colunar em row groups de row_group_size linhas
+
+    Só o row group corrente fica em memória. Com pyarrow o arquivo é
+    Parquet; sem pyarrow é um .npz com os arrays `rg00000/<coluna>`.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+        allow_empty: bool = False,
+    ):
+        path = Path(path)
+        if pq is None and path.suffix == ".parquet":
+            logger.warning("pyarrow não instalado; gravando row groups em .npz")
+            path = path.with_suffix(".npz")
+        super().__init__(str(path), allow_empty)
+        self.row_group_size = max(1, row_group_size)
+        self.row_groups = 0
+        self._rows: List[Dict] = []
+
+    def _start(self):
+        if pq is not None:
+            self._writer = pq.ParquetWriter(self._file, _arrow_schema())
+        else:
+            self._zip = zipfile.ZipFile(self._file, "w")
+
+    def _write(self, record: Dict):
+        self._rows.append(record)
+        if len(self._rows) >= self.row_group_size:
+            self._flush_rows()
+
+    def _flush_rows(self):
+        if not self._rows:
+            return
+        columns = {name: [row.get(name) for row in self._rows] for name in FIELDNAMES}
+        if pq is not None:
+            self._writer.write_table(pa.table(columns, schema=self._writer.schema))
+        else:
+            for name, values in columns.items():
+                entry = f"rg{self.row_groups:05d}/{name}.npy"
+                with self._zip.open(entry, "w") as member:
+                    np.lib.format.write_array(
+                        member, np.asarray(values), allow_pickle=False
+                    )
+        self.row_groups += 1
+        self._rows = []
+
+    def _finish(self):
+        self._flush_rows()
+        if pq is not None:
+            self._writer.close()
+        else:
+            self._zip.close()
+
+
+def _arrow_schema():
+    types = {
+        "id": pa.int64(),
+        "price": pa.float64(),
+        "availability_copies": pa.int64(),
+        "rating": pa.int64(),
+    }
+    return pa.schema([(name, types.get(name, pa.string())) for name in FIELDNAMES])
+
+
+def read_columnar(path: str) -> pd.DataFrame:
+    """Lê um arquivo do ColumnarSink (Parquet ou .npz)"""
+    if not zipfile.is_zipfile(path):
+        return pd.read_parquet(path)
+    with np.load(path, allow_pickle=False) as data:
+        groups = sorted({name.split("/")[0] for name in data.files})
+        if not groups:
+            return pd.DataFrame(columns=FIELDNAMES)
+        return pd.DataFrame(
+            {
+                name: np.concatenate([data[f"{group}/{name}"] for group in groups])
+                for name in FIELDNAMES
+            }
+        )
+
+
+def open_sink(
+    path: str,
+    row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+    allow_empty: bool = False,
+) -> RecordSink:
+    """Sink pelo sufixo do arquivo (.csv, .ndjson/.jsonl, .parquet/.npz)"""
+    suffix = Path(path).suffix.lower()
+    if suffix in (".ndjson", ".jsonl"):
+        return NdjsonSink(path, allow_empty)
+    if suffix in (".parquet", ".npz"):
+        return ColumnarSink(path, row_group_size, allow_empty)
+    if suffix == ".csv":
+        return CsvSink(path, allow_empty)
+    raise ValueError(f"Formato de saída não suportado: {path}")
+
+
+class ListSink:
+    """Coleta os registros em memória (scrape_all_books)"""
+
+    def __init__(self):
+        self.records: List[Dict] = []
+        self.count = 0
+
+    def write(self, record: Dict):
+        self.records.append(record)
+        self.count += 1
+
+
+class RecordStream:
+    """Registros da fronteira para os sinks, em ordem e com ids"""
+
+    def __init__(
+        self,
+        sink,
+        state: Optional[CrawlState] = None,
+        changes=None,
+    ):
+        """
+        Args:
+            sink: Recebe todos os livros
+            state: Estado do crawl anterior (marca os livros alterados)
+            changes: Recebe só os livros novos ou alterados
+        """
+        self.sink = sink
+        self.state = state
+        self.changes = changes
+        self.count = 0
+        self._heap: List[Tuple[Key, int, Dict]] = []
+        self._seq = itertools.count()
+
+    @property
+    def buffered(self) -> int:
+        """Registros aguardando os anteriores na ordem do crawl"""
+        return len(self._heap)
+
+    def push(self, records: List[Tuple[Key, Dict]], watermark: Optional[Key]):
+        """
+        Acrescenta registros e libera os que estão abaixo da marca d'água
+
+        Args:
+            records: (chave de ordem, registro)
+            watermark: Frontier.watermark(); None libera todos
+        """
+        for key, record in records:
+            heapq.heappush(self._heap, (key, next(self._seq), record))
+        while self._heap and (watermark is None or self._heap[0][0] < watermark):
+            self._emit(heapq.heappop(self._heap)[2])
+
+    def finish(self):
+        self.push([], None)
+
+    def _emit(self, record: Dict):
+        self.count += 1
+        record["id"] = self.count
+        changed = self.state.reconcile(record) if self.state is not None else True
+        self.sink.write(record)
+        if changed and self.changes is not None:
+            self.changes.write(record)
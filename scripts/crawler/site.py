@@ -0,0 +1,208 @@
+"""
+Gerador de um site no formato de books.toscrape.com
+
+Monta as páginas (início com o menu de categorias, listagens paginadas de
+cada categoria e a página de cada livro) a partir de registros no esquema
+do CSV, por exemplo data/books.csv. Serve de site local para testes e
+benchmarks sem rede: o crawl do site gerado devolve os mesmos registros.
+"""
+
+import html
+from collections import OrderedDict
+from typing import Dict, Iterable, List
+from urllib.parse import urlsplit
+
+import pandas as pd
+
+from scripts.crawler.parsing import RATING_MAP
+
+RATING_WORDS = {value: word for word, value in RATING_MAP.items()}
+
+_HEAD = """<!DOCTYPE html>
+<html lang="en-us" class="no-js">
+    <head>
+        <title>{title} | Books to Scrape - Sandbox</title>
+        <meta http-equiv="content-type" content="text/html; charset=UTF-8" />
+        <meta name="viewport" content="width=device-width" />
+        <link rel="stylesheet" type="text/css" href="{root}static/oscar/css/styles.css" />
+    </head>
+    <body id="default" class="default">
+        <header class="header container-fluid">
+            <div class="page_inner"><div class="row">
+                <div class="col-sm-8 h1"><a href="{root}index.html">Books to Scrape</a>
+                <small> We love being scraped!</small></div>
+            </div></div>
+        </header>
+        <div class="container-fluid page"><div class="page_inner">
+"""
+
+_FOOT = """
+        </div></div>
+        <footer class="footer container-fluid"></footer>
+        <script src="{root}static/oscar/js/jquery/jquery-1.9.1.min.js"></script>
+        <script src="{root}static/oscar/js/oscar/ui.js"></script>
+    </body>
+</html>
+"""
+
+
+def _slug(product_page_url: str) -> str:
+    """'https://.../catalogue/olio_984/index.html' -> 'olio_984'"""
+    return urlsplit(product_page_url).path.split("/catalogue/")[1].rsplit("/", 1)[0]
+
+
+def _category_folder(name: str, index: int) -> str:
+    return f"{name.lower().replace(' ', '-')}_{index}"
+
+
+def _availability(book: Dict) -> str:
+    if book["availability"] == "In stock":
+        copies = int(book["availability_copies"])
+        return f"In stock ({copies} available)" if copies else "In stock"
+    return book["availability"]
+
+
+def _sidebar(categories: List[str], root: str) -> str:
+    items = "".join(
+        f'\n<li>\n    <a href="{root}catalogue/category/books/'
+        f'{_category_folder(name, index)}/index.html">\n        {html.escape(name)}\n'
+        f"    </a>\n</li>"
+        for index, name in enumerate(categories, 2)
+    )
+    return (
+        '<aside class="sidebar col-sm-4 col-md-3 col-lg-3"><div class="side_categories">'
+        f'<ul class="nav nav-list"><li><a href="{root}catalogue/category/books_1/'
+        f'index.html">Books</a><ul>{items}</ul></li></ul></div></aside>'
+    )
+
+
+def _product_pod(book: Dict) -> str:
+    slug = _slug(book["product_page_url"])
+    title = html.escape(book["title"], quote=True)
+    image = urlsplit(book["image_url"]).path.lstrip("/")
+    stars = '<i class="icon-star"></i>' * 5
+    return f"""
+<li class="col-xs-6 col-sm-4 col-md-3 col-lg-3">
+    <article class="product_pod">
+        <div class="image_container">
+            <a href="../../../{slug}/index.html"><img src="../../../../{image}" alt="{title}" class="thumbnail"></a>
+        </div>
+        <p class="star-rating {RATING_WORDS.get(int(book["rating"]), "Zero")}">{stars}</p>
+        <h3><a href="../../../{slug}/index.html" title="{title}">{html.escape(book["title"][:30])}</a></h3>
+        <div class="product_price">
+            <p class="price_color">£{float(book["price"]):.2f}</p>
+            <p class="instock availability"><i class="icon-ok"></i> {html.escape(book["availability"])}</p>
+            <form><button type="submit" class="btn btn-primary btn-block">Add to basket</button></form>
+        </div>
+    </article>
+</li>"""
+
+
+def _listing(
+    name: str, books: List[Dict], page: int, pages: int, categories: List[str]
+) -> str:
+    root = "../../../../"
+    pager = f'<li class="current">Page {page} of {pages}</li>'
+    if page > 1:
+        previous = "index.html" if page == 2 else f"page-{page - 1}.html"
+        pager = f'<li class="previous"><a href="{previous}">previous</a></li>' + pager
+    if page < pages:
+        pager += f'<li class="next"><a href="page-{page + 1}.html">next</a></li>'
+    parts = [
+        _HEAD.format(title=html.escape(name), root=root),
+        '<div class="row">',
+        _sidebar(categories, root),
+        '<div class="col-sm-8 col-md-9"><div class="page-header action">',
+        f'<h1>{html.escape(name)}</h1></div><section><div><ol class="row">',
+        *(_product_pod(book) for book in books),
+        f'</ol><div><ul class="pager">{pager}</ul></div>',
+        "</div></section></div></div>",
+        _FOOT.format(root=root),
+    ]
+    return "".join(parts)
+
+
+def _product_page(book: Dict) -> str:
+    root = "../../"
+    title = html.escape(book["title"])
+    price = f"£{float(book['price']):.2f}"
+    description = ""
+    if book["description"]:
+        description = (
+            '<div id="product_description" class="sub-header"><h2>Product Description'
+            f"</h2></div>\n<p>{html.escape(book['description'])}</p>"
+        )
+    rows = [
+        ("UPC", html.escape(book["upc"])),
+        ("Product Type", "Books"),
+        ("Price (excl. tax)", price),
+        ("Price (incl. tax)", price),
+        ("Tax", "£0.00"),
+        ("Availability", html.escape(_availability(book))),
+        ("Number of reviews", "0"),
+    ]
+    table = "".join(f"<tr><th>{th}</th><td>{td}</td></tr>" for th, td in rows)
+    return (
+        _HEAD.format(title=title, root=root)
+        + f"""<article class="product_page"><div class="row">
+    <div class="col-sm-6 product_main">
+        <h1>{title}</h1>
+        <p class="price_color">{price}</p>
+        <p class="instock availability">{html.escape(_availability(book))}</p>
+        <p class="star-rating {RATING_WORDS.get(int(book["rating"]), "Zero")}"></p>
+    </div></div>
+{description}
+<div class="sub-header"><h2>Product Information</h2></div>
+<table class="table table-striped">{table}</table>
+</article>"""
+        + _FOOT.format(root=root)
+    )
+
+
+def generate_site(books: Iterable[Dict], per_page: int = 20) -> Dict[str, bytes]:
+    """
+    Páginas do site para os livros
+
+    Args:
+        books: Registros no esquema do CSV (title, price, rating, category,
+            product_page_url, image_url, upc, availability,
+            availability_copies, description)
+        per_page: Livros por página de listagem
+
+    Returns:
+        Caminho da URL ("/", "/catalogue/...") -> HTML
+    """
+    by_category: Dict[str, List[Dict]] = OrderedDict()
+    for book in books:
+        by_category.setdefault(book["category"], []).append(book)
+    categories = list(by_category)
+
+    pages = {}
+    for index, (name, category_books) in enumerate(by_category.items(), 2):
+        folder = f"/catalogue/category/books/{_category_folder(name, index)}"
+        chunks = [
+            category_books[i : i + per_page]
+            for i in range(0, len(category_books), per_page)
+        ]
+        for number, chunk in enumerate(chunks, 1):
+            page = "index.html" if number == 1 else f"page-{number}.html"
+            pages[f"{folder}/{page}"] = _listing(
+                name, chunk, number, len(chunks), categories
+            )
+            for book in chunk:
+                path = urlsplit(book["product_page_url"]).path
+                pages.setdefault(path, _product_page(book))
+
+    pages["/"] = (
+        _HEAD.format(title="All products", root="")
+        + '<div class="row">'
+        + _sidebar(categories, "")
+        + "</div>"
+        + _FOOT.format(root="")
+    )
+    return {path: content.encode("utf-8") for path, content in pages.items()}
+
+
+def load_books(csv_path: str = "data/books.csv") -> List[Dict]:
+    """Registros do CSV na ordem do arquivo"""
+    return pd.read_csv(csv_path, keep_default_na=False).to_dict("records")
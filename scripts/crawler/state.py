@@ -0,0 +1,212 @@
+"""
+Estado do crawl por URL para re-scrape incremental (SQLite)
+
+Para cada URL ficam guardados ETag, Last-Modified, hash do conteúdo,
+horário da última visita e o resultado do parse. Nas execuções seguintes
+as requisições levam If-None-Match / If-Modified-Since: um 304 (ou um 200
+com o mesmo hash, em servidores sem validadores) reaproveita o parse
+guardado, sem baixar ou parsear a página de novo. As listagens continuam
+sendo percorridas a partir do parse guardado, então a fronteira enxerga
+o mesmo site.
+
+Os registros também são guardados (hash sem id e scraped_at): reconcile()
+aponta os livros novos ou alterados e mantém o scraped_at dos que não
+mudaram.
+"""
+
+import hashlib
+import json
+import logging
+import sqlite3
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STATE_PATH = "data/crawl_state.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    url TEXT PRIMARY KEY,
+    etag TEXT,
+    last_modified TEXT,
+    content_hash TEXT NOT NULL,
+    last_seen TEXT NOT NULL,
+    parsed TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS records (
+    url TEXT NOT NULL,
+    category TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    scraped_at TEXT NOT NULL,
+    last_seen TEXT NOT NULL,
+    PRIMARY KEY (url, category)
+);
+"""
+
+
+class Fetched(NamedTuple):
+    """Resposta de uma busca (content vazio em 304)"""
+
+    status: int
+    content: bytes
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+
+def _digest(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
+def _record_digest(book: Dict) -> str:
+    fields = {k: v for k, v in book.items() if k not in ("id", "scraped_at")}
+    return _digest(json.dumps(fields, sort_keys=True).encode())
+
+
+class CrawlState:
+    """Estado persistente de páginas e registros de um crawl"""
+
+    def __init__(self, path: str = DEFAULT_STATE_PATH):
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self._conn = sqlite3.connect(path)
+        self._conn.executescript(_SCHEMA)
+        self._started = datetime.utcnow().isoformat()
+        self.counters: Counter = Counter()
+
+    def close(self):
+        self._conn.commit()
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # Páginas
+
+    def headers(self, url: str) -> Dict[str, str]:
+        """Headers de requisição condicional para a URL (vazio se nova)"""
+        row = self._conn.execute(
+            "SELECT etag, last_modified FROM pages WHERE url = ?", (url,)
+        ).fetchone()
+        headers = {}
+        if row and row[0]:
+            headers["If-None-Match"] = row[0]
+        if row and row[1]:
+            headers["If-Modified-Since"] = row[1]
+        return headers
+
+    def cached(self, url: str, fetched: Fetched) -> Optional[Dict]:
+        """
+        Parse guardado se a página não mudou (304 ou mesmo hash)
+
+        Returns:
+            Resultado guardado ou None se a página precisa ser parseada
+            (ou se veio um 304 sem estado, que não tem o que parsear)
+        """
+        row = self._conn.execute(
+            "SELECT content_hash, parsed FROM pages WHERE url = ?", (url,)
+        ).fetchone()
+
+        if fetched.status == 304:
+            if row is None:
+                logger.error(f"304 sem estado guardado para {url}")
+                return None
+            self.counters["nao_modificadas"] += 1
+            self._conn.execute(
+                "UPDATE pages SET last_seen = ? WHERE url = ?", (self._started, url)
+            )
+            return json.loads(row[1])
+
+        if row is None or row[0] != _digest(fetched.content):
+            return None
+        self.counters["mesmo_conteudo"] += 1
+        self._conn.execute(
+            "UPDATE pages SET etag = ?, last_modified = ?, last_seen = ? WHERE url = ?",
+            (fetched.etag, fetched.last_modified, self._started, url),
+        )
+        return json.loads(row[1])
+
+    def store(self, url: str, fetched: Fetched, parsed: Dict):
+        """Guarda validadores, hash e o parse de uma página nova ou alterada"""
+        self.counters["parseadas"] += 1
+        self._conn.execute(
+            "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                url,
+                fetched.etag,
+                fetched.last_modified,
+                _digest(fetched.content),
+                self._started,
+                json.dumps(parsed),
+            ),
+        )
+
+    def resolve(
+        self,
+        kind: str,
+        url: str,
+        fetched: Optional[Fetched],
+        parse: Callable[[str, bytes, str], Dict],
+    ) -> Optional[Dict]:
+        """
+        Resultado do parse da página, reaproveitado quando ela não mudou
+
+        Args:
+            kind: Tipo da URL na fronteira
+            url: URL buscada
+            fetched: Resposta da busca ou None se ela falhou
+            parse: parse(kind, content, url), chamado só se a página mudou
+
+        Returns:
+            Resultado de parse_page ou None se a busca falhou
+        """
+        if fetched is None:
+            return None
+        parsed = self.cached(url, fetched)
+        if parsed is None and fetched.status != 304:
+            parsed = parse(kind, fetched.content, url)
+            self.store(url, fetched, parsed)
+        return parsed
+
+    # Registros
+
+    def reconcile(self, book: Dict) -> bool:
+        """
+        Compara o livro com o da execução anterior
+
+        Um livro inalterado recebe de volta o scraped_at guardado.
+
+        Returns:
+            True se o livro é novo ou mudou
+        """
+        key = (book["product_page_url"], book["category"])
+        digest = _record_digest(book)
+        row = self._conn.execute(
+            "SELECT content_hash, scraped_at FROM records "
+            "WHERE url = ? AND category = ?",
+            key,
+        ).fetchone()
+        changed = row is None or row[0] != digest
+        if changed:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO records VALUES (?, ?, ?, ?, ?)",
+                (*key, digest, book["scraped_at"], self._started),
+            )
+        else:
+            book["scraped_at"] = row[1]
+            self._conn.execute(
+                "UPDATE records SET last_seen = ? WHERE url = ? AND category = ?",
+                (self._started, *key),
+            )
+        self.counters["registros_alterados"] += int(changed)
+        return changed
+
+    def stats(self) -> Dict:
+        """Contadores da execução"""
+        return dict(self.counters)
@@ -0,0 +1,494 @@
+"""
+Teste de carga HTTP da API com percentis de latência por endpoint
+
+Sobe a API localmente (ou usa --base-url) e reproduz um mix ponderado de
+requisições (listagem, busca, gênero, detalhe, estatísticas, amostra ML)
+com concorrência fixa (loop fechado) ou taxa fixa (loop aberto).
+Reporta throughput e p50/p95/p99 por endpoint, compara com um baseline
+salvo e retorna código de saída 1 quando algum limite regride.
+
+O baseline depende da máquina: gere-o com --save-baseline no mesmo
+ambiente em que as comparações serão feitas.
+
+Uso:
+    python -m scripts.loadtest --duration 20 --concurrency 16
+    python -m scripts.loadtest --rate 200 --duration 30
+    python -m scripts.loadtest --save-baseline
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+DEFAULT_BASELINE = Path(__file__).with_name("loadtest_baseline.json")
+
+SEARCH_TERMS = [
+    "love",
+    "the",
+    "life",
+    "world",
+    "war",
+    "house",
+    "girl",
+    "night",
+    "himalayas",
+    "a",
+]
+SORT_FIELDS = ["price", "rating", "title", None]
+
+
+@dataclass
+class Catalog:
+    """Informações do dataset usadas para gerar requisições realistas"""
+
+    total_books: int = 1000
+    genres: List[str] = field(default_factory=lambda: ["Poetry"])
+
+
+def _list_request(rng: random.Random, catalog: Catalog) -> str:
+    params = [f"page={rng.randint(1, 5)}", f"per_page={rng.choice([10, 20, 50])}"]
+    sort = rng.choice(SORT_FIELDS)
+    if sort:
+        params.append(f"sort={sort}&order={rng.choice(['asc', 'desc'])}")
+    if rng.random() < 0.3:
+        params.append(f"min_rating={rng.randint(1, 5)}")
+    if rng.random() < 0.3:
+        params.append(
+            f"min_price={rng.randint(10, 30)}&max_price={rng.randint(30, 60)}"
+        )
+    return "/books?" + "&".join(params)
+
+
+def _search_request(rng: random.Random, catalog: Catalog) -> str:
+    return f"/books/search?q={rng.choice(SEARCH_TERMS)}&per_page=20"
+
+
+def _genre_request(rng: random.Random, catalog: Catalog) -> str:
+    return f"/books/genre/{rng.choice(catalog.genres)}?per_page=20"
+
+
+def _detail_request(rng: random.Random, catalog: Catalog) -> str:
+    return f"/books/{rng.randint(1, max(catalog.total_books, 1))}"
+
+
+def _stats_request(rng: random.Random, catalog: Catalog) -> str:
+    return "/stats"
+
+
+def _ml_sample_request(rng: random.Random, catalog: Catalog) -> str:
+    return f"/ml/sample?size={rng.choice([100, 500, 1000])}&random_state={rng.randint(0, 99)}"
+
+
+# Mix ponderado: (nome do endpoint, peso, gerador de URL)
+DEFAULT_MIX: List[Tuple[str, float, Callable[[random.Random, Catalog], str]]] = [
+    ("list", 35, _list_request),
+    ("search", 20, _search_request),
+    ("genre", 15, _genre_request),
+    ("detail", 20, _detail_request),
+    ("stats", 5, _stats_request),
+    ("ml_sample", 5, _ml_sample_request),
+]
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Percentil pelo método nearest-rank (lista já ordenada)"""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(pct / 100.0 * len(sorted_values)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def _is_error(status: str) -> bool:
+    """5xx, 429 e falhas de transporte contam como erro (404 de página não)"""
+    return not status.isdigit() or status == "429" or status.startswith("5")
+
+
+class Recorder:
+    """Acumula latências e status por endpoint"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {}
+        self.statuses: Dict[str, Dict[str, int]] = {}
+
+    def record(self, endpoint: str, seconds: float, status: str):
+        self.latencies.setdefault(endpoint, []).append(seconds)
+        counts = self.statuses.setdefault(endpoint, {})
+        counts[status] = counts.get(status, 0) + 1
+
+    def summary(self, elapsed: float) -> Dict[str, Dict[str, float]]:
+        """Resumo por endpoint e total (latências em ms)"""
+        result = {}
+        everything: List[float] = []
+        total_errors = 0
+        for endpoint in sorted(self.latencies):
+            values = sorted(self.latencies[endpoint])
+            everything.extend(values)
+            errors = sum(
+                count
+                for status, count in self.statuses[endpoint].items()
+                if _is_error(status)
+            )
+            total_errors += errors
+            result[endpoint] = self._stats(values, errors, elapsed)
+            result[endpoint]["status"] = dict(self.statuses[endpoint])
+        result["total"] = self._stats(sorted(everything), total_errors, elapsed)
+        return result
+
+    @staticmethod
+    def _stats(values: List[float], errors: int, elapsed: float) -> Dict[str, float]:
+        return {
+            "requisicoes": len(values),
+            "erros": errors,
+            "throughput_rps": round(len(values) / elapsed, 2) if elapsed else 0.0,
+            "p50_ms": round(percentile(values, 50) * 1000, 3),
+            "p95_ms": round(percentile(values, 95) * 1000, 3),
+            "p99_ms": round(percentile(values, 99) * 1000, 3),
+        }
+
+
+class LoadGenerator:
+    """Gera carga contra a API seguindo o mix ponderado"""
+
+    def __init__(self, base_url: str, mix=None, seed: int = 42, timeout: float = 30.0):
+        self.base_url = base_url.rstrip("/")
+        self.mix = mix or DEFAULT_MIX
+        self.rng = random.Random(seed)
+        self.timeout = timeout
+        self.catalog = Catalog()
+        self.recorder = Recorder()
+        self._names = [name for name, _, _ in self.mix]
+        self._weights = [weight for _, weight, _ in self.mix]
+        self._builders = {name: builder for name, _, builder in self.mix}
+
+    async def discover(self, client: httpx.AsyncClient):
+        """Consulta total de livros e gêneros para montar URLs válidas"""
+        try:
+            health = (await client.get("/health")).json()
+            self.catalog.total_books = int(health.get("total_livros") or 1000)
+            genres = (await client.get("/books/genres")).json().get("generos", [])
+            if genres:
+                self.catalog.genres = [genre["nome"] for genre in genres]
+        except (httpx.HTTPError, ValueError) as e:
+            logger.warning(f"Não foi possível descobrir o catálogo: {e}")
+
+    def next_request(self) -> Tuple[str, str]:
+        endpoint = self.rng.choices(self._names, weights=self._weights)[0]
+        return endpoint, self._builders[endpoint](self.rng, self.catalog)
+
+    async def _send(
+        self, client: httpx.AsyncClient, endpoint: str, url: str, started: float
+    ):
+        try:
+            response = await client.get(url)
+            status = str(response.status_code)
+        except httpx.HTTPError as e:
+            status = type(e).__name__
+        self.recorder.record(endpoint, time.perf_counter() - started, status)
+
+    async def run_closed_loop(self, concurrency: int, duration: float) -> float:
+        """N clientes enviando a próxima requisição assim que a anterior termina"""
+        limits = httpx.Limits(
+            max_connections=concurrency, max_keepalive_connections=concurrency
+        )
+        async with httpx.AsyncClient(
+            base_url=self.base_url, timeout=self.timeout, limits=limits
+        ) as client:
+            await self.discover(client)
+            start = time.perf_counter()
+            deadline = start + duration
+
+            async def worker():
+                while time.perf_counter() < deadline:
+                    endpoint, url = self.next_request()
+                    await self._send(client, endpoint, url, time.perf_counter())
+
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+            return time.perf_counter() - start
+
+    async def run_open_loop(
+        self, rate: float, duration: float, max_in_flight: int
+    ) -> float:
+        """
+        Requisições disparadas em taxa fixa, independente das respostas
+
+        A latência é medida a partir do horário agendado, evitando que a
+        lentidão do servidor reduza a carga (coordinated omission).
+        """
+        limits = httpx.Limits(
+            max_connections=max_in_flight, max_keepalive_connections=max_in_flight
+        )
+        async with httpx.AsyncClient(
+            base_url=self.base_url, timeout=self.timeout, limits=limits
+        ) as client:
+            await self.discover(client)
+            semaphore = asyncio.Semaphore(max_in_flight)
+            tasks = []
+            start = time.perf_counter()
+            total = int(rate * duration)
+
+            async def fire(endpoint, url, scheduled):
+                async with semaphore:
+                    await self._send(client, endpoint, url, scheduled)
+
+            for i in range(total):
+                scheduled = start + i / rate
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                endpoint, url = self.next_request()
+                tasks.append(asyncio.create_task(fire(endpoint, url, scheduled)))
+            await asyncio.gather(*tasks)
+            return time.perf_counter() - start
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_local_server(
+    workers: int = 1, startup_timeout: float = 30.0, admission: bool = False
+) -> Tuple[subprocess.Popen, str]:
+    """
+    Sobe a API com uvicorn em uma porta livre e aguarda o /health
+
+    Por padrão o controle de admissão é desligado: todo o tráfego sai de um
+    único cliente e seria limitado pelos token buckets por cliente.
+    """
+    port = _free_port()
+    command = [
+        sys.executable,
+        "-m",
+        "uvicorn",
+        "api.main:app",
+        "--host",
+        "127.0.0.1",
+        "--port",
+        str(port),
+        "--workers",
+        str(workers),
+        "--log-level",
+        "warning",
+    ]
+    env = dict(os.environ)
+    if not admission:
+        env["API_ADMISSION_ENABLED"] = "false"
+    process = subprocess.Popen(command, env=env)
+    base_url = f"http://127.0.0.1:{port}"
+
+    deadline = time.time() + startup_timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("Servidor da API encerrou durante a inicialização")
+        try:
+            if httpx.get(f"{base_url}/health", timeout=1.0).status_code == 200:
+                return process, base_url
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+
+    process.terminate()
+    raise RuntimeError("Servidor da API não respondeu ao /health a tempo")
+
+
+def compare_with_baseline(
+    summary: Dict[str, Dict[str, float]],
+    baseline: Dict[str, Dict[str, float]],
+    max_latency_regression: float,
+    max_throughput_regression: Optional[float],
+    max_error_rate_increase: float = 0.01,
+) -> List[str]:
+    """
+    Compara o resultado com o baseline
+
+    Args:
+        summary: Resumo da execução atual
+        baseline: Resumo salvo anteriormente
+        max_latency_regression: Aumento máximo tolerado em p95/p99 (0.25 = +25%)
+        max_throughput_regression: Queda máxima tolerada no throughput total
+            (None para não comparar throughput)
+        max_error_rate_increase: Aumento máximo tolerado na fração de
+            requisições com erro, em pontos (0.01 = +1 ponto percentual);
+            uma API que falha rápido com 5xx não passa por ter latência menor
+
+    Returns:
+        Lista de regressões encontradas (vazia se tudo dentro dos limites)
+    """
+    regressions = []
+    for endpoint, reference in baseline.items():
+        current = summary.get(endpoint)
+        if current is None:
+            continue
+        for metric in ("p95_ms", "p99_ms"):
+            limit = reference[metric] * (1 + max_latency_regression)
+            if reference[metric] > 0 and current[metric] > limit:
+                regressions.append(
+                    f"{endpoint} {metric}: {current[metric]:.2f} > {limit:.2f} "
+                    f"(baseline {reference[metric]:.2f})"
+                )
+        if current.get("requisicoes") and "erros" in reference:
+            reference_rate = reference["erros"] / max(reference["requisicoes"], 1)
+            current_rate = current["erros"] / current["requisicoes"]
+            if current_rate > reference_rate + max_error_rate_increase:
+                regressions.append(
+                    f"{endpoint} taxa de erros: {current_rate:.2%} > "
+                    f"{reference_rate + max_error_rate_increase:.2%} "
+                    f"(baseline {reference_rate:.2%})"
+                )
+
+    if max_throughput_regression is None:
+        return regressions
+
+    reference_rps = baseline.get("total", {}).get("throughput_rps", 0)
+    current_rps = summary.get("total", {}).get("throughput_rps", 0)
+    if reference_rps and current_rps < reference_rps * (1 - max_throughput_regression):
+        regressions.append(
+            f"total throughput_rps: {current_rps:.1f} < "
+            f"{reference_rps * (1 - max_throughput_regression):.1f} (baseline {reference_rps:.1f})"
+        )
+    return regressions
+
+
+def print_report(summary: Dict[str, Dict[str, float]], elapsed: float):
+    """Imprime tabela de resultados"""
+    print(f"\nDuração: {elapsed:.1f}s")
+    header = f"{'endpoint':<12} {'reqs':>7} {'erros':>6} {'rps':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"
+    print(header)
+    print("-" * len(header))
+    for endpoint, stats in summary.items():
+        print(
+            f"{endpoint:<12} {stats['requisicoes']:>7} {stats['erros']:>6} "
+            f"{stats['throughput_rps']:>9.1f} {stats['p50_ms']:>9.2f} "
+            f"{stats['p95_ms']:>9.2f} {stats['p99_ms']:>9.2f}"
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Teste de carga da Books API")
+    parser.add_argument(
+        "--base-url", help="API já em execução (padrão: sobe uma local)"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=1, help="Workers uvicorn da API local"
+    )
+    parser.add_argument(
+        "--duration", type=float, default=10.0, help="Duração em segundos"
+    )
+    parser.add_argument(
+        "--concurrency", type=int, default=8, help="Clientes simultâneos (loop fechado)"
+    )
+    parser.add_argument("--rate", type=float, help="Taxa fixa em req/s (loop aberto)")
+    parser.add_argument(
+        "--with-admission",
+        action="store_true",
+        help="Mantém o controle de admissão ligado na API local",
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument(
+        "--save-baseline", action="store_true", help="Salva o resultado como baseline"
+    )
+    parser.add_argument("--max-latency-regression", type=float, default=0.25)
+    parser.add_argument("--max-throughput-regression", type=float, default=0.20)
+    parser.add_argument(
+        "--max-error-rate-increase",
+        type=float,
+        default=0.01,
+        help="Aumento tolerado na fração de erros (0.01 = +1 ponto percentual)",
+    )
+    parser.add_argument("--output", type=Path, help="Salva o resumo em JSON")
+    args = parser.parse_args(argv)
+
+    server = None
+    base_url = args.base_url
+    if not base_url:
+        server, base_url = start_local_server(
+            workers=args.workers, admission=args.with_admission
+        )
+        logger.info(f"API local em {base_url}")
+
+    try:
+        generator = LoadGenerator(base_url, seed=args.seed)
+        if args.rate:
+            elapsed = asyncio.run(
+                generator.run_open_loop(
+                    args.rate, args.duration, max(args.concurrency, 1) * 8
+                )
+            )
+        else:
+            elapsed = asyncio.run(
+                generator.run_closed_loop(args.concurrency, args.duration)
+            )
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=10)
+
+    summary = generator.recorder.summary(elapsed)
+    print_report(summary, elapsed)
+
+    config = {
+        "modo": "aberto" if args.rate else "fechado",
+        "taxa_rps": args.rate,
+        "concorrencia": args.concurrency,
+        "duracao_s": args.duration,
+        "seed": args.seed,
+    }
+    report = {"config": config, "resultados": summary}
+
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2, ensure_ascii=False))
+
+    if args.save_baseline:
+        args.baseline.write_text(
+            json.dumps(report, indent=2, ensure_ascii=False) + "\n"
+        )
+        logger.info(f"Baseline salvo em {args.baseline}")
+        return 0
+
+    if args.baseline.exists():
+        baseline = json.loads(args.baseline.read_text())
+        if baseline["config"] != config:
+            logger.warning(
+                f"Configuração difere do baseline ({baseline['config']}); "
+                "comparação pode não ser significativa"
+            )
+        regressions = compare_with_baseline(
+            summary,
+            baseline["resultados"],
+            args.max_latency_regression,
+            # Em loop aberto o throughput é fixado pela taxa, não pelo servidor
+            args.max_throughput_regression if not args.rate else None,
+            args.max_error_rate_increase,
+        )
+        if regressions:
+            print("\nREGRESSÕES em relação ao baseline:")
+            for regression in regressions:
+                print(f"  - {regression}")
+            return 1
+        print("\nDentro dos limites do baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
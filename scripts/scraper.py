@@ -1,60 +1,161 @@
 """
 Web Scraper para Books to Scrape
 Extrai dados de livros de https://books.toscrape.com/
+
+Uso:
+    python scripts/scraper.py                      # sequencial
+    python scripts/scraper.py --engine async --rate 8 --per-host 8
+    python scripts/scraper.py --engine async --parse-workers 4
+    python scripts/scraper.py --incremental        # só baixa o que mudou
+    python scripts/scraper.py --resume             # continua do checkpoint
+    python scripts/scraper.py --output data/books.parquet
+    python scripts/scraper.py --record data/http_cache   # grava as respostas
+    python scripts/scraper.py --base-url http://127.0.0.1:8000  # site local
+    python scripts/scraper.py --live-metrics 10 --report logs/crawl_report.json
+    python scripts/scraper.py --adaptive --max-rate 10   # ritmo AIMD
 """
 
-import csv
+import argparse
+import functools
 import logging
+import sys
 import time
-from datetime import datetime
+from contextlib import ExitStack
 from typing import List, Dict, Optional
 from pathlib import Path
 import requests
-from bs4 import BeautifulSoup
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
+if __package__ in (None, ""):
+    # Executado como `python scripts/scraper.py`
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-# Configuração de logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    handlers=[logging.FileHandler("logs/scraper.log"), logging.StreamHandler()],
+from scripts.crawler.checkpoint import (  # noqa: E402
+    DEFAULT_CHECKPOINT_PATH,
+    Checkpoint,
+)
+from scripts.crawler.adaptive import AimdController, parse_retry_after  # noqa: E402
+from scripts.crawler.engine import RETRY_STATUSES, AsyncCrawler  # noqa: E402
+from scripts.crawler.frontier import Frontier  # noqa: E402
+from scripts.crawler.metrics import (  # noqa: E402
+    DEFAULT_REPORT_PATH,
+    CrawlMetrics,
+    write_report,
+)
+from scripts.crawler.parsing import (  # noqa: E402
+    BASE_URL,
+    RATING_MAP,
+    available_backends,
+    parse_page,
 )
+from scripts.crawler.pipeline import DEFAULT_QUEUE_SIZE  # noqa: E402
+from scripts.crawler.replay import ResponseCache  # noqa: E402
+from scripts.crawler.sinks import (  # noqa: E402
+    DEFAULT_ROW_GROUP_SIZE,
+    CsvSink,
+    ListSink,
+    RecordStream,
+    open_sink,
+)
+from scripts.crawler.state import DEFAULT_STATE_PATH, CrawlState, Fetched  # noqa: E402
+
 logger = logging.getLogger(__name__)
 
 
+def _retry_history(response: requests.Response) -> List:
+    """Tentativas refeitas pelo Retry do urllib3 antes desta resposta"""
+    retries = getattr(response.raw, "retries", None)
+    return list(retries.history) if retries is not None else []
+
+
+def _configure_logging():
+    """Logging em logs/scraper.log e no console"""
+    Path("logs").mkdir(exist_ok=True)
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+        handlers=[logging.FileHandler("logs/scraper.log"), logging.StreamHandler()],
+    )
+
+
 class BooksToScrapeScraper:
     """Scraper para extrair dados de livros do Books to Scrape"""
 
-    BASE_URL = "https://books.toscrape.com"
-    RATING_MAP = {"One": 1, "Two": 2, "Three": 3, "Four": 4, "Five": 5}
-
-    def __init__(self, delay: float = 0.5, max_retries: int = 3):
+    BASE_URL = BASE_URL
+    RATING_MAP = RATING_MAP
+
+    def __init__(
+        self,
+        delay: float = 0.5,
+        max_retries: int = 3,
+        state: Optional[CrawlState] = None,
+        checkpoint: Optional[Checkpoint] = None,
+        parser: Optional[str] = None,
+        partial: bool = True,
+        base_url: str = BASE_URL,
+        recorder: Optional[ResponseCache] = None,
+        live_metrics: float = 0.0,
+        adaptive: bool = False,
+        max_rate: float = 10.0,
+    ):
         """
         Inicializa o scraper
 
         Args:
             delay: Tempo de espera entre requisições (segundos)
             max_retries: Número máximo de tentativas em caso de falha
+            state: Estado do crawl anterior (re-scrape incremental)
+            checkpoint: Checkpoint periódico (crawl retomável)
+            parser: Backend do BeautifulSoup (padrão: lxml se instalado)
+            partial: Monta só as subárvores usadas de cada página
+            base_url: Raiz do site (ex.: um FixtureServer local)
+            recorder: Grava as respostas 200 (reprodução offline)
+            live_metrics: Segundos entre os resumos de métricas no log (0: sem)
+            adaptive: Ritmo ajustado por AIMD a partir de 1/delay req/s, no
+                lugar do delay fixo e do backoff do Retry
+            max_rate: Teto do ritmo adaptativo (requisições/segundo)
         """
+        self.base_url = base_url
+        self.recorder = recorder
+        self.live_metrics = live_metrics
+        self.metrics = CrawlMetrics()
         self.delay = delay
         self.max_retries = max_retries
+        self.state = state
+        self.checkpoint = checkpoint
+        self.controller: Optional[AimdController] = None
+        if adaptive:
+            self.controller = AimdController(
+                initial=1 / delay if delay > 0 else max_rate,
+                ceiling=max_rate,
+                minimum=0.2,
+                increase=0.5,
+                unit="req/s",
+            )
+        self._last_start = 0.0
+        self._parse = functools.partial(
+            parse_page, base_url=base_url, backend=parser, partial=partial
+        )
         self.session = self._create_session()
-
-        # Criar diretório de logs se não existir
-        Path("logs").mkdir(exist_ok=True)
+        self.last_stats: Dict = {}
+        self.last_changed: List[Dict] = []
+        self.last_report: Dict = {}
 
     def _create_session(self) -> requests.Session:
         """Cria sessão com retry strategy"""
         session = requests.Session()
-        retry_strategy = Retry(
-            total=self.max_retries,
-            backoff_factor=1,
-            status_forcelist=[429, 500, 502, 503, 504],
-            allowed_methods=["HEAD", "GET", "OPTIONS"],
-        )
-        adapter = HTTPAdapter(max_retries=retry_strategy)
+        if self.controller is not None:
+            # As novas tentativas ficam com _fetch_adaptive, que vê cada resposta
+            adapter = HTTPAdapter()
+        else:
+            retry_strategy = Retry(
+                total=self.max_retries,
+                backoff_factor=1,
+                status_forcelist=[429, 500, 502, 503, 504],
+                allowed_methods=["HEAD", "GET", "OPTIONS"],
+            )
+            adapter = HTTPAdapter(max_retries=retry_strategy)
         session.mount("http://", adapter)
         session.mount("https://", adapter)
         session.headers.update(
@@ -64,340 +165,398 @@ class BooksToScrapeScraper:
         )
         return session
 
-    def _get_page(self, url: str) -> Optional[BeautifulSoup]:
+    def _fetch(self, url: str, headers: Optional[Dict] = None) -> Optional[Fetched]:
         """
         Faz requisição HTTP com tratamento de erros
 
         Args:
             url: URL da página
+            headers: Headers extras (requisição condicional)
 
         Returns:
-            BeautifulSoup object ou None em caso de erro
+            Resposta ou None em caso de erro
         """
+        if self.controller is not None:
+            return self._fetch_adaptive(url, headers)
+        metrics = self.metrics
         try:
-            logger.info(f"Acessando: {url}")
-            response = self.session.get(url, timeout=10)
+            response, content, _ = self._get(url, headers)
             response.raise_for_status()
-            time.sleep(self.delay)  # Rate limiting
-            return BeautifulSoup(response.content, "html.parser")
+            if self.delay:
+                with metrics.measure("cortesia"):
+                    time.sleep(self.delay)  # Rate limiting
+            return self._fetched(url, response, content)
         except requests.exceptions.RequestException as e:
+            if not isinstance(e, requests.exceptions.HTTPError):
+                # Tentativas esgotadas (RetryError/ConnectionError) ou timeout
+                metrics.response("erro")
+                if isinstance(e, requests.exceptions.RetryError):
+                    metrics.retry(self.max_retries)
             logger.error(f"Erro ao acessar {url}: {e}")
             return None
 
-    def _extract_rating(self, book_element) -> int:
-        """Extrai rating do livro"""
-        try:
-            rating_class = book_element.find("p", class_="star-rating")
-            if rating_class:
-                rating_text = rating_class.get("class")[1]
-                return self.RATING_MAP.get(rating_text, 0)
-        except Exception as e:
-            logger.warning(f"Erro ao extrair rating: {e}")
-        return 0
-
-    def _extract_price(self, price_text: str) -> float:
-        """Extrai valor numérico do preço"""
-        try:
-            # Remove símbolos de moeda e converte para float
-            return float(price_text.replace("£", "").replace("€", "").strip())
-        except ValueError:
-            return 0.0
-
-    def _parse_availability(self, availability_text: str) -> Dict:
-        """
-        Parse da string de disponibilidade
-
-        Returns:
-            Dict com 'status' e 'copies'
-        """
-        try:
-            # Ex: "In stock (22 available)"
-            if "In stock" in availability_text:
-                import re
-
-                match = re.search(r"\((\d+) available\)", availability_text)
-                copies = int(match.group(1)) if match else 0
-                return {"status": "In stock", "copies": copies}
-            return {"status": "Out of stock", "copies": 0}
-        except Exception as e:
-            logger.warning(f"Erro ao parsear disponibilidade: {e}")
-            return {"status": "Unknown", "copies": 0}
-
-    def _scrape_book_details(self, book_url: str) -> Dict:
+    def _fetch_adaptive(
+        self, url: str, headers: Optional[Dict] = None
+    ) -> Optional[Fetched]:
         """
-        Extrai detalhes completos de um livro
+        _fetch com o ritmo do controlador AIMD
 
-        Args:
-            book_url: URL da página do livro
-
-        Returns:
-            Dict com detalhes do livro
+        Os inícios das requisições são espaçados em 1/limite segundos (e
+        esperam o Retry-After); 429/5xx e erros de rede reduzem o limite e
+        são tentados de novo no novo ritmo, sem backoff fixo.
         """
-        soup = self._get_page(book_url)
-        if not soup:
-            return {}
-
-        try:
-            details = {}
-
-            # UPC e tabela de informações
-            table = soup.find("table", class_="table table-striped")
-            if table:
-                rows = table.find_all("tr")
-                for row in rows:
-                    header = row.find("th").text.strip()
-                    value = row.find("td").text.strip()
-                    if header == "UPC":
-                        details["upc"] = value
-                    elif header == "Availability":
-                        availability = self._parse_availability(value)
-                        details["availability"] = availability["status"]
-                        details["availability_copies"] = availability["copies"]
-
-            # Descrição do produto
-            product_desc = soup.find("div", id="product_description")
-            if product_desc:
-                desc_p = product_desc.find_next("p")
-                details["description"] = desc_p.text.strip() if desc_p else ""
+        metrics, controller = self.metrics, self.controller
+        for attempt in range(self.max_retries + 1):
+            wait = max(
+                self._last_start + 1 / controller.limit - time.monotonic(),
+                controller.pause(),
+            )
+            if wait > 0:
+                with metrics.measure("cortesia"):
+                    time.sleep(wait)
+            self._last_start = time.monotonic()
+            try:
+                response, content, latency = self._get(url, headers)
+            except requests.exceptions.RequestException as e:
+                metrics.response("erro")
+                controller.observe("erro")
+                error = repr(e)
             else:
-                details["description"] = ""
-
-            return details
-
-        except Exception as e:
-            logger.error(f"Erro ao extrair detalhes de {book_url}: {e}")
-            return {}
+                controller.observe(
+                    response.status_code,
+                    latency,
+                    parse_retry_after(response.headers),
+                )
+                if response.status_code not in RETRY_STATUSES:
+                    try:
+                        response.raise_for_status()
+                    except requests.exceptions.HTTPError as e:
+                        logger.error(f"Erro ao acessar {url}: {e}")
+                        return None
+                    return self._fetched(url, response, content)
+                error = f"HTTP {response.status_code}"
+
+            if attempt == self.max_retries:
+                logger.error(f"Erro ao acessar {url}: {error}")
+                return None
+            metrics.retry()
+            logger.warning(f"Nova tentativa para {url}: {error}")
+        return None
+
+    def _get(self, url: str, headers: Optional[Dict]) -> tuple:
+        """GET medido: (resposta, corpo, segundos até os headers)"""
+        metrics = self.metrics
+        logger.info(f"Acessando: {url}")
+        start = time.perf_counter()
+        response = self.session.get(url, timeout=10, headers=headers, stream=True)
+        headers_at = time.perf_counter()
+        content = response.content
+        metrics.timing("conexao", headers_at - start)
+        metrics.timing("download", time.perf_counter() - headers_at)
+        # Respostas descartadas pelo Retry do urllib3 (ex.: 503 refeito)
+        history = _retry_history(response)
+        for attempt in history:
+            metrics.response(attempt.status or "erro")
+        metrics.retry(len(history))
+        metrics.response(response.status_code, len(content))
+        return response, content, headers_at - start
+
+    def _fetched(
+        self, url: str, response: requests.Response, content: bytes
+    ) -> Fetched:
+        """Fetched da resposta (gravada no recorder se for 200)"""
+        fetched = Fetched(
+            response.status_code,
+            content,
+            response.headers.get("ETag"),
+            response.headers.get("Last-Modified"),
+        )
+        if self.recorder is not None and fetched.status == 200:
+            self.recorder.store(url, fetched)
+        return fetched
 
-    def _scrape_category_page(self, url: str, category: str) -> List[Dict]:
+    def scrape_all_books(self) -> List[Dict]:
         """
-        Extrai livros de uma página de categoria
+        Extrai todos os livros de todas as categorias
 
-        Args:
-            url: URL da página
-            category: Nome da categoria
+        Com estado, os livros novos ou alterados ficam em self.last_changed.
 
         Returns:
-            Lista de dicts com dados dos livros
+            Lista com todos os livros
         """
-        books = []
-        soup = self._get_page(url)
-
-        if not soup:
-            return books
+        books, changes = ListSink(), ListSink()
+        self.scrape_to(books, changes)
+        self.last_changed = changes.records
+        return books.records
 
-        # Encontra todos os livros na página
-        book_elements = soup.find_all("article", class_="product_pod")
-
-        for idx, book in enumerate(book_elements, 1):
-            try:
-                # Dados básicos
-                title_element = book.find("h3").find("a")
-                title = title_element.get("title", "")
-                book_path = title_element.get("href", "")
-
-                # Constrói URL completa do livro
-                if book_path.startswith("../../.."):
-                    book_path = book_path.replace("../../..", "")
-                book_url = f"{self.BASE_URL}/catalogue{book_path}"
-
-                # Preço
-                price_element = book.find("p", class_="price_color")
-                price = (
-                    self._extract_price(price_element.text) if price_element else 0.0
-                )
-
-                # Rating
-                rating = self._extract_rating(book)
-
-                # Imagem
-                img_element = book.find("img")
-                img_url = img_element.get("src", "") if img_element else ""
-                if img_url and not img_url.startswith("http"):
-                    img_url = f"{self.BASE_URL}/{img_url.lstrip('../')}"
-
-                # Detalhes adicionais da página do livro
-                book_details = self._scrape_book_details(book_url)
-
-                # Monta o registro completo
-                book_data = {
-                    "title": title,
-                    "price": price,
-                    "rating": rating,
-                    "category": category,
-                    "product_page_url": book_url,
-                    "image_url": img_url,
-                    "upc": book_details.get("upc", ""),
-                    "availability": book_details.get("availability", "Unknown"),
-                    "availability_copies": book_details.get("availability_copies", 0),
-                    "description": book_details.get("description", ""),
-                    "scraped_at": datetime.utcnow().isoformat(),
-                }
-
-                books.append(book_data)
-                logger.info(f"Extraído: {title} ({category})")
-
-            except Exception as e:
-                logger.error(f"Erro ao processar livro {idx}: {e}")
-                continue
-
-        return books
-
-    def _get_all_categories(self) -> List[Dict]:
+    def scrape_to(self, sink, changes=None) -> int:
         """
-        Obtém lista de todas as categorias
+        Extrai todos os livros gravando cada um no sink assim que sai
 
-        Returns:
-            Lista de dicts com 'name' e 'url' de cada categoria
-        """
-        soup = self._get_page(self.BASE_URL)
-        if not soup:
-            return []
-
-        categories = []
-        category_list = soup.find("ul", class_="nav nav-list")
-
-        if category_list:
-            # Pula o primeiro item (Books)
-            category_items = category_list.find("ul").find_all("li")
-
-            for item in category_items:
-                link = item.find("a")
-                if link:
-                    name = link.text.strip()
-                    url = f"{self.BASE_URL}/{link.get('href')}"
-                    categories.append({"name": name, "url": url})
-
-        logger.info(f"Encontradas {len(categories)} categorias")
-        return categories
-
-    def _scrape_all_pages_in_category(
-        self, category_url: str, category_name: str
-    ) -> List[Dict]:
-        """
-        Extrai todos os livros de todas as páginas de uma categoria
+        Cada URL (categoria, página de listagem, detalhe) é buscada uma
+        única vez; os contadores ficam em self.last_stats. Os ids seguem
+        a ordem do crawl (categoria, página, posição). Com estado, as
+        páginas inalteradas não são parseadas de novo e os livros novos
+        ou alterados também vão para `changes`. Com checkpoint, a
+        fronteira e os registros são gravados periodicamente e o crawl
+        pode ser retomado (Checkpoint(resume=True)).
 
         Args:
-            category_url: URL da primeira página da categoria
-            category_name: Nome da categoria
-
-        Returns:
-            Lista de todos os livros da categoria
-        """
-        all_books = []
-        current_url = category_url
-        page = 1
-
-        while current_url:
-            logger.info(f"Processando {category_name} - página {page}")
-            books = self._scrape_category_page(current_url, category_name)
-            all_books.extend(books)
-
-            # Verifica se há próxima página
-            soup = self._get_page(current_url)
-            if soup:
-                next_button = soup.find("li", class_="next")
-                if next_button:
-                    next_link = next_button.find("a")
-                    if next_link:
-                        # Constrói URL da próxima página
-                        next_page = next_link.get("href")
-                        base = "/".join(current_url.split("/")[:-1])
-                        current_url = f"{base}/{next_page}"
-                        page += 1
-                        continue
-
-            # Não há próxima página
-            break
-
-        return all_books
-
-    def scrape_all_books(self) -> List[Dict]:
-        """
-        Extrai todos os livros de todas as categorias
+            sink: Destino de todos os livros (RecordSink ou ListSink)
+            changes: Destino dos livros novos ou alterados (com estado)
 
         Returns:
-            Lista com todos os livros
+            Número de livros gravados
         """
         logger.info("Iniciando scraping completo do site")
         start_time = time.time()
-
-        all_books = []
-        categories = self._get_all_categories()
-
-        for idx, category in enumerate(categories, 1):
-            logger.info(
-                f"Processando categoria {idx}/{len(categories)}: {category['name']}"
-            )
-            books = self._scrape_all_pages_in_category(
-                category["url"], category["name"]
-            )
-            all_books.extend(books)
-            logger.info(
-                f"Total de livros extraídos de {category['name']}: {len(books)}"
-            )
-
-        # Adiciona ID único para cada livro
-        for idx, book in enumerate(all_books, 1):
-            book["id"] = idx
+        metrics = self.metrics = CrawlMetrics(live_interval=self.live_metrics)
+
+        checkpoint = self.checkpoint
+        stream = RecordStream(sink, self.state, changes)
+        if checkpoint is not None:
+            frontier = checkpoint.frontier(self.base_url)
+            with metrics.measure("escrita"):
+                stream.push(checkpoint.records(), frontier.watermark())
+        else:
+            frontier = Frontier(self.base_url)
+
+        while True:
+            task = frontier.pop()
+            if task is None:
+                break
+            if self.state is None:
+                fetched = self._fetch(task.url)
+                with metrics.measure("parse"):
+                    parsed = (
+                        self._parse(task.kind, fetched.content, task.url)
+                        if fetched is not None
+                        else None
+                    )
+            else:
+                fetched = self._fetch(task.url, self.state.headers(task.url))
+                with metrics.measure("parse"):
+                    parsed = self.state.resolve(
+                        task.kind, task.url, fetched, self._parse
+                    )
+            done = frontier.complete(task, parsed)
+            if checkpoint is not None:
+                checkpoint.update(frontier, done)
+            with metrics.measure("escrita"):
+                stream.push(done, frontier.watermark())
+            metrics.page()
+
+        if checkpoint is not None:
+            checkpoint.save(frontier)
+        with metrics.measure("escrita"):
+            stream.finish()
+        self.last_stats = frontier.stats()
+        if self.state is not None:
+            self.last_stats["estado"] = self.state.stats()
+        extra = {}
+        if self.controller is not None:
+            extra["adaptativo"] = self.controller.stats()
+        self.last_report = metrics.report(
+            motor="sequential", livros=stream.count, fronteira=self.last_stats, **extra
+        )
 
         elapsed_time = time.time() - start_time
         logger.info(
-            f"Scraping concluído! Total: {len(all_books)} livros em {elapsed_time:.2f}s"
+            f"Scraping concluído! Total: {stream.count} livros em {elapsed_time:.2f}s"
         )
+        logger.info(f"Fronteira: {self.last_stats}")
 
-        return all_books
+        return stream.count
 
     def save_to_csv(self, books: List[Dict], filepath: str = "data/books.csv"):
         """
-        Salva lista de livros em arquivo CSV
+        Salva lista de livros em arquivo CSV (troca atômica do arquivo)
 
         Args:
             books: Lista de dicts com dados dos livros
             filepath: Caminho do arquivo de saída
         """
-        if not books:
-            logger.warning("Nenhum livro para salvar")
-            return
-
-        # Garante que o diretório existe
-        Path(filepath).parent.mkdir(parents=True, exist_ok=True)
-
-        # Define ordem das colunas
-        fieldnames = [
-            "id",
-            "title",
-            "price",
-            "availability",
-            "availability_copies",
-            "rating",
-            "category",
-            "product_page_url",
-            "upc",
-            "description",
-            "image_url",
-            "scraped_at",
-        ]
-
         try:
-            with open(filepath, "w", newline="", encoding="utf-8") as csvfile:
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                writer.writeheader()
-                writer.writerows(books)
-
-            logger.info(f"Dados salvos em {filepath} ({len(books)} registros)")
+            with CsvSink(filepath) as sink:
+                for book in books:
+                    sink.write(book)
         except Exception as e:
             logger.error(f"Erro ao salvar CSV: {e}")
 
 
-def main():
+def main(argv: Optional[List[str]] = None):
     """Função principal para executar o scraper"""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument(
+        "--engine",
+        choices=["sequential", "async"],
+        default="sequential",
+        help="sequential (uma requisição por vez) ou async (concorrente)",
+    )
+    parser.add_argument(
+        "--delay", type=float, default=0.5, help="Espera entre requisições (sequential)"
+    )
+    parser.add_argument(
+        "--rate", type=float, default=5.0, help="Requisições/s por host (async)"
+    )
+    parser.add_argument(
+        "--per-host", type=int, default=4, help="Requisições simultâneas por host"
+    )
+    parser.add_argument("--max-retries", type=int, default=3)
+    parser.add_argument(
+        "--parser",
+        choices=available_backends(),
+        default=None,
+        help="Backend do BeautifulSoup (padrão: o mais rápido instalado)",
+    )
+    parser.add_argument(
+        "--parse-workers",
+        type=int,
+        default=0,
+        help="Processos de parse (async; 0 = parse no laço de eventos)",
+    )
+    parser.add_argument(
+        "--queue-size",
+        type=int,
+        default=DEFAULT_QUEUE_SIZE,
+        help="Páginas baixadas aguardando parse (async)",
+    )
+    parser.add_argument(
+        "--full-parse",
+        action="store_true",
+        help="Monta a árvore inteira de cada página (sem SoupStrainer)",
+    )
+    parser.add_argument(
+        "--output",
+        default="data/books.csv",
+        help="Formato pelo sufixo: .csv, .ndjson/.jsonl ou .parquet (colunar)",
+    )
+    parser.add_argument(
+        "--row-group-size",
+        type=int,
+        default=DEFAULT_ROW_GROUP_SIZE,
+        help="Linhas por row group (saída colunar)",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Requisições condicionais a partir do estado do crawl anterior",
+    )
+    parser.add_argument("--state", default=DEFAULT_STATE_PATH)
+    parser.add_argument(
+        "--changes-output",
+        default="data/books_changes.csv",
+        help="Livros novos ou alterados (--incremental)",
+    )
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT_PATH)
+    parser.add_argument(
+        "--checkpoint-every",
+        type=int,
+        default=50,
+        help="URLs concluídas entre dois checkpoints",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continua do último checkpoint sem rebuscar o que já foi concluído",
+    )
+    parser.add_argument(
+        "--base-url",
+        default=BASE_URL,
+        help="Raiz do site (ex.: servidor de python -m scripts.crawler.replay)",
+    )
+    parser.add_argument(
+        "--record",
+        metavar="DIR",
+        default=None,
+        help="Grava as respostas num cache para reprodução offline",
+    )
+    parser.add_argument(
+        "--report",
+        default=DEFAULT_REPORT_PATH,
+        help="Relatório JSON da execução (tempos por etapa, bytes, status)",
+    )
+    parser.add_argument(
+        "--live-metrics",
+        type=float,
+        default=0.0,
+        metavar="SEGUNDOS",
+        help="Resumo de métricas no log a cada N segundos (0 = desligado)",
+    )
+    parser.add_argument(
+        "--adaptive",
+        action="store_true",
+        help="Ritmo AIMD: sobe enquanto o site responde bem e corta em 429/5xx"
+        " ou picos de latência (teto: --max-rate ou --per-host no async)",
+    )
+    parser.add_argument(
+        "--max-rate",
+        type=float,
+        default=10.0,
+        help="Teto do ritmo adaptativo em requisições/s (sequential)",
+    )
+    args = parser.parse_args(argv)
+
+    _configure_logging()
     logger.info("=" * 80)
     logger.info("Iniciando Books to Scrape Scraper")
     logger.info("=" * 80)
 
-    scraper = BooksToScrapeScraper(delay=0.5, max_retries=3)
-    books = scraper.scrape_all_books()
-    scraper.save_to_csv(books)
+    state = CrawlState(args.state) if args.incremental else None
+    checkpoint = Checkpoint(args.checkpoint, args.checkpoint_every, args.resume)
+    recorder = ResponseCache(args.record) if args.record else None
+    scraper = BooksToScrapeScraper(
+        delay=args.delay,
+        max_retries=args.max_retries,
+        state=state,
+        checkpoint=checkpoint,
+        parser=args.parser,
+        partial=not args.full_parse,
+        base_url=args.base_url,
+        recorder=recorder,
+        live_metrics=args.live_metrics,
+        adaptive=args.adaptive,
+        max_rate=args.max_rate,
+    )
+    # Os livros vão para o arquivo à medida que saem; o arquivo final só
+    # substitui o anterior quando o crawl termina
+    with ExitStack() as stack:
+        sink = stack.enter_context(open_sink(args.output, args.row_group_size))
+        changes = None
+        if state is not None:
+            changes = stack.enter_context(
+                open_sink(args.changes_output, allow_empty=True)
+            )
+        if args.engine == "async":
+            crawler = AsyncCrawler(
+                base_url=args.base_url,
+                rate=args.rate,
+                per_host=args.per_host,
+                max_retries=args.max_retries,
+                state=state,
+                checkpoint=checkpoint,
+                parser=args.parser,
+                partial=not args.full_parse,
+                parse_workers=args.parse_workers,
+                queue_size=args.queue_size,
+                recorder=recorder,
+                live_metrics=args.live_metrics,
+                adaptive=args.adaptive,
+            )
+            crawler.run_to(sink, changes)
+            report = crawler.last_report
+        else:
+            scraper.scrape_to(sink, changes)
+            report = scraper.last_report
+    write_report(report, args.report)
+    if state is not None:
+        state.close()
+    if recorder is not None:
+        recorder.save()
+        logger.info(f"Respostas gravadas em {args.record}: {recorder.stats()}")
+    # Só descarta o checkpoint depois de salvar o resultado
+    checkpoint.clear()
+    checkpoint.close()
 
     logger.info("=" * 80)
     logger.info("Processo concluído!")
@@ -0,0 +1,130 @@
+"""
+Testes para o controle de admissão
+"""
+
+import asyncio
+
+from fastapi import FastAPI
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.testclient import TestClient
+
+from api.admission import (
+    CHEAP,
+    HEAVY,
+    MODERATE,
+    AdmissionController,
+    AdmissionMiddleware,
+    CostClassLimits,
+    TokenBuckets,
+    classify,
+)
+from api.main import app as api_app
+
+
+def _limits(concurrency=0, rate=0.0, burst=1):
+    return {
+        CHEAP: CostClassLimits(concurrency=0, rate=0.0, burst=1, pool=None),
+        MODERATE: CostClassLimits(concurrency=0, rate=0.0, burst=1, pool=None),
+        HEAVY: CostClassLimits(
+            concurrency=concurrency, rate=rate, burst=burst, pool=None
+        ),
+    }
+
+
+def _app(controller):
+    app = FastAPI()
+
+    @app.get("/health")
+    async def health():
+        return {"ok": True}
+
+    @app.get("/ml/sample")
+    async def sample():
+        await asyncio.sleep(0)
+        return {"ok": True}
+
+    app.add_middleware(AdmissionMiddleware, controller=controller)
+    return app
+
+
+def test_classify_routes():
+    """Testa classes de custo por rota e busca curta"""
+    assert classify("/health") == CHEAP
+    assert classify("/books") == MODERATE
+    assert classify("/ml/sample") == HEAVY
+    assert classify("/books/search", b"q=love") == MODERATE
+    assert classify("/books/search", b"q=a") == HEAVY
+    assert classify("/rota/desconhecida") == MODERATE
+
+
+def test_token_bucket_refills():
+    """Testa consumo da rajada e reposição pela taxa"""
+    buckets = TokenBuckets()
+    key = ("cliente", HEAVY)
+    assert buckets.acquire(key, rate=2.0, burst=2, now=0.0) == 0.0
+    assert buckets.acquire(key, rate=2.0, burst=2, now=0.0) == 0.0
+    wait = buckets.acquire(key, rate=2.0, burst=2, now=0.0)
+    assert wait == 0.5
+    assert buckets.acquire(key, rate=2.0, burst=2, now=0.5) == 0.0
+
+
+def test_rate_limit_returns_429_with_retry_after():
+    """Testa 429 com Retry-After quando a rajada acaba"""
+    client = TestClient(_app(AdmissionController(_limits(rate=0.5, burst=2))))
+    assert client.get("/ml/sample").status_code == 200
+    assert client.get("/ml/sample").status_code == 200
+
+    response = client.get("/ml/sample")
+    assert response.status_code == 429
+    assert int(response.headers["retry-after"]) >= 1
+
+    # Rotas leves não são limitadas
+    assert client.get("/health").status_code == 200
+
+
+def test_concurrency_limit_returns_503():
+    """Testa descarte quando a rota está no limite de concorrência"""
+    controller = AdmissionController(_limits(concurrency=1))
+    controller.enter("/ml/sample")
+
+    client = TestClient(_app(controller))
+    response = client.get("/ml/sample")
+    assert response.status_code == 503
+    assert "retry-after" in response.headers
+
+    controller.leave("/ml/sample")
+    assert client.get("/ml/sample").status_code == 200
+
+
+def test_shed_request_keeps_rate_token():
+    """Testa que um 503 por concorrência não gasta o token do cliente"""
+    controller = AdmissionController(_limits(concurrency=1, rate=0.01, burst=1))
+    controller.enter("/ml/sample")
+
+    client = TestClient(_app(controller))
+    assert client.get("/ml/sample").status_code == 503
+    assert client.get("/ml/sample").status_code == 503
+
+    controller.leave("/ml/sample")
+    assert client.get("/ml/sample").status_code == 200
+    assert client.get("/ml/sample").status_code == 429
+
+
+def test_rejections_carry_cors_headers():
+    """Testa que a admissão fica dentro do CORS (recusas legíveis no navegador)"""
+    # user_middleware vai do mais externo para o mais interno
+    order = [m.cls for m in api_app.user_middleware]
+    assert order.index(CORSMiddleware) < order.index(AdmissionMiddleware)
+
+    app = _app(AdmissionController(_limits(rate=0.5, burst=1)))
+    app.add_middleware(
+        CORSMiddleware, allow_origins=["*"], expose_headers=["Retry-After"]
+    )
+    client = TestClient(app)
+    headers = {"Origin": "https://exemplo.com"}
+    assert client.get("/ml/sample", headers=headers).status_code == 200
+
+    response = client.get("/ml/sample", headers=headers)
+    assert response.status_code == 429
+    assert response.headers["access-control-allow-origin"] == "*"
+    assert "retry-after" in response.headers["access-control-expose-headers"].lower()
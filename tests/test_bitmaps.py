@@ -0,0 +1,69 @@
+"""
+Testes para os índices bitmap
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from api.bitmaps import BitmapIndex, popcount
+from api.filters import FilterPlan, parse_filter_query
+from api.histogram import build_histogram_index
+
+
+@pytest.fixture
+def catalog():
+    """Catálogo aleatório (reprodutível) com 1000 livros"""
+    rng = np.random.default_rng(7)
+    n = 1000
+    return pd.DataFrame(
+        {
+            "category": rng.choice(["Poetry", "Fiction", "History", "Travel"], n),
+            "rating": rng.integers(1, 6, n),
+            "price": np.round(rng.uniform(5, 120, n), 2),
+            "availability": rng.choice(["In stock", "Out of stock"], n),
+        }
+    )
+
+
+def test_popcount():
+    """Testa contagem de bits"""
+    assert popcount(np.array([0b10110000, 0xFF, 0], dtype=np.uint8)) == 11
+
+
+def test_isin_and_price_bins(catalog):
+    """Testa OR entre valores e bitmap por faixa de preço"""
+    index = BitmapIndex(catalog)
+    bits = index.isin("category", ["poetry", "travel"])
+    expected = catalog["category"].isin(["Poetry", "Travel"]).sum()
+    assert index.count(bits) == expected
+
+    luxo = index.count(index.equals("price_bin", "luxo"))
+    assert luxo == (catalog["price"] > 60).sum()
+    assert (
+        index.count(index.equals("availability", "In stock"))
+        == (catalog["availability"] == "In stock").sum()
+    )
+
+
+def test_scraped_at_with_offset():
+    """Testa datas com offset (convertidas para UTC) e vazias no índice"""
+    df = pd.DataFrame(
+        {
+            "price": [10.0, 20.0, 30.0, 40.0],
+            "scraped_at": [
+                "2025-10-05T12:00:00",
+                "2025-10-05T12:00:00+02:00",  # 10:00 UTC
+                "",
+                "2025-10-05T23:00:00-03:00",  # 02:00 UTC do dia 6
+            ],
+        }
+    )
+    index = BitmapIndex(df)
+    column = index.sorted["scraped_at"]
+    assert list(column.valid) == [True, True, False, True]
+    assert list(column.order) == [1, 0, 3]
+
+    plan = FilterPlan(index, parse_filter_query("scraped_at:>=2025-10-05T11:00"))
+    assert list(plan.execute()) == [0, 3]
+    build_histogram_index(df)
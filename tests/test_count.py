@@ -0,0 +1,56 @@
+"""
+Testes para os modos de contagem (count_only e HEAD)
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from api.main import app
+
+
+@pytest.fixture
+def client():
+    """Cliente de teste para a API"""
+    return TestClient(app)
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        "/books?category=Poetry",
+        "/books?filter=rating:4..5;price:<30",
+        "/books",
+        "/books/search?q=love",
+        "/books/search?q=love&mode=ranked",
+    ],
+)
+def test_count_matches_listing(client, query):
+    """Testa count_only e HEAD contra o total da listagem"""
+    listing = client.get(query)
+    assert listing.status_code in [200, 503]
+
+    if listing.status_code == 200:
+        total = listing.json()["total"]
+        separator = "&" if "?" in query else "?"
+
+        counted = client.get(f"{query}{separator}count_only=true")
+        assert counted.status_code == 200
+        assert counted.json()["total"] == total
+        assert "livros" not in counted.json()
+        assert counted.headers["X-Total-Count"] == str(total)
+
+        head = client.head(query)
+        assert head.status_code == 200
+        assert head.headers["X-Total-Count"] == str(total)
+        assert head.content == b""
+
+
+def test_count_only_with_facets(client):
+    """Testa count_only com facetas e validação dos filtros"""
+    response = client.get("/books?count_only=true&min_rating=4&facets=rating")
+    assert response.status_code in [200, 503]
+
+    if response.status_code == 200:
+        data = response.json()
+        assert sum(f["contagem"] for f in data["facetas"]["rating"]) == data["total"]
+        assert client.head("/books?filter=titulo:x").status_code == 422
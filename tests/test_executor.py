@@ -0,0 +1,69 @@
+"""
+Testes para o pool de execução bloqueante
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from api.executor import BlockingExecutor
+
+
+@pytest.fixture
+def pool():
+    """Pool pequeno para testes"""
+    executor = BlockingExecutor("teste", max_workers=2)
+    yield executor
+    executor.shutdown()
+
+
+def test_run_returns_result_off_loop_thread(pool):
+    """Testa que a função roda em outra thread e retorna o valor"""
+    loop_thread = threading.get_ident()
+
+    async def main():
+        return await pool.run(lambda x: (x * 2, threading.get_ident()), 21)
+
+    value, worker_thread = asyncio.run(main())
+    assert value == 42
+    assert worker_thread != loop_thread
+    assert pool.stats()["concluidas"] == 1
+
+
+def test_run_propagates_exceptions(pool):
+    """Testa que exceções da função chegam ao chamador"""
+
+    def boom():
+        raise ValueError("falhou")
+
+    with pytest.raises(ValueError):
+        asyncio.run(pool.run(boom))
+    assert pool.stats()["falhas"] == 1
+
+
+def test_concurrency_is_bounded(pool):
+    """Testa que no máximo max_workers tarefas executam ao mesmo tempo"""
+    active = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def work():
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        time.sleep(0.02)
+        with lock:
+            active -= 1
+
+    async def main():
+        await asyncio.gather(*(pool.run(work) for _ in range(6)))
+
+    asyncio.run(main())
+    stats = pool.stats()
+    assert peak <= 2
+    assert stats["concluidas"] == 6
+    assert stats["fila_maxima"] >= 1
+    assert stats["na_fila"] == 0
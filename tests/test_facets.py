@@ -0,0 +1,122 @@
+"""
+Testes para as facetas (contagens por valor)
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+from api.bitmaps import BitmapIndex
+from api.facets import FacetIndex, parse_facets, price_bin_codes
+from api.main import app
+
+
+@pytest.fixture
+def index():
+    """Índice sobre um catálogo pequeno"""
+    df = pd.DataFrame(
+        {
+            "category": ["Poetry", "Fiction", "Fiction", "History", "Fiction"],
+            "rating": [3, 5, 1, 5, 3],
+            "price": [10.0, 20.0, 45.5, 59.99, 120.0],
+        }
+    )
+    return FacetIndex(df)
+
+
+@pytest.fixture
+def client():
+    """Cliente de teste para a API"""
+    return TestClient(app)
+
+
+def test_price_bins_include_prices_above_100():
+    """Testa faixas de preço (limite superior aberto)"""
+    codes = price_bin_codes(np.array([5.0, 20.0, 20.01, 60.0, 150.0]))
+    assert list(codes) == [0, 0, 1, 2, 3]
+
+
+def test_missing_price_has_no_price_bin():
+    """Testa que preço ausente não cai na faixa "luxo" """
+    codes = price_bin_codes(np.array([np.nan, 10.0, np.inf, 70.0]))
+    assert list(codes) == [-1, 0, -1, 3]
+
+    df = pd.DataFrame(
+        {
+            "category": ["Poetry", "Poetry", "Fiction"],
+            "rating": [1, 2, 3],
+            "price": [np.nan, 70.0, 10.0],
+        }
+    )
+    index = FacetIndex(df)
+    expected = [
+        {"valor": "economico", "contagem": 1},
+        {"valor": "luxo", "contagem": 1},
+    ]
+    assert index.counts(["price_bin"])["price_bin"] == expected
+    assert index.counts(["price_bin"], np.array([0, 1, 2]))["price_bin"] == expected
+    bitmaps = BitmapIndex(df)
+    assert list(bitmaps.positions(bitmaps.equals("price_bin", "luxo"))) == [1]
+
+
+def test_counts_over_whole_dataset(index):
+    """Testa contagens sem filtro (pré-calculadas)"""
+    counts = index.counts(["category", "rating", "price_bin"])
+    assert counts["category"] == [
+        {"valor": "Fiction", "contagem": 3},
+        {"valor": "History", "contagem": 1},
+        {"valor": "Poetry", "contagem": 1},
+    ]
+    assert [c["valor"] for c in counts["rating"]] == [1, 3, 5]
+    assert counts["price_bin"] == [
+        {"valor": "economico", "contagem": 2},
+        {"valor": "premium", "contagem": 2},
+        {"valor": "luxo", "contagem": 1},
+    ]
+
+
+def test_counts_over_positions(index):
+    """Testa contagens apenas nas posições do resultado"""
+    counts = index.counts(["rating"], np.array([1, 3, 4]))
+    assert counts["rating"] == [
+        {"valor": 3, "contagem": 1},
+        {"valor": 5, "contagem": 2},
+    ]
+
+
+def test_parse_facets_rejects_unknown_fields():
+    """Testa validação do parâmetro facets"""
+    assert parse_facets("rating, category,rating") == ["rating", "category"]
+    assert parse_facets(None) == []
+    with pytest.raises(ValueError):
+        parse_facets("category,isbn")
+
+
+def test_books_endpoint_facets_match_filtered_total(client):
+    """Testa facetas no /books somando o total filtrado"""
+    response = client.get("/books?min_rating=4&facets=category,rating&per_page=5")
+    assert response.status_code in [200, 503]
+
+    if response.status_code == 200:
+        data = response.json()
+        for counts in data["facetas"].values():
+            assert sum(c["contagem"] for c in counts) == data["total"]
+        assert all(c["valor"] >= 4 for c in data["facetas"]["rating"])
+
+
+def test_search_endpoint_facets(client):
+    """Testa facetas na busca ranqueada"""
+    response = client.get("/books/search?q=love&mode=ranked&facets=price_bin")
+    assert response.status_code in [200, 503]
+
+    if response.status_code == 200:
+        data = response.json()
+        counts = data["facetas"]["price_bin"]
+        assert sum(c["contagem"] for c in counts) == data["total"]
+
+
+def test_invalid_facet_returns_422(client):
+    """Testa faceta desconhecida"""
+    response = client.get("/books?facets=isbn")
+    assert response.status_code in [422, 503]
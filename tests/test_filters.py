@@ -0,0 +1,195 @@
+"""
+Testes para a linguagem de filtros e o plano de execução
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+from api.bitmaps import BitmapIndex
+from api.filters import (
+    FilterError,
+    FilterPlan,
+    legacy_predicates,
+    parse_filter_json,
+    parse_filter_query,
+)
+from api.main import app
+from api.profiling import run_with_diagnostics
+from api.utils import filter_books
+
+
+@pytest.fixture
+def catalog():
+    """Catálogo aleatório (reprodutível) com 2000 livros"""
+    rng = np.random.default_rng(11)
+    n = 2000
+    start = pd.Timestamp("2025-10-01")
+    return pd.DataFrame(
+        {
+            "category": rng.choice(["Poetry", "Fiction", "History", "Travel"], n),
+            "rating": rng.integers(1, 6, n),
+            "price": np.round(rng.uniform(5, 120, n), 2),
+            "availability": rng.choice(["In stock", "Out of stock"], n, p=[0.8, 0.2]),
+            "availability_copies": rng.integers(0, 23, n),
+            "scraped_at": [
+                (start + pd.Timedelta(minutes=int(m))).isoformat()
+                for m in rng.integers(0, 60 * 24 * 20, n)
+            ],
+        }
+    )
+
+
+@pytest.fixture
+def client():
+    """Cliente de teste para a API"""
+    return TestClient(app)
+
+
+def _run(catalog, predicates):
+    return FilterPlan(BitmapIndex(catalog), predicates).execute()
+
+
+@pytest.mark.parametrize(
+    "filters",
+    [
+        {"category": "poetry"},
+        {"min_price": 20.0, "max_price": 45.5},
+        {"min_rating": 4},
+        {"category": "Fiction", "min_price": 100.0, "min_rating": 2},
+        {"category": "Inexistente"},
+    ],
+)
+def test_legacy_filters_match_scan(catalog, filters):
+    """Testa equivalência com a varredura de filter_books"""
+    positions = _run(catalog, legacy_predicates(**filters))
+    expected = filter_books(catalog, **filters).index.to_numpy()
+    assert list(positions) == list(expected)
+
+
+def test_no_predicates_returns_none(catalog):
+    """Testa que sem filtros não há seleção (dataset inteiro)"""
+    assert _run(catalog, []) is None
+
+
+def test_query_string_filter(catalog):
+    """Testa multi-categoria, intervalo de rating, cópias, estoque e datas"""
+    predicates = parse_filter_query(
+        "category:poetry|Travel; rating:2..4; availability_copies:>=5; in_stock;"
+        "scraped_at:2025-10-05..2025-10-10T12:00"
+    )
+    scraped = pd.to_datetime(catalog["scraped_at"])
+    expected = catalog[
+        catalog["category"].isin(["Poetry", "Travel"])
+        & catalog["rating"].between(2, 4)
+        & (catalog["availability_copies"] >= 5)
+        & (catalog["availability"] == "In stock")
+        & scraped.between("2025-10-05", "2025-10-10T12:00")
+    ].index
+    assert list(_run(catalog, predicates)) == list(expected)
+
+
+def test_json_filter_with_strict_bounds(catalog):
+    """Testa filtro JSON com limites abertos e in_stock falso"""
+    predicates = parse_filter_json(
+        {"price": {"gt": 30, "lt": 60}, "rating": [1, 5], "in_stock": False}
+    )
+    expected = catalog[
+        (catalog["price"] > 30)
+        & (catalog["price"] < 60)
+        & catalog["rating"].isin([1, 5])
+        & (catalog["availability"] != "In stock")
+    ].index
+    assert list(_run(catalog, predicates)) == list(expected)
+
+
+def test_plan_orders_by_selectivity(catalog):
+    """Testa que o predicado mais seletivo é aplicado primeiro"""
+    predicates = parse_filter_query("in_stock;rating:5;price:>=110")
+    _, diagnostics = run_with_diagnostics(_run, catalog, predicates, explain=True)
+    steps = diagnostics["plano"]["etapas"]
+    assert [s["etapa"] for s in steps] == [
+        "filtro_price",
+        "filtro_rating",
+        "filtro_in_stock",
+    ]
+    assert steps[0]["estimativa"] <= steps[1]["estimativa"] <= steps[2]["estimativa"]
+    # Resultado pequeno: os predicados seguintes usam as posições
+    assert steps[-1]["indice"] == "posicoes"
+
+
+@pytest.mark.parametrize(
+    "text",
+    ["", "in_stock", "category:poetry|travel;rating:>=2", "rating:5;price:>=110"],
+)
+def test_plan_count_matches_positions(catalog, text):
+    """Testa que a contagem por popcount coincide com as posições"""
+    plan = FilterPlan(BitmapIndex(catalog), parse_filter_query(text))
+    positions = plan.execute()
+    assert plan.count() == (len(catalog) if positions is None else len(positions))
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "isbn:123",
+        "rating:abc",
+        "price:",
+        "scraped_at:ontem",
+        "scraped_at:>=",
+        "in_stock:talvez",
+    ],
+)
+def test_invalid_query_filters(text):
+    """Testa erros de campo e valor"""
+    with pytest.raises(FilterError):
+        parse_filter_query(text)
+
+
+def test_invalid_json_operator():
+    """Testa operador desconhecido no JSON"""
+    with pytest.raises(FilterError):
+        parse_filter_json({"price": {"between": [1, 2]}})
+
+
+def test_books_filter_param(client):
+    """Testa parâmetro filter no /books"""
+    response = client.get("/books?filter=category:Poetry|Travel;rating:4..5")
+    assert response.status_code in [200, 503]
+
+    if response.status_code == 200:
+        for book in response.json()["livros"]:
+            assert book["category"] in ("Poetry", "Travel")
+            assert 4 <= book["rating"] <= 5
+
+    assert client.get("/books?filter=isbn:1").status_code in [422, 503]
+
+
+def test_blank_date_rejected(client):
+    """Testa que data vazia é 422 (e não um filtro que aceita tudo)"""
+    with pytest.raises(FilterError):
+        parse_filter_json({"scraped_at": {"gte": ""}})
+
+    assert client.get("/books?filter=scraped_at:>=").status_code in [422, 503]
+    response = client.post("/books/query", json={"filter": {"scraped_at": {"gte": ""}}})
+    assert response.status_code in [422, 503]
+
+
+def test_books_query_endpoint(client):
+    """Testa POST /books/query com filtro JSON"""
+    response = client.post(
+        "/books/query",
+        json={
+            "filter": {"rating": {"gte": 4}, "availability_copies": {"gte": 10}},
+            "sort": "price",
+            "per_page": 5,
+        },
+    )
+    assert response.status_code in [200, 503]
+
+    if response.status_code == 200:
+        books = response.json()["livros"]
+        assert all(b["rating"] >= 4 and b["availability_copies"] >= 10 for b in books)
+        prices = [b["price"] for b in books]
+        assert prices == sorted(prices)
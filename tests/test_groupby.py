@@ -0,0 +1,134 @@
+"""
+Testes para agregações agrupadas (cubo e agrupamento por linhas)
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+from api.bitmaps import BitmapIndex
+from api.cube import AggregateCube, parse_dimensions, parse_metrics
+from api.filters import FilterPlan, parse_filter_query
+from api.main import app
+
+
+@pytest.fixture
+def client():
+    """Cliente de teste para a API"""
+    return TestClient(app)
+
+
+@pytest.fixture
+def books():
+    """Catálogo sintético com nulos nas dimensões e medidas"""
+    rng = np.random.default_rng(5)
+    n = 300
+    df = pd.DataFrame(
+        {
+            "id": np.arange(1, n + 1),
+            "category": rng.choice(["Poetry", "Fiction", "History"], n),
+            "rating": rng.integers(1, 6, n).astype(float),
+            "availability": rng.choice(["In stock", "Out of stock"], n),
+            "availability_copies": rng.integers(0, 10, n),
+            "price": rng.uniform(5, 120, n).round(2),
+        }
+    )
+    df.loc[[3, 40], "category"] = np.nan
+    df.loc[[7, 50], "price"] = np.nan
+    df.loc[9, "rating"] = np.nan
+    return df
+
+
+@pytest.mark.parametrize(
+    "by,filter_text,source",
+    [
+        ("category,rating", "", "cubo"),
+        ("rating", "category:poetry|fiction;rating:>=3;in_stock", "cubo"),
+        ("price_bin,availability", "availability:Out of stock", "cubo"),
+        ("price_bin", "price:>=30", "linhas"),
+        ("availability_copies,rating", "rating:2..4", "linhas"),
+    ],
+)
+def test_group_by_matches_pandas(books, by, filter_text, source):
+    """Testa cubo e agrupamento por linhas contra o groupby do pandas"""
+    cube = AggregateCube(books)
+    index = BitmapIndex(books)
+    dimensions = parse_dimensions(by)
+    predicates = parse_filter_query(filter_text)
+    metrics = parse_metrics("count,mean(price),sum(availability_copies),min(price)")
+
+    result = cube.group_by(dimensions, metrics, predicates, index)
+    assert result["fonte"] == source
+
+    positions = FilterPlan(index, predicates).execute()
+    subset = books if positions is None else books.iloc[positions]
+    subset = subset.assign(
+        price_bin=pd.cut(
+            subset["price"],
+            [-np.inf, 20, 40, 60, np.inf],
+            labels=["economico", "moderado", "premium", "luxo"],
+        )
+    )
+    expected = (
+        subset.groupby(dimensions, observed=True)
+        .agg(
+            count=("id", "size"),
+            mean_price=("price", "mean"),
+            copies=("availability_copies", "sum"),
+            min_price=("price", "min"),
+        )
+        .reset_index()
+    )
+
+    assert result["total"] == len(subset)
+    assert len(result["grupos"]) == len(expected)
+    for (_, row), group in zip(expected.iterrows(), result["grupos"]):
+        assert group["chave"] == {d: row[d] for d in dimensions}
+        values = group["valores"]
+        assert values["count"] == row["count"]
+        assert values["sum(availability_copies)"] == row["copies"]
+        assert np.isclose(values["mean(price)"], row["mean_price"])
+        assert np.isclose(values["min(price)"], row["min_price"])
+
+
+def test_parse_errors():
+    """Testa dimensões e métricas inválidas"""
+    for by in ["", "title", "rating,foo"]:
+        with pytest.raises(ValueError):
+            parse_dimensions(by)
+    for metrics in ["avg(price)", "count(price)", "sum", "sum(title)", "mean(price"]:
+        with pytest.raises(ValueError):
+            parse_metrics(metrics)
+    assert [m.label for m in parse_metrics("count, mean(price),count")] == [
+        "count",
+        "mean(price)",
+    ]
+
+
+def test_groupby_endpoint(client):
+    """Testa /stats/groupby contra /stats"""
+    response = client.get(
+        "/stats/groupby?by=rating&metrics=count,mean(price),sum(availability_copies)"
+    )
+    assert response.status_code in [200, 503]
+
+    if response.status_code == 200:
+        data = response.json()
+        assert data["fonte"] == "cubo"
+        assert data["metricas"] == [
+            "count",
+            "mean(price)",
+            "sum(availability_copies)",
+        ]
+        stats = client.get("/stats").json()
+        assert {
+            str(g["chave"]["rating"]): g["valores"]["count"] for g in data["grupos"]
+        } == stats["distribuicao_avaliacoes"]
+
+        filtered = client.get("/stats/groupby?by=category&filter=price:>1000").json()
+        assert filtered["fonte"] == "linhas"
+        assert filtered["total"] == 0 and filtered["grupos"] == []
+
+        assert client.get("/stats/groupby?by=title").status_code == 422
+        assert client.get("/stats/groupby?by=rating&metrics=x").status_code == 422
@@ -0,0 +1,105 @@
+"""
+Testes para histogramas e faixas de preço das estatísticas
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+from api.histogram import HistogramIndex, parse_edges
+from api.main import _statistics, app
+
+
+@pytest.fixture
+def client():
+    """Cliente de teste para a API"""
+    return TestClient(app)
+
+
+@pytest.fixture
+def books():
+    """Catálogo sintético com preços acima de 100 e nulos"""
+    rng = np.random.default_rng(11)
+    n = 400
+    df = pd.DataFrame(
+        {
+            "id": np.arange(1, n + 1),
+            "title": [f"Livro {i}" for i in range(n)],
+            "price": rng.uniform(5, 180, n).round(2),
+            "rating": rng.integers(1, 6, n),
+            "availability_copies": rng.integers(0, 25, n),
+            "category": rng.choice(["Poetry", "Fiction"], n),
+            "availability": "In stock",
+        }
+    )
+    df.loc[[4, 8], "price"] = np.nan
+    return df
+
+
+@pytest.mark.parametrize("filtered", [False, True])
+@pytest.mark.parametrize("edges", [None, "0,20,40,60,100", "30,90"])
+def test_histogram_matches_numpy(books, filtered, edges):
+    """Testa contagens contra np.histogram (com filtros, nulos e bordas)"""
+    index = HistogramIndex(books)
+    assert index.fields == ["price", "rating", "availability_copies"]
+
+    positions = np.flatnonzero(books["rating"] >= 3) if filtered else None
+    result = index.histogram("price", 7, parse_edges(edges), positions)
+
+    values = books["price"].to_numpy()
+    if filtered:
+        values = values[positions]
+    present = values[~np.isnan(values)]
+    bounds = [bucket["inicio"] for bucket in result["faixas"]]
+    bounds.append(result["faixas"][-1]["fim"])
+    expected, _ = np.histogram(present, bins=bounds)
+
+    assert [bucket["contagem"] for bucket in result["faixas"]] == list(expected)
+    assert result["total"] == len(present)
+    assert result["nulos"] == len(values) - len(present)
+    assert result["abaixo"] == (present < bounds[0]).sum()
+    assert result["acima"] == (present > bounds[-1]).sum()
+    if edges is None:
+        assert sum(expected) == len(present)
+
+
+def test_parse_edges_errors():
+    """Testa bordas inválidas"""
+    for edges in ["10", "a,b", "3,1", "1,1,2", "0,inf"]:
+        with pytest.raises(ValueError):
+            parse_edges(edges)
+    assert parse_edges(None) is None
+
+
+def test_statistics_price_bins_include_prices_above_100(books):
+    """Testa que livros acima de 100 entram na faixa luxo"""
+    bins = _statistics(books)["faixas_preco"]
+
+    prices = books["price"].dropna()
+    assert sum(bins.values()) == len(prices)
+    assert bins["luxo"] == (prices > 60).sum()
+
+
+def test_histogram_endpoint(client):
+    """Testa /stats/histogram"""
+    response = client.get("/stats/histogram?field=price&edges=0,20,40,60,100")
+    assert response.status_code in [200, 503]
+
+    if response.status_code == 200:
+        data = response.json()
+        assert len(data["faixas"]) == 4
+        stats = client.get("/stats").json()
+        assert sum(b["contagem"] for b in data["faixas"]) + data["acima"] == (
+            stats["total_livros"] - data["nulos"]
+        )
+
+        rating = client.get("/stats/histogram?field=rating&bins=5&filter=rating:>=4")
+        assert sum(b["contagem"] for b in rating.json()["faixas"]) == sum(
+            count
+            for value, count in stats["distribuicao_avaliacoes"].items()
+            if int(value) >= 4
+        )
+
+        assert client.get("/stats/histogram?field=title").status_code == 422
+        assert client.get("/stats/histogram?edges=5,1").status_code == 422
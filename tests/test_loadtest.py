@@ -0,0 +1,78 @@
+"""
+Testes para as funções de análise do teste de carga
+"""
+
+from scripts.loadtest import Recorder, compare_with_baseline, percentile
+
+
+def test_percentile_nearest_rank():
+    """Testa percentis pelo método nearest-rank"""
+    values = [float(v) for v in range(1, 101)]
+    assert percentile(values, 50) == 50.0
+    assert percentile(values, 95) == 95.0
+    assert percentile(values, 99) == 99.0
+    assert percentile([], 99) == 0.0
+
+
+def test_recorder_counts_errors():
+    """Testa contagem de erros (5xx, 429, falhas de transporte; 404 não)"""
+    recorder = Recorder()
+    recorder.record("list", 0.01, "200")
+    recorder.record("list", 0.02, "404")
+    recorder.record("list", 0.03, "503")
+    recorder.record("search", 0.04, "ConnectError")
+
+    summary = recorder.summary(elapsed=1.0)
+    assert summary["list"]["requisicoes"] == 3
+    assert summary["list"]["erros"] == 1
+    assert summary["total"]["erros"] == 2
+    assert summary["total"]["throughput_rps"] == 4.0
+
+
+def test_compare_with_baseline_flags_regressions():
+    """Testa detecção de regressão de latência e throughput"""
+    baseline = {
+        "list": {"p95_ms": 10.0, "p99_ms": 20.0},
+        "total": {"p95_ms": 10.0, "p99_ms": 20.0, "throughput_rps": 100.0},
+    }
+    ok = {
+        "list": {"p95_ms": 11.0, "p99_ms": 21.0},
+        "total": {"p95_ms": 11.0, "p99_ms": 21.0, "throughput_rps": 95.0},
+    }
+    slow = {
+        "list": {"p95_ms": 20.0, "p99_ms": 21.0},
+        "total": {"p95_ms": 11.0, "p99_ms": 21.0, "throughput_rps": 50.0},
+    }
+
+    assert compare_with_baseline(ok, baseline, 0.25, 0.2) == []
+    regressions = compare_with_baseline(slow, baseline, 0.25, 0.2)
+    assert any(r.startswith("list p95_ms") for r in regressions)
+    assert any("throughput" in r for r in regressions)
+    assert len(compare_with_baseline(slow, baseline, 0.25, None)) == 1
+
+
+def test_compare_with_baseline_flags_error_rate():
+    """Testa regressão quando a taxa de erros sobe, mesmo com latência menor"""
+    baseline = {
+        "list": {"requisicoes": 1000, "erros": 5, "p95_ms": 10.0, "p99_ms": 20.0},
+        "total": {
+            "requisicoes": 1000,
+            "erros": 5,
+            "p95_ms": 10.0,
+            "p99_ms": 20.0,
+            "throughput_rps": 100.0,
+        },
+    }
+    # Falha rápido: latência e throughput melhores, 30% de 5xx
+    failing = {
+        endpoint: {**stats, "erros": 300, "p95_ms": 2.0, "p99_ms": 4.0}
+        for endpoint, stats in baseline.items()
+    }
+    failing["total"]["throughput_rps"] = 500.0
+    within = {endpoint: {**stats, "erros": 12} for endpoint, stats in baseline.items()}
+
+    regressions = compare_with_baseline(failing, baseline, 0.25, 0.2)
+    assert [r.split(" ")[0] for r in regressions] == ["list", "total"]
+    assert all("taxa de erros" in r for r in regressions)
+    assert compare_with_baseline(within, baseline, 0.25, 0.2) == []
+    assert len(compare_with_baseline(within, baseline, 0.25, 0.2, 0.005)) == 2
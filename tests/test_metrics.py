@@ -0,0 +1,65 @@
+"""
+Testes para métricas e endpoint /metrics
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from api.main import app
+from api.metrics import Counter, Histogram, stage, STAGE_DURATION
+
+
+@pytest.fixture
+def client():
+    """Cliente de teste para a API"""
+    return TestClient(app)
+
+
+def test_histogram_render_is_cumulative():
+    """Testa buckets cumulativos, soma e contagem"""
+    histogram = Histogram("teste_seconds", "Teste", ["route"], buckets=(0.1, 1.0))
+    histogram.observe(0.05, "/a")
+    histogram.observe(0.5, "/a")
+    histogram.observe(5.0, "/a")
+
+    text = "\n".join(histogram.render())
+    assert 'teste_seconds_bucket{route="/a",le="0.1"} 1' in text
+    assert 'teste_seconds_bucket{route="/a",le="1.0"} 2' in text
+    assert 'teste_seconds_bucket{route="/a",le="+Inf"} 3' in text
+    assert 'teste_seconds_count{route="/a"} 3' in text
+
+
+def test_counter_escapes_label_values():
+    """Testa escape de aspas nos valores de label"""
+    counter = Counter("teste_total", "Teste", ["q"])
+    counter.inc('a"b')
+    assert 'teste_total{q="a\\"b"} 1' in "\n".join(counter.render())
+
+
+def test_stage_records_outside_request():
+    """Testa que stage funciona fora de uma requisição"""
+    with stage("teste_unitario"):
+        pass
+    assert STAGE_DURATION.snapshot("<unmatched>", "teste_unitario") is not None
+
+
+def test_metrics_endpoint_reports_routes_and_stages(client):
+    """Testa exposição de requisições por rota template e etapas"""
+    client.get("/books?per_page=5&sort=price")
+    client.get("/books/1")
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+
+    text = response.text
+    assert 'http_requests_total{method="GET",route="/books/{book_id}"' in text
+    assert "http_request_duration_seconds_bucket" in text
+    assert "http_requests_in_flight" in text
+    assert "process_resident_memory_bytes" in text
+    assert "books_dataset_rows" in text
+    assert "books_dataset_info{version=" in text
+
+    if client.get("/health").json()["dados_carregados"]:
+        assert 'handler_stage_duration_seconds_count{route="/books",stage="filter"}' in text
+        assert 'handler_stage_duration_seconds_count{route="/books",stage="sort"}' in text
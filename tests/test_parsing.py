@@ -0,0 +1,70 @@
+"""
+Testes do parse das páginas salvas (backends e parse parcial)
+"""
+
+import pytest
+
+from scripts.bench_parse import CATEGORY_URL, check_outputs, load_fixtures
+from scripts.crawler.parsing import (
+    BASE_URL,
+    DETAIL,
+    available_backends,
+    make_soup,
+    parse_page,
+)
+
+FIXTURES = {name: (kind, url, content) for name, kind, url, content in load_fixtures()}
+
+
+def _parse(name: str, **kwargs) -> dict:
+    kind, url, content = FIXTURES[name]
+    return parse_page(kind, content, url, **kwargs)
+
+
+def test_fixture_pages():
+    """Testa o conteúdo extraído das páginas salvas"""
+    index = _parse("index.html")
+    assert len(index["categories"]) == 50
+    assert index["categories"][1] == {
+        "name": "Mystery",
+        "url": f"{BASE_URL}/catalogue/category/books/mystery_3/index.html",
+    }
+
+    first = _parse("category.html")
+    assert len(first["entries"]) == 20
+    assert first["next"] == f"{CATEGORY_URL}/page-2.html"
+    entry = first["entries"][0]
+    assert entry["product_page_url"].startswith(f"{BASE_URL}/catalogue/")
+    assert "/../" not in entry["product_page_url"]
+    assert entry["image_url"].startswith(f"{BASE_URL}/media/cache/")
+    assert entry["price"] > 0 and 1 <= entry["rating"] <= 5
+
+    last = _parse("category-page-2.html")
+    assert len(last["entries"]) == 12
+    assert last["next"] is None
+
+    details = _parse("book-1.html")["details"]
+    assert details["availability"] == "In stock"
+    assert details["availability_copies"] > 0
+    assert len(details["upc"]) == 16
+    assert len(details["description"]) > 2000
+    assert _parse("book-3.html")["details"]["description"] == ""
+
+
+@pytest.mark.parametrize("backend", available_backends())
+@pytest.mark.parametrize("name", sorted(FIXTURES))
+def test_partial_parse_matches_full(backend, name):
+    """Testa que o parse parcial e cada backend dão o mesmo resultado"""
+    reference = _parse(name, backend="html.parser", partial=False)
+    assert _parse(name, backend=backend, partial=True) == reference
+    assert _parse(name, backend=backend, partial=False) == reference
+
+
+def test_check_outputs_and_partial_tree():
+    """Testa a checagem do benchmark e o tamanho da árvore parcial"""
+    assert check_outputs() == []
+    _, _, content = FIXTURES["book-1.html"]
+    full = make_soup(content)
+    partial = make_soup(content, DETAIL)
+    assert len(partial.find_all(True)) < len(full.find_all(True)) / 2
+    assert partial.find("table", class_="table table-striped") is not None
@@ -0,0 +1,142 @@
+"""
+Testes para o modo explain e perfil por requisição
+"""
+
+import threading
+
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+from api.bitmaps import BitmapIndex
+from api.config import settings
+from api.filters import FilterPlan, legacy_predicates
+from api.main import app
+from api.profiling import ProfilerBusy, plan_step, run_with_diagnostics
+
+
+@pytest.fixture
+def client():
+    """Cliente de teste para a API"""
+    return TestClient(app)
+
+
+@pytest.fixture
+def debug_token(monkeypatch):
+    """Configura token de diagnóstico"""
+    monkeypatch.setattr(settings, "debug_token", "segredo")
+    return "segredo"
+
+
+def test_plan_records_rows_per_filter():
+    """Testa linhas sobreviventes em cada filtro aplicado"""
+    df = pd.DataFrame(
+        {
+            "category": ["Fiction", "Fiction", "Science"],
+            "price": [10.0, 30.0, 50.0],
+            "rating": [1, 4, 5],
+        }
+    )
+    plan = FilterPlan(
+        BitmapIndex(df), legacy_predicates(category="fiction", min_rating=3)
+    )
+    result, diagnostics = run_with_diagnostics(plan.execute, explain=True)
+    assert list(result) == [1]
+
+    steps = diagnostics["plano"]["etapas"]
+    assert [s["etapa"] for s in steps] == ["filtro_category", "filtro_min_rating"]
+    assert steps[0]["linhas_entrada"] == 3
+    assert steps[0]["linhas_saida"] == 2
+    assert steps[1]["linhas_saida"] == 1
+    assert "perfil" not in diagnostics
+
+
+def test_plan_step_is_noop_without_plan():
+    """Testa que plan_step não falha sem plano ativo"""
+    with plan_step("qualquer") as st:
+        st.set(linhas=1)
+
+
+def test_profile_summary():
+    """Testa resumo do perfil de CPU"""
+    result, diagnostics = run_with_diagnostics(sum, range(1000), profile=True)
+    assert result == sum(range(1000))
+    assert diagnostics["perfil"]["total_chamadas"] >= 1
+    assert "plano" not in diagnostics
+
+
+def test_profile_one_at_a_time(client, debug_token):
+    """Testa que um segundo perfil simultâneo é recusado (409), não 500"""
+    started, release = threading.Event(), threading.Event()
+
+    def slow():
+        started.set()
+        release.wait(5)
+
+    first = threading.Thread(
+        target=run_with_diagnostics, args=(slow,), kwargs={"profile": True}
+    )
+    first.start()
+    try:
+        assert started.wait(5)
+        with pytest.raises(ProfilerBusy):
+            run_with_diagnostics(sum, range(10), profile=True)
+        # Sem perfil o diagnóstico continua disponível
+        assert run_with_diagnostics(sum, range(10), explain=True)[0] == 45
+
+        response = client.get(
+            "/books/search?q=the",
+            headers={"X-Debug-Token": debug_token, "X-Profile": "1"},
+        )
+        assert response.status_code in [409, 503]
+    finally:
+        release.set()
+        first.join()
+
+    response = client.get(
+        "/books/search?q=the",
+        headers={"X-Debug-Token": debug_token, "X-Profile": "1"},
+    )
+    assert response.status_code in [200, 503]
+
+
+def test_profile_released_after_error():
+    """Testa que o perfil é liberado quando o handler falha"""
+    with pytest.raises(ZeroDivisionError):
+        run_with_diagnostics(lambda: 1 / 0, profile=True)
+    assert run_with_diagnostics(sum, range(10), profile=True)[0] == 45
+
+
+def test_explain_requires_token(client):
+    """Testa que explain sem token é recusado"""
+    response = client.get("/books?explain=true")
+    assert response.status_code in [403, 503]
+
+
+def test_explain_with_token(client, debug_token):
+    """Testa plano de consulta ao lado dos dados"""
+    response = client.get(
+        "/books?min_price=10&sort=price&per_page=5&explain=true",
+        headers={"X-Debug-Token": debug_token},
+    )
+    assert response.status_code in [200, 503]
+
+    if response.status_code == 200:
+        data = response.json()
+        assert "livros" in data
+        steps = [s["etapa"] for s in data["diagnostico"]["plano"]["etapas"]]
+        assert "filtro_min_price" in steps
+        assert "sort" in steps
+        assert "serialize" in steps
+
+
+def test_profile_header_with_token(client, debug_token):
+    """Testa perfil de CPU via header"""
+    response = client.get(
+        "/books/search?q=the",
+        headers={"X-Debug-Token": debug_token, "X-Profile": "1"},
+    )
+    assert response.status_code in [200, 503]
+
+    if response.status_code == 200:
+        assert response.json()["diagnostico"]["perfil"]["funcoes"]
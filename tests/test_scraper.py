@@ -0,0 +1,682 @@
+"""
+Testes para o scraper sequencial e o motor assíncrono (site falso em memória)
+"""
+
+import asyncio
+import hashlib
+import importlib.util
+import json
+import time
+from collections import Counter
+
+import httpx
+import pandas as pd
+import pytest
+import requests
+from requests.adapters import BaseAdapter
+
+from scripts.crawler.adaptive import AimdController
+from scripts.crawler.checkpoint import Checkpoint
+from scripts.crawler.engine import AsyncCrawler, RateLimiter
+from scripts.crawler.metrics import write_report
+from scripts.crawler.parsing import BASE_URL, FIELDNAMES
+from scripts.crawler.replay import FixtureServer, ResponseCache
+from scripts.crawler.site import generate_site, load_books
+from scripts.crawler.sinks import (
+    ColumnarSink,
+    CsvSink,
+    ListSink,
+    RecordStream,
+    open_sink,
+    read_columnar,
+)
+from scripts.crawler.state import CrawlState, Fetched
+from scripts.scraper import BooksToScrapeScraper
+
+RATINGS = ["One", "Two", "Three", "Four", "Five"]
+
+CATALOG = {
+    "Poetry": [
+        ("A Light in the Attic", "51.77", "In stock (22 available)"),
+        ("Olio", "23.88", "In stock (1 available)"),
+        ("Shakespeare's Sonnets", "20.66", "Out of stock"),
+    ],
+    "Travel": [("Full Moon over Noah's Ark", "49.43", "In stock (15 available)")],
+}
+
+
+def _slug(title: str) -> str:
+    return "".join(c if c.isalnum() else "-" for c in title.lower())
+
+
+def build_site(per_page: int = 2, catalog: dict = None) -> dict:
+    """Páginas no formato de books.toscrape.com: URL -> HTML"""
+    site = {}
+    links = []
+    catalog = catalog if catalog is not None else CATALOG
+    for index, (category, books) in enumerate(catalog.items(), 2):
+        folder = f"{BASE_URL}/catalogue/category/books/{category.lower()}_{index}"
+        links.append(
+            f'<li><a href="catalogue/category/books/{category.lower()}_{index}'
+            f'/index.html">\n {category}\n</a></li>'
+        )
+        pages = [books[i : i + per_page] for i in range(0, len(books), per_page)]
+        for number, page in enumerate(pages, 1):
+            name = "index.html" if number == 1 else f"page-{number}.html"
+            articles = []
+            for position, (title, price, availability) in enumerate(page):
+                slug = _slug(title)
+                rating = RATINGS[(len(title) + position) % 5]
+                articles.append(
+                    f'<article class="product_pod"><div class="image_container">'
+                    f'<a href="../../../{slug}/index.html"><img src="../../../../'
+                    f'media/cache/{slug}.jpg" alt="{title}"></a></div>'
+                    f'<p class="star-rating {rating}"></p>'
+                    f'<h3><a href="../../../{slug}/index.html" title="{title}">'
+                    f'{title[:10]}...</a></h3><div class="product_price">'
+                    f'<p class="price_color">£{price}</p></div></article>'
+                )
+                site[f"{BASE_URL}/catalogue/{slug}/index.html"] = (
+                    f'<html><body><div id="product_description" class="sub-header">'
+                    f"<h2>Product Description</h2></div><p>About {title}.</p>"
+                    f'<table class="table table-striped">'
+                    f"<tr><th>UPC</th><td>{slug[:16]}</td></tr>"
+                    f"<tr><th>Availability</th><td>{availability}</td></tr>"
+                    f"</table></body></html>"
+                )
+            pager = (
+                f'<li class="next"><a href="page-{number + 1}.html">next</a></li>'
+                if number < len(pages)
+                else ""
+            )
+            site[f"{folder}/{name}"] = (
+                f"<html><body><ol class='row'>{''.join(articles)}</ol>"
+                f'<ul class="pager">{pager}</ul></body></html>'
+            )
+    site[BASE_URL] = (
+        '<html><body><ul class="nav nav-list"><li><a href="index.html">Books</a>'
+        f"<ul>{''.join(links)}</ul></li></ul></body></html>"
+    )
+    return {url: html.encode() for url, html in site.items()}
+
+
+def _lookup(site: dict, url: str):
+    return site.get(url, site.get(url.rstrip("/")))
+
+
+def _etag(content: bytes) -> str:
+    return f'"{hashlib.sha1(content).hexdigest()[:16]}"'
+
+
+class FakeAdapter(BaseAdapter):
+    """Adapter do requests que responde a partir do site em memória"""
+
+    def __init__(self, site: dict, validators: bool = True, crash_after: int = None):
+        super().__init__()
+        self.site = site
+        self.validators = validators
+        self.crash_after = crash_after
+        self.requests = Counter()
+        self.not_modified = 0
+
+    def send(self, request, **kwargs):
+        response = requests.Response()
+        served = sum(self.requests.values())
+        if self.crash_after is not None and served >= self.crash_after:
+            raise KeyboardInterrupt("queda simulada")
+        self.requests[request.url.rstrip("/")] += 1
+        content = _lookup(self.site, request.url)
+        response.status_code = 200 if content is not None else 404
+        response._content = content or b""
+        if content is not None and self.validators:
+            response.headers["ETag"] = _etag(content)
+            if request.headers.get("If-None-Match") == _etag(content):
+                response.status_code = 304
+                response._content = b""
+                self.not_modified += 1
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+
+def _transport(site: dict, failures: dict = None, tracker: dict = None):
+    """Transporte httpx com falhas programadas e contagem de concorrência"""
+    failures = failures if failures is not None else {}
+    tracker = tracker if tracker is not None else {}
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        url = str(request.url)
+        tracker.setdefault("requests", Counter())[url.rstrip("/")] += 1
+        tracker["now"] = tracker.get("now", 0) + 1
+        tracker["max"] = max(tracker.get("max", 0), tracker["now"])
+        try:
+            await asyncio.sleep(0.001)
+            if failures.get(url.rstrip("/"), 0) > 0:
+                failures[url.rstrip("/")] -= 1
+                return httpx.Response(503, headers={"Retry-After": "0"})
+            content = _lookup(site, url)
+            if content is None:
+                return httpx.Response(404)
+            etag = _etag(content)
+            if request.headers.get("If-None-Match") == etag:
+                return httpx.Response(304, headers={"ETag": etag})
+            return httpx.Response(200, content=content, headers={"ETag": etag})
+        finally:
+            tracker["now"] -= 1
+
+    return httpx.MockTransport(handler)
+
+
+def _without_timestamps(books):
+    return [{k: v for k, v in book.items() if k != "scraped_at"} for book in books]
+
+
+@pytest.fixture
+def site():
+    return build_site()
+
+
+def test_async_matches_sequential(site):
+    """Testa que o motor assíncrono produz os mesmos registros e ids"""
+    scraper = BooksToScrapeScraper(delay=0)
+    scraper.session.mount("https://", FakeAdapter(site))
+    sequential = scraper.scrape_all_books()
+
+    crawler = AsyncCrawler(rate=0, per_host=3, transport=_transport(site))
+    concurrent = crawler.run()
+
+    assert len(sequential) == 4
+    assert _without_timestamps(concurrent) == _without_timestamps(sequential)
+    assert [book["id"] for book in concurrent] == [1, 2, 3, 4]
+    first = concurrent[0]
+    assert first["category"] == "Poetry"
+    assert first["price"] == 51.77
+    assert first["availability_copies"] == 22
+    assert first["description"] == "About A Light in the Attic."
+    assert first["image_url"].startswith(f"{BASE_URL}/media/cache/")
+
+
+def test_each_url_fetched_once():
+    """Testa que listagens e detalhes são buscados uma única vez"""
+    shared = ("Olio", "23.88", "In stock (1 available)")
+    catalog = {**CATALOG, "Travel": CATALOG["Travel"] + [shared]}
+    site = build_site(per_page=1, catalog=catalog)
+
+    scraper = BooksToScrapeScraper(delay=0)
+    adapter = FakeAdapter(site)
+    scraper.session.mount("https://", adapter)
+    sequential = scraper.scrape_all_books()
+
+    tracker = {}
+    crawler = AsyncCrawler(rate=0, per_host=3, transport=_transport(site, {}, tracker))
+    concurrent = crawler.run()
+
+    # Uma requisição por página do site (o livro repetido tem uma página só)
+    assert adapter.requests == Counter({url: 1 for url in site})
+    assert tracker["requests"] == adapter.requests
+    for stats in (scraper.last_stats, crawler.last_stats):
+        assert stats["buscas_repetidas"] == 0
+        assert sum(stats["buscadas"].values()) == stats["urls_unicas"] == len(site)
+        assert stats["enfileiradas"] == {
+            "index": 1,
+            "category": 2,
+            "listing": 3,
+            "detail": 4,
+        }
+        assert stats["duplicadas_ignoradas"] == {"detail": 1}
+
+    # Um registro por ocorrência na listagem, na ordem do crawl
+    assert [(b["title"], b["category"]) for b in sequential] == [
+        ("A Light in the Attic", "Poetry"),
+        ("Olio", "Poetry"),
+        ("Shakespeare's Sonnets", "Poetry"),
+        ("Full Moon over Noah's Ark", "Travel"),
+        ("Olio", "Travel"),
+    ]
+    assert sequential[4]["availability_copies"] == 1
+    assert _without_timestamps(concurrent) == _without_timestamps(sequential)
+
+
+@pytest.mark.parametrize("every", [1, 100])
+@pytest.mark.parametrize("engine", ["sequential", "async"])
+def test_repeated_detail_from_checkpoint(tmp_path, engine, every):
+    """Testa livro repetido resolvido pelo registro no checkpoint"""
+    shared = ("Olio", "23.88", "In stock (1 available)")
+    catalog = {**CATALOG, "Travel": CATALOG["Travel"] + [shared]}
+    site = build_site(per_page=1, catalog=catalog)
+    reference = BooksToScrapeScraper(delay=0)
+    reference.session.mount("https://", FakeAdapter(site))
+    expected = _without_timestamps(reference.scrape_all_books())
+
+    # every=100: o registro ainda está no buffer; every=1: já na tabela
+    with Checkpoint(str(tmp_path / "checkpoint.sqlite"), every=every) as checkpoint:
+        if engine == "async":
+            crawler = AsyncCrawler(
+                rate=0, per_host=3, transport=_transport(site), checkpoint=checkpoint
+            )
+            books = crawler.run()
+        else:
+            scraper = BooksToScrapeScraper(delay=0, checkpoint=checkpoint)
+            scraper.session.mount("https://", FakeAdapter(site))
+            books = scraper.scrape_all_books()
+        conn = checkpoint._conn
+        snapshot = json.loads(
+            conn.execute("SELECT snapshot FROM frontier").fetchone()[0]
+        )
+        seen = [url for (url,) in conn.execute("SELECT url FROM seen")]
+        details = dict(conn.execute("SELECT url, key FROM details"))
+
+    assert _without_timestamps(books) == expected
+    assert expected[4]["availability_copies"] == 1
+    # URLs vistas e detalhes (URL -> chave) em tabelas próprias; o snapshot
+    # fica só com a fila (vazia no fim) e os contadores
+    assert sorted(seen) == sorted(site)
+    assert len(details) == 4
+    assert all(len(json.loads(key)) == 3 for key in details.values())
+    assert snapshot["queue"] == [] and snapshot["kept"] == {}
+    assert "seen" not in snapshot and "details" not in snapshot
+
+
+def test_incremental_rescrape(site, tmp_path):
+    """Testa requisições condicionais e a saída só com livros alterados"""
+    path = str(tmp_path / "state.sqlite")
+    adapter = FakeAdapter(site)
+
+    def run():
+        with CrawlState(path) as state:
+            scraper = BooksToScrapeScraper(delay=0, state=state)
+            scraper.session.mount("https://", adapter)
+            books = scraper.scrape_all_books()
+            return books, scraper.last_changed, scraper.last_stats["estado"]
+
+    first, changed, stats = run()
+    assert changed == first
+    assert stats == {"parseadas": len(site), "registros_alterados": 4}
+
+    # Nada mudou: tudo 304, nenhum parse, mesmos registros e scraped_at
+    second, changed, stats = run()
+    assert changed == []
+    assert adapter.not_modified == len(site)
+    assert stats == {"nao_modificadas": len(site), "registros_alterados": 0}
+    assert second == first
+
+    # Uma página de detalhe muda: só ela é parseada e só o livro sai
+    olio = f"{BASE_URL}/catalogue/olio/index.html"
+    site[olio] = site[olio].replace(b"(1 available)", b"(7 available)")
+    third, changed, stats = run()
+    assert [book["title"] for book in changed] == ["Olio"]
+    assert changed[0]["availability_copies"] == 7
+    assert stats["parseadas"] == 1
+    assert [book["id"] for book in third] == [1, 2, 3, 4]
+
+
+def test_incremental_without_validators(site, tmp_path):
+    """Testa o hash do conteúdo quando o servidor não envia ETag"""
+    path = str(tmp_path / "state.sqlite")
+    with CrawlState(path) as state:
+        scraper = BooksToScrapeScraper(delay=0, state=state)
+        scraper.session.mount("https://", FakeAdapter(site, validators=False))
+        scraper.scrape_all_books()
+
+    with CrawlState(path) as state:
+        crawler = AsyncCrawler(
+            rate=0, per_host=3, transport=_transport(site), state=state
+        )
+        books = crawler.run()
+        stats = crawler.last_stats["estado"]
+
+    assert len(books) == 4
+    assert crawler.last_changed == []
+    assert stats == {"mesmo_conteudo": len(site), "registros_alterados": 0}
+
+
+@pytest.mark.parametrize("engine", ["sequential", "async"])
+def test_resume_from_checkpoint(site, tmp_path, engine):
+    """Testa a retomada sem rebuscar o que foi concluído e com os mesmos ids"""
+    reference = BooksToScrapeScraper(delay=0)
+    reference.session.mount("https://", FakeAdapter(site))
+    expected = _without_timestamps(reference.scrape_all_books())
+
+    path = str(tmp_path / "checkpoint.sqlite")
+    first = FakeAdapter(site, crash_after=5)
+    with Checkpoint(path, every=1) as checkpoint:
+        scraper = BooksToScrapeScraper(delay=0, checkpoint=checkpoint)
+        scraper.session.mount("https://", first)
+        with pytest.raises(KeyboardInterrupt):
+            scraper.scrape_all_books()
+
+    tracker = {}
+    with Checkpoint(path, every=1, resume=True) as checkpoint:
+        if engine == "async":
+            crawler = AsyncCrawler(
+                rate=0,
+                per_host=3,
+                transport=_transport(site, {}, tracker),
+                checkpoint=checkpoint,
+            )
+            books = crawler.run()
+            resumed = tracker["requests"]
+        else:
+            second = FakeAdapter(site)
+            scraper = BooksToScrapeScraper(delay=0, checkpoint=checkpoint)
+            scraper.session.mount("https://", second)
+            books = scraper.scrape_all_books()
+            resumed = second.requests
+
+    # Cada página foi buscada uma vez somando as duas execuções
+    assert sum(first.requests.values()) == 5
+    assert not set(first.requests) & set(resumed)
+    assert first.requests + resumed == Counter({url: 1 for url in site})
+    assert _without_timestamps(books) == expected
+
+
+def test_record_stream_releases_in_order():
+    """Testa a liberação abaixo da marca d'água com ids na ordem do crawl"""
+    sink = ListSink()
+    stream = RecordStream(sink)
+    stream.push([((1, 1, 1), {"t": "b"}), ((2, 1, 0), {"t": "c"})], (1, 1, 0))
+    assert sink.count == 0 and stream.buffered == 2
+
+    stream.push([((1, 1, 0), {"t": "a"})], (1, 2))
+    assert [(r["id"], r["t"]) for r in sink.records] == [(1, "a"), (2, "b")]
+
+    stream.finish()
+    assert [r["t"] for r in sink.records] == ["a", "b", "c"]
+    assert stream.buffered == 0
+
+
+@pytest.mark.parametrize("name", ["books.csv", "books.ndjson", "books.npz"])
+def test_streaming_sinks(site, tmp_path, name):
+    """Testa os formatos e a troca atômica do arquivo final"""
+    scraper = BooksToScrapeScraper(delay=0)
+    scraper.session.mount("https://", FakeAdapter(site))
+    expected = scraper.scrape_all_books()
+
+    path = tmp_path / name
+    path.write_text("anterior")
+    crawler = AsyncCrawler(rate=0, per_host=3, transport=_transport(site))
+    sink = open_sink(str(path), row_group_size=3)
+    with sink:
+        crawler.run_to(sink)
+        # Até o close o arquivo anterior continua intacto
+        assert path.read_text() == "anterior"
+    assert sink.count == 4
+    assert not list(tmp_path.glob(".*.tmp"))
+
+    if name.endswith(".csv"):
+        frame = pd.read_csv(path, keep_default_na=False)
+    elif name.endswith(".ndjson"):
+        frame = pd.read_json(path, lines=True)
+    else:
+        assert sink.row_groups == 2
+        frame = read_columnar(str(path))
+    assert list(frame.columns) == FIELDNAMES
+    assert frame["id"].tolist() == [1, 2, 3, 4]
+    assert frame["title"].tolist() == [book["title"] for book in expected]
+    assert frame["price"].tolist() == [book["price"] for book in expected]
+
+
+def test_sink_keeps_previous_file(tmp_path):
+    """Testa que erro ou crawl vazio não substituem o arquivo anterior"""
+    path = tmp_path / "books.csv"
+    path.write_text("anterior")
+    with pytest.raises(RuntimeError):
+        with CsvSink(str(path)) as sink:
+            sink.write({"id": 1, "title": "Olio"})
+            raise RuntimeError("queda")
+    with CsvSink(str(path)):
+        pass
+    assert path.read_text() == "anterior"
+    assert not list(tmp_path.glob(".*.tmp"))
+
+
+def test_columnar_fallback_suffix(tmp_path):
+    """Testa o .npz no lugar do .parquet sem pyarrow"""
+    sink = ColumnarSink(str(tmp_path / "books.parquet"))
+    expected = ".parquet" if importlib.util.find_spec("pyarrow") else ".npz"
+    assert sink.path.suffix == expected
+
+
+def test_async_process_pool_parsing(site):
+    """Testa o parse num pool de processos e as estatísticas das etapas"""
+    scraper = BooksToScrapeScraper(delay=0)
+    scraper.session.mount("https://", FakeAdapter(site))
+    expected = _without_timestamps(scraper.scrape_all_books())
+
+    crawler = AsyncCrawler(
+        rate=0, per_host=3, parse_workers=2, transport=_transport(site)
+    )
+    books = crawler.run()
+
+    assert _without_timestamps(books) == expected
+    stages = crawler.last_stats["etapas"]
+    assert stages["busca"]["itens"] == stages["parse"]["itens"] == len(site)
+    assert stages["parse"]["ocupado_s"] > 0
+
+
+def test_parse_queue_backpressure(site):
+    """Testa que a fila limitada segura os fetchers quando o parse atrasa"""
+    crawler = AsyncCrawler(rate=0, per_host=4, queue_size=1, transport=_transport(site))
+    parse = crawler._parse
+
+    def slow_parse(kind, content, url):
+        time.sleep(0.005)
+        return parse(kind, content, url)
+
+    crawler._parse = slow_parse
+    assert len(crawler.run()) == 4
+    stages = crawler.last_stats["etapas"]
+    assert stages["fila"] == {"capacidade": 1, "profundidade_maxima": 1}
+    assert stages["busca"]["bloqueado_s"] > 0
+
+
+def test_async_retries_and_concurrency_limit(site):
+    """Testa novas tentativas em 503 e o limite de requisições por host"""
+    olio = f"{BASE_URL}/catalogue/olio/index.html"
+    attic = f"{BASE_URL}/catalogue/a-light-in-the-attic/index.html"
+    tracker = {}
+    crawler = AsyncCrawler(
+        rate=0,
+        per_host=2,
+        max_retries=2,
+        backoff_factor=0,
+        transport=_transport(site, {olio: 1, attic: 5}, tracker),
+    )
+    books = {book["title"]: book for book in crawler.run()}
+
+    assert books["Olio"]["availability_copies"] == 1
+    # Tentativas esgotadas: o livro fica com os valores padrão dos detalhes
+    assert books["A Light in the Attic"]["upc"] == ""
+    assert books["A Light in the Attic"]["availability"] == "Unknown"
+    assert tracker["max"] <= 2
+
+
+def test_rate_limiter_spaces_requests():
+    """Testa o espaçamento de 1/rate entre os inícios"""
+
+    async def run():
+        limiter = RateLimiter(rate=100)
+        start = time.monotonic()
+        await asyncio.gather(*(limiter.wait() for _ in range(6)))
+        return time.monotonic() - start
+
+    assert asyncio.run(run()) >= 0.045
+
+
+def test_record_and_replay(site, tmp_path):
+    """Testa gravar um crawl e reproduzi-lo no servidor local pelos dois motores"""
+    with ResponseCache(str(tmp_path / "cache")) as recorder:
+        scraper = BooksToScrapeScraper(delay=0, recorder=recorder)
+        scraper.session.mount("https://", FakeAdapter(site))
+        recorded = _without_timestamps(scraper.scrape_all_books())
+
+    cache = ResponseCache(str(tmp_path / "cache"))
+    assert cache.stats() == {"urls": len(site), "objetos": len(site)}
+    with FixtureServer(cache) as server:
+        sequential = BooksToScrapeScraper(delay=0, base_url=server.base_url)
+        replayed = _without_timestamps(sequential.scrape_all_books())
+        assert sum(server.requests.values()) == len(site)
+        concurrent = AsyncCrawler(base_url=server.base_url, rate=0, per_host=3)
+        assert _without_timestamps(concurrent.run()) == replayed
+
+    # Mesmos registros, com as URLs apontando para o servidor local
+    for book in replayed:
+        for field in ("product_page_url", "image_url"):
+            book[field] = book[field].replace(server.base_url, BASE_URL)
+    assert replayed == recorded
+
+
+def test_generated_site_with_injected_errors(tmp_path):
+    """Testa o site gerado do CSV servido com erros 503 injetados"""
+    books = [book for book in load_books() if book["category"] in ("Poetry", "Art")]
+    cache = ResponseCache(str(tmp_path / "cache"))
+    for path, content in generate_site(books, per_page=5).items():
+        cache.store(path, Fetched(200, content))
+
+    with FixtureServer(cache, error_rate=0.2, retry_after=0, seed=1) as server:
+        crawler = AsyncCrawler(
+            base_url=server.base_url,
+            rate=0,
+            per_host=4,
+            max_retries=8,
+            backoff_factor=0,
+        )
+        crawled = crawler.run()
+        assert server.errors > 0
+
+    def key(book):
+        return book["product_page_url"].split("/catalogue/")[1]
+
+    expected = {key(book): book for book in books}
+    assert len(crawled) == len(books)
+    for book in crawled:
+        reference = expected[key(book)]
+        for field in FIELDNAMES:
+            if field not in ("id", "product_page_url", "image_url", "scraped_at"):
+                assert book[field] == reference[field], field
+
+
+@pytest.mark.parametrize("engine", ["sequential", "async"])
+def test_run_report(site, tmp_path, engine):
+    """Testa o relatório com tempos por etapa, bytes, status e novas tentativas"""
+    cache = ResponseCache(str(tmp_path / "cache"))
+    for url, content in site.items():
+        cache.store(url, Fetched(200, content))
+
+    # seed 3: só falhas isoladas (o Retry do urllib3 repete a primeira na hora)
+    with FixtureServer(cache, error_rate=0.25, seed=3) as server:
+        if engine == "async":
+            runner = AsyncCrawler(
+                base_url=server.base_url, rate=0, per_host=3, backoff_factor=0
+            )
+            books = runner.run()
+        else:
+            runner = BooksToScrapeScraper(delay=0, base_url=server.base_url)
+            books = runner.scrape_all_books()
+        errors = server.errors
+
+    report = runner.last_report
+    assert len(books) == report["livros"] == 4
+    assert report["motor"] == engine
+    assert report["paginas"] == len(site)
+    assert report["bytes"] == sum(len(content) for content in site.values())
+    assert errors > 0
+    assert report["status"] == {"200": len(site), "503": errors}
+    assert report["novas_tentativas"] == errors
+    assert sum(point["paginas"] for point in report["serie"]) == len(site)
+    stages = report["etapas"]
+    # No sequencial as tentativas refeitas ficam dentro do Retry do urllib3
+    attempts = len(site) + (errors if engine == "async" else 0)
+    assert stages["download"]["n"] == attempts
+    assert stages["parse"]["n"] == len(site)
+    assert {"conexao", "download", "escrita"} <= set(stages)
+    assert ("espera_fila" in stages) == (engine == "async")
+    assert report["fronteira"]["urls_unicas"] == len(site)
+
+    path = tmp_path / "report.json"
+    write_report(report, str(path))
+    assert json.loads(path.read_text(encoding="utf-8")) == report
+
+
+def test_aimd_controller():
+    """Testa aumento aditivo, corte multiplicativo, teto e Retry-After"""
+    controller = AimdController(initial=2, ceiling=4, window=3)
+    for _ in range(3):
+        controller.observe(200, 0.01)
+    assert controller.limit == 3
+    for _ in range(9):
+        controller.observe(200, 0.01)
+    assert controller.limit == 4  # teto
+
+    controller.observe(503)
+    assert controller.limit == 2
+    # Respostas de requisições que já estavam em andamento não cortam de novo
+    controller.observe(503)
+    assert controller.limit == 2
+    controller.observe(429, retry_after=30)
+    assert controller.limit == 1
+    assert controller.pause() > 29
+
+    # Pico de latência (depois de `window` amostras de referência)
+    controller = AimdController(initial=4, ceiling=4, window=3)
+    for _ in range(3):
+        controller.observe(200, 0.01)
+    controller.observe(200, 0.5)
+    assert controller.limit == 2
+    assert controller.history[-1]["motivo"].startswith("pico de latência")
+    stats = controller.stats()
+    assert (stats["limite_max"], stats["limite_final"], stats["reducoes"]) == (4, 2, 1)
+
+
+def test_adaptive_concurrency_under_overload(tmp_path):
+    """Testa o motor assíncrono adaptativo contra um servidor com capacidade 2"""
+    books = [book for book in load_books() if book["category"] in ("Poetry", "Art")]
+    cache = ResponseCache(str(tmp_path / "cache"))
+    for path, content in generate_site(books, per_page=5).items():
+        cache.store(path, Fetched(200, content))
+
+    with FixtureServer(cache, latency=0.02, capacity=2) as server:
+        crawler = AsyncCrawler(
+            base_url=server.base_url,
+            rate=0,
+            per_host=8,
+            max_connections=8,
+            adaptive=True,
+        )
+        crawled = crawler.run()
+
+    report = crawler.last_report
+    (adaptive,) = report["adaptativo"].values()
+    assert adaptive["aumentos"] > 0 and adaptive["reducoes"] > 0
+    assert adaptive["limite_max"] <= 8
+    # Cortes logo após os 503: poucos erros e nenhum livro sem detalhes
+    assert report["status"].get("503", 0) <= 5
+    assert len(crawled) == len(books)
+    assert all(book["upc"] for book in crawled)
+
+
+def test_sequential_adaptive_rate(site, tmp_path):
+    """Testa o ritmo adaptativo do scraper sequencial no lugar do Retry fixo"""
+    cache = ResponseCache(str(tmp_path / "cache"))
+    for url, content in site.items():
+        cache.store(url, Fetched(200, content))
+
+    with FixtureServer(cache, error_rate=0.25, seed=3) as server:
+        scraper = BooksToScrapeScraper(
+            delay=0, base_url=server.base_url, adaptive=True, max_rate=100
+        )
+        books = scraper.scrape_all_books()
+        errors = server.errors
+
+    report = scraper.last_report
+    assert len(books) == 4 and all(book["upc"] for book in books)
+    # Os 503 voltam para o controlador (não ficam escondidos no Retry)
+    assert report["status"] == {"200": len(site), "503": errors}
+    assert report["novas_tentativas"] == errors
+    adaptive = report["adaptativo"]
+    assert adaptive["unidade"] == "req/s"
+    assert adaptive["reducoes"] > 0
+    assert adaptive["limite_final"] < 100
@@ -0,0 +1,99 @@
+"""
+Testes para a busca ranqueada (BM25 + trigramas)
+"""
+
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+from api.main import app
+from api.search import SearchIndex, tokenize
+
+
+@pytest.fixture
+def index():
+    """Índice sobre um catálogo pequeno"""
+    df = pd.DataFrame(
+        {
+            "title": [
+                "It's Only the Himalayas",
+                "A Light in the Attic",
+                "Love in the Time of Cholera",
+                "The Book of Love",
+                "Shakespeare's Sonnets",
+            ],
+            "description": [
+                "A backpacking adventure across mountains",
+                "Poems for children",
+                "A love story",
+                "Love love love everywhere",
+                "Poetry by William Shakespeare",
+            ],
+        }
+    )
+    return SearchIndex(df)
+
+
+@pytest.fixture
+def client():
+    """Cliente de teste para a API"""
+    return TestClient(app)
+
+
+def test_tokenize_normalizes_case_and_accents():
+    """Testa tokenização sem acentos e em minúsculas"""
+    assert tokenize("Café, LOVE & Poésie!") == ["cafe", "love", "poesie"]
+
+
+def test_ranked_search_orders_by_relevance(index):
+    """Testa que o título com o termo pontua acima da descrição"""
+    positions, scores, total, corrections = index.search("poetry sonnets", limit=10)
+    assert total == 1
+    assert corrections == {}
+
+    positions, scores, total, _ = index.search("love", limit=10)
+    assert total == 2
+    # "The Book of Love" tem o termo no título e 3x na descrição
+    assert list(positions) == [3, 2]
+    assert list(scores) == sorted(scores, reverse=True)
+
+
+def test_typo_is_corrected(index):
+    """Testa correção por trigramas e sugestão"""
+    positions, _, total, corrections = index.search("himalya", limit=10)
+    assert corrections == {"himalya": "himalayas"}
+    assert list(positions) == [0]
+    assert index.suggest("himalya") == "himalayas"
+
+
+def test_unrelated_term_has_no_results(index):
+    """Testa termo sem correspondência nem correção"""
+    _, _, total, corrections = index.search("xqzvw", limit=10)
+    assert total == 0
+    assert corrections == {}
+    assert index.suggest("xqzvw") is None
+
+
+def test_limit_returns_top_results_only(index):
+    """Testa seleção parcial dos melhores resultados"""
+    positions, _, total, _ = index.search("the love", limit=2)
+    assert total == 4
+    assert len(positions) == 2
+
+
+def test_search_endpoint_ranked_mode(client):
+    """Testa modo ranked no endpoint"""
+    response = client.get("/books/search?q=himalya&mode=ranked")
+    assert response.status_code in [200, 503]
+
+    if response.status_code == 200:
+        data = response.json()
+        assert data["modo"] == "ranked"
+        assert "livros" in data
+        assert "sugestao" in data
+
+
+def test_search_endpoint_invalid_mode(client):
+    """Testa modo inválido"""
+    response = client.get("/books/search?q=love&mode=fuzzy")
+    assert response.status_code == 422
@@ -0,0 +1,99 @@
+"""
+Testes para livros semelhantes (TF-IDF esparso)
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+from api.main import app
+from api.similar import SimilarityIndex
+
+
+@pytest.fixture
+def client():
+    """Cliente de teste para a API"""
+    return TestClient(app)
+
+
+@pytest.fixture
+def books():
+    """Catálogo pequeno com textos sobrepostos"""
+    return pd.DataFrame(
+        {
+            "id": [10, 11, 12, 13, 14],
+            "title": [
+                "Dragon Fire",
+                "The Dragon Queen",
+                "Cooking with Fire",
+                "Garden Recipes",
+                "Queen of Gardens",
+            ],
+            "description": [
+                "A dragon burns the northern kingdom",
+                "The queen rides a dragon over the kingdom",
+                "Recipes for the open fire and grill",
+                "Seasonal recipes from the kitchen garden",
+                "A queen tends her royal gardens",
+            ],
+            "category": ["Fantasy", "Fantasy", "Food", "Food", "Fantasy"],
+            "price": [10.0, 12.0, 30.0, 28.0, 55.0],
+        }
+    )
+
+
+def test_text_similarity_matches_dense(books):
+    """Testa o produto esparso contra a matriz densa"""
+    index = SimilarityIndex(books)
+    dense = np.zeros((index.n_docs, len(index.terms)))
+    for position in range(index.n_docs):
+        start, end = index.row_ptr[position], index.row_ptr[position + 1]
+        dense[position, index.row_terms[start:end]] = index.row_values[start:end]
+
+    assert np.allclose(np.linalg.norm(dense, axis=1), 1.0, atol=1e-6)
+    for position in range(index.n_docs):
+        assert np.allclose(
+            index.text_similarity(position), dense @ dense[position], atol=1e-6
+        )
+
+
+def test_similar_ranks_and_excludes_self(books):
+    """Testa ordem decrescente, exclusão do próprio livro e limite de k"""
+    index = SimilarityIndex(books)
+    positions, scores = index.similar(0, 3)
+
+    assert len(positions) == 3
+    assert 0 not in positions
+    assert list(scores) == sorted(scores, reverse=True)
+    # Mesma categoria e termos em comum ("dragon", "kingdom")
+    assert positions[0] == 1
+    assert index.position_of(12) == 2
+    assert index.position_of(99) is None
+
+
+def test_similar_k_above_catalog_size(books):
+    """Testa k maior que o catálogo: todos os outros livros, sem o próprio"""
+    index = SimilarityIndex(books)
+    positions, scores = index.similar(0, 10)
+
+    assert sorted(positions) == [1, 2, 3, 4]
+    assert np.isfinite(scores).all()
+    assert len(SimilarityIndex(books.head(1)).similar(0, 10)[0]) == 0
+
+
+def test_similar_endpoint(client):
+    """Testa /books/{book_id}/similar"""
+    response = client.get("/books/1/similar?k=5")
+    assert response.status_code in [200, 503]
+
+    if response.status_code == 200:
+        data = response.json()
+        assert data["livro_id"] == 1
+        assert len(data["similares"]) == 5
+        assert all(book["id"] != 1 for book in data["similares"])
+        scores = [book["similaridade"] for book in data["similares"]]
+        assert scores == sorted(scores, reverse=True)
+
+        assert client.get("/books/999999/similar").status_code == 404
+        assert client.get("/books/1/similar?k=0").status_code == 422
@@ -0,0 +1,116 @@
+"""
+Testes para o autocompletar por prefixo e a recarga do dataset
+"""
+
+import os
+
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+from api.dataset import DatasetStore
+from api.main import app
+from api.search import PrefixIndex, build_prefix_index
+
+
+@pytest.fixture
+def index():
+    """Índice sobre um catálogo pequeno"""
+    df = pd.DataFrame(
+        {
+            "title": [
+                "The Hobbit",
+                "Hob Nob Cookbook",
+                "A Light in the Attic",
+                "Holy Bible",
+                "Hobbies & Crafts",
+                "The Light Fantastic",
+            ],
+            "rating": [5, 2, 3, 4, 5, 4],
+        }
+    )
+    return PrefixIndex(df)
+
+
+@pytest.fixture
+def client():
+    """Cliente de teste para a API"""
+    return TestClient(app)
+
+
+def test_prefix_ranked_by_rating(index):
+    """Testa ordem por avaliação e desempate por título"""
+    positions, total = index.suggest("hob", k=10)
+    # "hobbies crafts" e "the hobbit" (rating 5), depois "hob nob" (rating 2)
+    assert list(positions) == [4, 0, 1]
+    assert total == 3
+
+
+def test_prefix_ignores_case_punctuation_and_articles(index):
+    """Testa normalização do prefixo e títulos sem artigo inicial"""
+    positions, total = index.suggest("LIGHT", k=10)
+    assert list(positions) == [5, 2]
+    assert total == 2
+
+    # O título completo também casa ("the h..." -> The Hobbit)
+    positions, _ = index.suggest("The H", k=10)
+    assert list(positions) == [0]
+
+
+def test_short_prefix_uses_precomputed_top_k(index):
+    """Testa prefixo curto (pré-calculado) com limite k"""
+    positions, total = index.suggest("h", k=2)
+    assert list(positions) == [4, 0]
+    assert total == 4
+
+
+def test_unknown_or_empty_prefix(index):
+    """Testa prefixo sem correspondência e prefixo vazio após normalização"""
+    assert index.suggest("zzz", k=5)[1] == 0
+    positions, total = index.suggest("!!", k=5)
+    assert total == 0
+    assert len(positions) == 0
+
+
+def test_store_reload_rebuilds_index(tmp_path):
+    """Testa recarga do CSV: nova versão com índice reconstruído"""
+    path = tmp_path / "books.csv"
+    pd.DataFrame({"title": ["Dune"], "rating": [5], "price": [10.0]}).to_csv(
+        path, index=False
+    )
+    store = DatasetStore(str(path), check_interval=0)
+    store.add_warmer("prefix_index", build_prefix_index)
+    first = store.load()
+    assert first.derived("prefix_index", build_prefix_index).suggest("du")[1] == 1
+
+    pd.DataFrame(
+        {"title": ["Dune", "Dubliners"], "rating": [5, 4], "price": [10.0, 8.0]}
+    ).to_csv(path, index=False)
+    os.utime(path, ns=(0, 0))
+    second = store.load()
+    assert second.version != first.version
+    assert store.current() is second
+    assert store.reloads == 1
+    assert second.derived("prefix_index", build_prefix_index).suggest("du")[1] == 2
+
+    # Mesmo conteúdo: mantém o dataset (e as estruturas já construídas)
+    assert store.load() is second
+
+
+def test_suggest_endpoint(client):
+    """Testa endpoint de autocompletar"""
+    response = client.get("/books/suggest?prefix=the&k=3")
+    assert response.status_code in [200, 503]
+
+    if response.status_code == 200:
+        data = response.json()
+        assert data["prefixo"] == "the"
+        assert len(data["sugestoes"]) <= 3
+        ratings = [book["rating"] for book in data["sugestoes"]]
+        assert ratings == sorted(ratings, reverse=True)
+
+
+def test_suggest_endpoint_invalid_k(client):
+    """Testa limite de k"""
+    response = client.get("/books/suggest?prefix=a&k=100")
+    assert response.status_code == 422
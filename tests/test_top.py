@@ -0,0 +1,88 @@
+"""
+Testes para o top-k por seleção parcial
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+from api.dataset import BooksDataset
+from api.main import app
+from api.utils import select_top
+
+
+@pytest.fixture
+def client():
+    """Cliente de teste para a API"""
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("descending", [False, True])
+@pytest.mark.parametrize("k", [1, 5, 50, 500])
+def test_select_top_matches_stable_sort(k, descending):
+    """Testa equivalência com ordenação estável (com empates e nulos)"""
+    rng = np.random.default_rng(3)
+    values = rng.integers(1, 6, 200).astype(float)
+    values[rng.choice(200, 10, replace=False)] = np.nan
+
+    expected = (
+        pd.Series(values).sort_values(ascending=not descending, kind="stable").index[:k]
+    )
+    assert list(select_top(values, k, descending)) == list(expected)
+
+
+def test_dataset_cached_per_version():
+    """Testa memorização por chave com descarte LRU"""
+    dataset = BooksDataset(pd.DataFrame({"price": [1.0, 2.0]}))
+    calls = []
+
+    def compute(value):
+        calls.append(value)
+        return value
+
+    assert dataset.cached("teste", "a", lambda: compute(1), max_entries=1) == 1
+    assert dataset.cached("teste", "a", lambda: compute(2), max_entries=1) == 1
+    dataset.cached("teste", "b", lambda: compute(3), max_entries=1)
+    assert dataset.cached("teste", "a", lambda: compute(4), max_entries=1) == 4
+    assert calls == [1, 3, 4]
+
+
+def test_top_endpoint_matches_sorted_listing(client):
+    """Testa /books/top contra /books ordenado"""
+    top = client.get("/books/top?by=price&order=desc&k=10&category=Poetry")
+    assert top.status_code in [200, 503]
+
+    if top.status_code == 200:
+        listing = client.get(
+            "/books?sort=price&order=desc&per_page=10&category=Poetry"
+        ).json()
+        data = top.json()
+        assert data["total"] == listing["total"]
+        assert [b["id"] for b in data["livros"]] == [b["id"] for b in listing["livros"]]
+
+        # Segunda chamada vem do cache com o mesmo resultado
+        assert (
+            client.get("/books/top?by=price&order=desc&k=10&category=Poetry").json()
+            == data
+        )
+
+
+@pytest.mark.parametrize("order", ["asc", "desc"])
+@pytest.mark.parametrize("k", [1, 20, 100])
+def test_top_endpoint_ties_match_listing(client, order, k):
+    """Testa a mesma ordem de empates em /books/top e /books (rating)"""
+    top = client.get(f"/books/top?by=rating&order={order}&k={k}")
+    assert top.status_code in [200, 503]
+
+    if top.status_code == 200:
+        listing = client.get(f"/books?sort=rating&order={order}&per_page={k}").json()
+        assert [b["id"] for b in top.json()["livros"]] == [
+            b["id"] for b in listing["livros"]
+        ]
+
+
+def test_top_endpoint_invalid_field(client):
+    """Testa campo não numérico"""
+    response = client.get("/books/top?by=title")
+    assert response.status_code == 422